@@ -29,6 +29,7 @@ from authentik.core.api.utils import ModelSerializer
 from authentik.core.models import Application, User
 from authentik.events.logs import LogEventSerializer, capture_logs
 from authentik.events.models import EventAction
+from authentik.lib.utils.cache import get_generation
 from authentik.lib.utils.file import (
     FilePathSerializer,
     FileUploadSerializer,
@@ -41,12 +42,15 @@ from authentik.policies.types import CACHE_PREFIX, PolicyResult
 from authentik.rbac.decorators import permission_required
 from authentik.rbac.filters import ObjectFilter
 
+# Generation namespace of cached application lists, see `authentik.lib.utils.cache`
+USER_APP_CACHE_GENERATION = "core/app_access"
+
 LOGGER = get_logger()
 
 
 def user_app_cache_key(user_pk: str, page_number: int | None = None) -> str:
     """Cache key where application list for user is saved"""
-    key = f"{CACHE_PREFIX}/app_access/{user_pk}"
+    key = f"{CACHE_PREFIX}/app_access/{get_generation(USER_APP_CACHE_GENERATION)}/{user_pk}"
     if page_number:
         key += f"/{page_number}"
     return key
@@ -263,14 +267,13 @@ class ApplicationViewSet(UsedByMixin, ModelViewSet):
         if not should_cache:
             allowed_applications = self._get_allowed_applications(paginated_apps)
         if should_cache:
-            allowed_applications = cache.get(
-                user_app_cache_key(self.request.user.pk, paginator.page.number)
-            )
+            key = user_app_cache_key(self.request.user.pk, paginator.page.number)
+            allowed_applications = cache.get(key)
             if not allowed_applications:
                 LOGGER.debug("Caching allowed application list", page=paginator.page.number)
                 allowed_applications = self._get_allowed_applications(paginated_apps)
                 cache.set(
-                    user_app_cache_key(self.request.user.pk, paginator.page.number),
+                    key,
                     allowed_applications,
                     timeout=86400,
                 )
@@ -0,0 +1,35 @@
+# Generated by Django 5.0.9 on 2024-09-10 12:00
+
+import django.db.models.fields.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authentik_core", "0039_source_group_matching_mode_alter_group_name_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="group",
+            index=models.Index(
+                django.db.models.fields.json.KeyTransform("ldap_uniq", "attributes"),
+                name="authentik_c_grp_ldap_uniq_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(
+                django.db.models.fields.json.KeyTransform("ldap_uniq", "attributes"),
+                name="authentik_c_user_ldap_uniq_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(
+                django.db.models.fields.json.KeyTransform("distinguishedName", "attributes"),
+                name="authentik_c_user_ldap_dn_idx",
+            ),
+        ),
+    ]
@@ -12,6 +12,7 @@ from django.contrib.auth.models import UserManager as DjangoUserManager
 from django.db import models
 from django.db.models import Q, QuerySet, options
 from django.db.models.constants import LOOKUP_SEP
+from django.db.models.fields.json import KeyTransform
 from django.http import HttpRequest
 from django.utils.functional import SimpleLazyObject, cached_property
 from django.utils.timezone import now
@@ -110,8 +111,8 @@ class AttributesMixin(models.Model):
     class Meta:
         abstract = True
 
-    def update_attributes(self, properties: dict[str, Any]):
-        """Update fields and attributes, but correctly by merging dicts"""
+    def apply_attributes(self, properties: dict[str, Any]):
+        """Set fields and attributes without saving, merging attributes dicts"""
         for key, value in properties.items():
             if key == "attributes":
                 continue
@@ -120,6 +121,10 @@ class AttributesMixin(models.Model):
         MERGE_LIST_UNIQUE.merge(final_attributes, self.attributes)
         MERGE_LIST_UNIQUE.merge(final_attributes, properties.get("attributes", {}))
         self.attributes = final_attributes
+
+    def update_attributes(self, properties: dict[str, Any]):
+        """Update fields and attributes, but correctly by merging dicts"""
+        self.apply_attributes(properties)
         self.save()
 
     @classmethod
@@ -198,7 +203,13 @@ class Group(SerializerModel, AttributesMixin):
                 "parent",
             ),
         )
-        indexes = [models.Index(fields=["name"])]
+        indexes = [
+            models.Index(fields=["name"]),
+            # Group lookups of LDAP sources, see `authentik.sources.ldap.models.LDAP_UNIQUENESS`
+            models.Index(
+                KeyTransform("ldap_uniq", "attributes"), name="authentik_c_grp_ldap_uniq_idx"
+            ),
+        ]
         verbose_name = _("Group")
         verbose_name_plural = _("Groups")
         permissions = [
@@ -289,6 +300,15 @@ class User(SerializerModel, GuardianUserMixin, AttributesMixin, AbstractUser):
             models.Index(fields=["uuid"]),
             models.Index(fields=["path"]),
             models.Index(fields=["type"]),
+            # User lookups of LDAP sources, see `authentik.sources.ldap.models.LDAP_UNIQUENESS`
+            # and `LDAP_DISTINGUISHED_NAME`
+            models.Index(
+                KeyTransform("ldap_uniq", "attributes"), name="authentik_c_user_ldap_uniq_idx"
+            ),
+            models.Index(
+                KeyTransform("distinguishedName", "attributes"),
+                name="authentik_c_user_ldap_dn_idx",
+            ),
         ]
 
     def __str__(self):
@@ -792,6 +812,32 @@ class ExpiringModel(models.Model):
         values instead of being deleted."""
         return self.delete(*args, **kwargs)
 
+    @classmethod
+    def filter_expired(cls) -> QuerySet:
+        """Filter for objects which are expiring and have expired"""
+        return cls.objects.all().exclude(expiring=False).exclude(expiring=True, expires__gt=now())
+
+    @classmethod
+    def expire_all(cls, batch_size: int = 1000) -> int:
+        """Expire all expired objects and return how many were expired. Unless `expire_action`
+        is overridden, objects are deleted in chunks of `batch_size` with a single query each
+        (as well as queries for related objects and signals)."""
+        if cls.expire_action is not ExpiringModel.expire_action:
+            amount = 0
+            for obj in cls.filter_expired().iterator(chunk_size=batch_size):
+                obj.expire_action()
+                amount += 1
+            return amount
+        amount = 0
+        while True:
+            # Delete by primary key, as sliced querysets can't be deleted
+            pks = list(cls.filter_expired().values_list("pk", flat=True)[:batch_size])
+            if not pks:
+                return amount
+            cls.objects.filter(pk__in=pks).delete()
+            amount += len(pks)
+            LOGGER.debug("Expired chunk", model=cls, amount=amount)
+
     @classmethod
     def filter_not_expired(cls, **kwargs) -> QuerySet["Token"]:
         """Filer for tokens which are not expired yet or are not expiring,
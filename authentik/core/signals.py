@@ -18,6 +18,7 @@ from authentik.core.models import (
     User,
     default_token_duration,
 )
+from authentik.lib.utils.cache import bump_generation
 
 # Arguments: user: User, password: str
 password_changed = Signal()
@@ -30,14 +31,13 @@ LOGGER = get_logger()
 @receiver(post_save, sender=Application)
 def post_save_application(sender: type[Model], instance, created: bool, **_):
     """Clear user's application cache upon application creation"""
-    from authentik.core.api.applications import user_app_cache_key
+    from authentik.core.api.applications import USER_APP_CACHE_GENERATION
 
     if not created:  # pragma: no cover
         return
 
     # Also delete user application cache
-    keys = cache.keys(user_app_cache_key("*"))
-    cache.delete_many(keys)
+    bump_generation(USER_APP_CACHE_GENERATION)
 
 
 @receiver(user_logged_in)
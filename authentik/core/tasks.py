@@ -1,12 +1,16 @@
 """authentik core tasks"""
 
 from datetime import datetime, timedelta
+from itertools import islice
+from time import perf_counter
 
 from django.conf import ImproperlyConfigured
 from django.contrib.sessions.backends.cache import KEY_PREFIX
 from django.contrib.sessions.backends.db import SessionStore as DBSessionStore
 from django.core.cache import cache
+from django.db.models import Exists, OuterRef
 from django.utils.timezone import now
+from django_redis import get_redis_connection
 from structlog.stdlib import get_logger
 
 from authentik.core.models import (
@@ -21,6 +25,42 @@ from authentik.lib.config import CONFIG
 from authentik.root.celery import CELERY_APP
 
 LOGGER = get_logger()
+SESSION_BATCH_SIZE = 1000
+
+
+def clean_sessions_cache(batch_size: int = SESSION_BATCH_SIZE) -> int:
+    """Delete authenticated sessions whose session doesn't exist in the cache anymore. The
+    sessions of each batch are checked with a single pipeline of EXISTS commands."""
+    amount = 0
+    sessions = AuthenticatedSession.objects.values_list("pk", "session_key").iterator(
+        chunk_size=batch_size
+    )
+    while batch := list(islice(sessions, batch_size)):
+        pipeline = get_redis_connection().pipeline(transaction=False)
+        for _, session_key in batch:
+            pipeline.exists(cache.make_key(f"{KEY_PREFIX}{session_key}"))
+        dead = [pk for (pk, _), exists in zip(batch, pipeline.execute(), strict=True) if not exists]
+        if dead:
+            AuthenticatedSession.objects.filter(pk__in=dead).delete()
+            amount += len(dead)
+    return amount
+
+
+def clean_sessions_db(batch_size: int = SESSION_BATCH_SIZE) -> int:
+    """Delete authenticated sessions whose session has expired or doesn't exist anymore,
+    in batches of `batch_size`"""
+    dead = AuthenticatedSession.objects.filter(
+        ~Exists(
+            DBSessionStore.get_model_class().objects.filter(
+                session_key=OuterRef("session_key"), expire_date__gt=now()
+            )
+        )
+    )
+    amount = 0
+    while pks := list(dead.values_list("pk", flat=True)[:batch_size]):
+        AuthenticatedSession.objects.filter(pk__in=pks).delete()
+        amount += len(pks)
+    return amount
 
 
 @CELERY_APP.task(bind=True, base=SystemTask)
@@ -30,43 +70,26 @@ def clean_expired_models(self: SystemTask):
     messages = []
     for cls in ExpiringModel.__subclasses__():
         cls: ExpiringModel
-        objects = (
-            cls.objects.all().exclude(expiring=False).exclude(expiring=True, expires__gt=now())
+        start = perf_counter()
+        amount = cls.expire_all()
+        duration = perf_counter() - start
+        rate = amount / duration if duration > 0 else 0
+        LOGGER.debug("Expired models", model=cls, amount=amount, duration=duration, rate=rate)
+        messages.append(
+            f"Expired {amount} {cls._meta.verbose_name_plural} in {duration:.2f}s "
+            f"({rate:.0f} per second)"
         )
-        amount = objects.count()
-        for obj in objects:
-            obj.expire_action()
-        LOGGER.debug("Expired models", model=cls, amount=amount)
-        messages.append(f"Expired {amount} {cls._meta.verbose_name_plural}")
     # Special case
-    amount = 0
-
-    for session in AuthenticatedSession.objects.all():
-        match CONFIG.get("session_storage", "cache"):
-            case "cache":
-                cache_key = f"{KEY_PREFIX}{session.session_key}"
-                value = None
-                try:
-                    value = cache.get(cache_key)
-
-                except Exception as exc:
-                    LOGGER.debug("Failed to get session from cache", exc=exc)
-                if not value:
-                    session.delete()
-                    amount += 1
-            case "db":
-                if not (
-                    DBSessionStore.get_model_class()
-                    .objects.filter(session_key=session.session_key, expire_date__gt=now())
-                    .exists()
-                ):
-                    session.delete()
-                    amount += 1
-            case _:
-                # Should never happen, as we check for other values in authentik/root/settings.py
-                raise ImproperlyConfigured(
-                    "Invalid session_storage setting, allowed values are db and cache"
-                )
+    match CONFIG.get("session_storage", "cache"):
+        case "cache":
+            amount = clean_sessions_cache()
+        case "db":
+            amount = clean_sessions_db()
+        case _:
+            # Should never happen, as we check for other values in authentik/root/settings.py
+            raise ImproperlyConfigured(
+                "Invalid session_storage setting, allowed values are db and cache"
+            )
     LOGGER.debug("Expired sessions", model=AuthenticatedSession, amount=amount)
 
     messages.append(f"Expired {amount} {AuthenticatedSession._meta.verbose_name_plural}")
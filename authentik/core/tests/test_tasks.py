@@ -1,7 +1,11 @@
 """Test tasks"""
 
+from datetime import timedelta
 from time import mktime
 
+from django.contrib.sessions.backends.cache import KEY_PREFIX
+from django.contrib.sessions.backends.db import SessionStore as DBSessionStore
+from django.core.cache import cache
 from django.utils.timezone import now
 from guardian.shortcuts import get_anonymous_user
 from rest_framework.test import APITestCase
@@ -9,11 +13,17 @@ from rest_framework.test import APITestCase
 from authentik.core.models import (
     USER_ATTRIBUTE_EXPIRES,
     USER_ATTRIBUTE_GENERATED,
+    AuthenticatedSession,
     Token,
     TokenIntents,
     User,
 )
-from authentik.core.tasks import clean_expired_models, clean_temporary_users
+from authentik.core.tasks import (
+    clean_expired_models,
+    clean_sessions_cache,
+    clean_sessions_db,
+    clean_temporary_users,
+)
 from authentik.core.tests.utils import create_test_admin_user
 from authentik.lib.generators import generate_id
 
@@ -37,6 +47,52 @@ class TestTasks(APITestCase):
         token.refresh_from_db()
         self.assertNotEqual(key, token.key)
 
+    def test_expire_all(self):
+        """Test expired objects are deleted in chunks"""
+        for _ in range(5):
+            AuthenticatedSession.objects.create(
+                session_key=generate_id(), user=self.user, expires=now()
+            )
+        valid = AuthenticatedSession.objects.create(
+            session_key=generate_id(), user=self.user, expires=now() + timedelta(hours=1)
+        )
+        not_expiring = AuthenticatedSession.objects.create(
+            session_key=generate_id(), user=self.user, expires=now(), expiring=False
+        )
+        self.assertEqual(AuthenticatedSession.expire_all(batch_size=2), 5)
+        self.assertEqual(
+            set(AuthenticatedSession.objects.filter(user=self.user).values_list("pk", flat=True)),
+            {valid.pk, not_expiring.pk},
+        )
+
+    def test_clean_sessions_cache(self):
+        """Test sessions which don't exist in the cache anymore are deleted"""
+        alive = AuthenticatedSession.objects.create(session_key=generate_id(), user=self.user)
+        cache.set(f"{KEY_PREFIX}{alive.session_key}", {"foo": "bar"})
+        for _ in range(3):
+            AuthenticatedSession.objects.create(session_key=generate_id(), user=self.user)
+        self.assertEqual(clean_sessions_cache(batch_size=2), 3)
+        self.assertEqual(
+            list(AuthenticatedSession.objects.filter(user=self.user).values_list("pk", flat=True)),
+            [alive.pk],
+        )
+
+    def test_clean_sessions_db(self):
+        """Test sessions which expired in the database are deleted"""
+        alive = AuthenticatedSession.objects.create(session_key=generate_id(), user=self.user)
+        expired = AuthenticatedSession.objects.create(session_key=generate_id(), user=self.user)
+        AuthenticatedSession.objects.create(session_key=generate_id(), user=self.user)
+        Session = DBSessionStore.get_model_class()
+        Session.objects.create(
+            session_key=alive.session_key, session_data="", expire_date=now() + timedelta(hours=1)
+        )
+        Session.objects.create(session_key=expired.session_key, session_data="", expire_date=now())
+        self.assertEqual(clean_sessions_db(batch_size=1), 2)
+        self.assertEqual(
+            list(AuthenticatedSession.objects.filter(user=self.user).values_list("pk", flat=True)),
+            [alive.pk],
+        )
+
     def test_clean_temporary_users(self):
         """Test clean_temporary_users task"""
         username = generate_id
@@ -1,16 +1,24 @@
+from typing import Any
+
 from django.db.models import Model
 from django.http import HttpResponseBadRequest, HttpResponseNotFound
 from google.auth.exceptions import GoogleAuthError, TransportError
 from googleapiclient.discovery import build
 from googleapiclient.errors import Error, HttpError
-from googleapiclient.http import HttpRequest
+from googleapiclient.http import MAX_BATCH_LIMIT, BatchHttpRequest, HttpRequest
 from httplib2 import HttpLib2Error, HttpLib2ErrorWithResponse
 
+from authentik.core.expression.exceptions import SkipObjectException
 from authentik.enterprise.providers.google_workspace.models import GoogleWorkspaceProvider
-from authentik.lib.sync.outgoing import HTTP_CONFLICT
+from authentik.lib.sync.outgoing import (
+    HTTP_CONFLICT,
+    HTTP_SERVICE_UNAVAILABLE,
+    HTTP_TOO_MANY_REQUESTS,
+)
 from authentik.lib.sync.outgoing.base import BaseOutgoingSyncClient
 from authentik.lib.sync.outgoing.exceptions import (
     BadRequestSyncException,
+    BaseSyncException,
     NotFoundSyncException,
     ObjectExistsSyncException,
     StopSync,
@@ -42,23 +50,124 @@ class GoogleWorkspaceSyncClient[TModel: Model, TConnection: Model, TSchema: dict
             domain_name = domain.get("domainName")
             self.domains.append(domain_name)
 
-    def _request(self, request: HttpRequest):
+    def _request(self, request: HttpRequest | BatchHttpRequest):
+        self.wait_for_backoff()
         try:
             response = request.execute()
-        except GoogleAuthError as exc:
+        except (GoogleAuthError, HttpLib2Error, Error) as exc:
+            self._handle_exception(getattr(request, "body", None), exc)
+        return response
+
+    def _handle_exception(self, request: dict | None, exc: Exception):
+        """Raise the sync exception matching an error of the google API client"""
+        if isinstance(exc, GoogleAuthError):
             if isinstance(exc, TransportError):
                 raise TransientSyncException(f"Failed to send request: {str(exc)}") from exc
             raise StopSync(exc) from exc
-        except HttpLib2Error as exc:
-            if isinstance(exc, HttpLib2ErrorWithResponse):
-                self._response_handle_status_code(request.body, exc.response.status, exc)
-            raise TransientSyncException(f"Failed to send request: {str(exc)}") from exc
-        except HttpError as exc:
-            self._response_handle_status_code(request.body, exc.status_code, exc)
-            raise TransientSyncException(f"Failed to send request: {str(exc)}") from exc
-        except Error as exc:
-            raise TransientSyncException(f"Failed to send request: {str(exc)}") from exc
-        return response
+        if isinstance(exc, HttpLib2ErrorWithResponse):
+            self._response_handle_status_code(request, exc.response.status, exc)
+        if isinstance(exc, HttpError):
+            self._response_handle_status_code(request, exc.status_code, exc)
+        raise TransientSyncException(f"Failed to send request: {str(exc)}") from exc
+
+    def _batch(self, requests: list[HttpRequest]) -> list[tuple[Any, BaseSyncException | None]]:
+        """Execute requests with as few HTTP requests as possible, by sending them in batches.
+        Returns the response or the error (mapped like `_request`) of each request, in order.
+        Transient errors of a batch request itself are returned for all its requests"""
+        results: list[tuple[Any, BaseSyncException | None]] = [(None, None)] * len(requests)
+        if len(requests) == 1:
+            try:
+                results[0] = (self._request(requests[0]), None)
+            except BaseSyncException as exc:
+                results[0] = (None, exc)
+            return results
+
+        def callback(request_id: str, response: Any, exception: HttpError | None):
+            idx = int(request_id)
+            if not exception:
+                results[idx] = (response, None)
+                return
+            try:
+                self._handle_exception(requests[idx].body, exception)
+            except BaseSyncException as exc:
+                results[idx] = (None, exc)
+
+        for offset in range(0, len(requests), MAX_BATCH_LIMIT):
+            batch = self.directory_service.new_batch_http_request(callback=callback)
+            batch_range = range(offset, min(offset + MAX_BATCH_LIMIT, len(requests)))
+            for idx in batch_range:
+                batch.add(requests[idx], request_id=str(idx))
+            try:
+                self._request(batch)
+            except TransientSyncException as exc:
+                for idx in batch_range:
+                    results[idx] = (None, exc)
+        return results
+
+    def _bulk_request(self, schema: TSchema, connection: TConnection | None) -> HttpRequest:
+        """Request to create (without `connection`) or update an object, used by `write_bulk`"""
+        raise NotImplementedError()
+
+    def _bulk_connection(self, obj: TModel, response: dict) -> TConnection:
+        """Unsaved connection for an object created by `write_bulk`"""
+        raise NotImplementedError()
+
+    def write_bulk(self, objs: list[TModel]) -> list[TModel]:
+        """Create and update objects with batch requests. Objects whose request failed are
+        returned to be written individually, which handles (and reports) their errors"""
+        if len(objs) <= 1:
+            return objs
+        connections = {
+            getattr(connection, f"{self.connection_type_query}_id"): connection
+            for connection in self.connection_type.objects.filter(
+                provider=self.provider, **{f"{self.connection_type_query}__in": objs}
+            )
+        }
+        remaining = []
+        pending: list[tuple[TModel, str | None]] = []
+        requests = []
+        for obj in objs:
+            connection = connections.get(obj.pk)
+            self._schema_hash = None
+            try:
+                requests.append(self._bulk_request(self.to_schema(obj, connection), connection))
+            except SkipObjectException:
+                continue
+            except (StopSync, BadRequestSyncException):
+                remaining.append(obj)
+                continue
+            pending.append((obj, self._schema_hash))
+        written = []
+        hashes = {}
+        created = []
+        for (obj, schema_hash), (response, exc) in zip(pending, self._batch(requests), strict=True):
+            if exc:
+                remaining.append(obj)
+                continue
+            written.append(obj)
+            hashes[obj.pk] = schema_hash
+            if obj.pk in connections:
+                connections[obj.pk].attributes = response
+            else:
+                connections[obj.pk] = self._bulk_connection(obj, response)
+                created.append(connections[obj.pk])
+        self.connection_type.objects.bulk_create(created)
+        remaining.extend(self._bulk_written(written, connections))
+        # Remember the written schemas, see `delta`
+        remaining_pks = {obj.pk for obj in remaining}
+        updated = []
+        for obj in written:
+            if obj.pk in remaining_pks:
+                continue
+            connections[obj.pk].sync_hash = hashes[obj.pk]
+            updated.append(connections[obj.pk])
+        self.connection_type.objects.bulk_update(updated, ["attributes", "sync_hash"])
+        return remaining
+
+    def _bulk_written(self, objs: list[TModel], connections: dict) -> list[TModel]:
+        """Called with objects which have been written by `write_bulk`, returns objects
+        which have to be written individually"""
+        return []
 
     def _response_handle_status_code(self, request: dict, status_code: int, root_exc: Exception):
         if status_code == HttpResponseNotFound.status_code:
@@ -67,6 +176,8 @@ class GoogleWorkspaceSyncClient[TModel: Model, TConnection: Model, TSchema: dict
             raise ObjectExistsSyncException("Object exists") from root_exc
         if status_code == HttpResponseBadRequest.status_code:
             raise BadRequestSyncException("Bad request", request) from root_exc
+        if status_code in [HTTP_TOO_MANY_REQUESTS, HTTP_SERVICE_UNAVAILABLE]:
+            self.backoff()
 
     def check_email_valid(self, *emails: str):
         for email in emails:
@@ -1,7 +1,7 @@
 from django.db import transaction
 from django.utils.text import slugify
 
-from authentik.core.models import Group
+from authentik.core.models import Group, User
 from authentik.enterprise.providers.google_workspace.clients.base import GoogleWorkspaceSyncClient
 from authentik.enterprise.providers.google_workspace.models import (
     GoogleWorkspaceProvider,
@@ -14,7 +14,6 @@ from authentik.lib.sync.outgoing.base import Direction
 from authentik.lib.sync.outgoing.exceptions import (
     NotFoundSyncException,
     ObjectExistsSyncException,
-    TransientSyncException,
 )
 from authentik.lib.sync.outgoing.models import OutgoingSyncDeleteAction
 
@@ -53,12 +52,14 @@ class GoogleWorkspaceGroupClient(
             self.logger.debug("Group does not exist in Google, skipping")
             return None
         with transaction.atomic():
-            if self.provider.group_delete_action == OutgoingSyncDeleteAction.DELETE:
-                self._request(
-                    self.directory_service.groups().delete(groupKey=google_group.google_id)
-                )
+            self.delete_remote(google_group.google_id)
             google_group.delete()
 
+    def delete_remote(self, remote_id: str):
+        """Delete group by google ID, depending on the provider's delete action"""
+        if self.provider.group_delete_action == OutgoingSyncDeleteAction.DELETE:
+            self._request(self.directory_service.groups().delete(groupKey=remote_id))
+
     def create(self, group: Group):
         """Create group from scratch and create a connection object"""
         google_group = self.to_schema(group, None)
@@ -104,6 +105,54 @@ class GoogleWorkspaceGroupClient(
             # Resource missing is handled by self.write, which will re-create the group
             raise
 
+    def _bulk_request(self, google_group: dict, connection: GoogleWorkspaceProviderGroup | None):
+        self.check_email_valid(google_group["email"])
+        if connection:
+            return self.directory_service.groups().update(
+                groupKey=connection.google_id, body=google_group
+            )
+        return self.directory_service.groups().insert(body=google_group)
+
+    def _bulk_connection(self, group: Group, response: dict) -> GoogleWorkspaceProviderGroup:
+        return GoogleWorkspaceProviderGroup(
+            provider=self.provider,
+            group=group,
+            google_id=response["id"],
+            attributes=response,
+        )
+
+    def _bulk_written(
+        self, groups: list[Group], connections: dict[str, GoogleWorkspaceProviderGroup]
+    ) -> list[Group]:
+        """Add all members of groups written in bulk (see `create_sync_members`), with the
+        requests of all groups sent in batches"""
+        memberships = list(
+            User.ak_groups.through.objects.filter(group__in=groups).values_list(
+                "group_id", "user_id"
+            )
+        )
+        google_ids = dict(
+            GoogleWorkspaceProviderUser.objects.filter(
+                provider=self.provider, user__pk__in=[user_pk for _, user_pk in memberships]
+            ).values_list("user_id", "google_id")
+        )
+        requests = []
+        request_groups = []
+        for group_pk, user_pk in memberships:
+            if user_pk not in google_ids:
+                continue
+            requests.append(
+                self.directory_service.members().insert(
+                    groupKey=connections[group_pk].google_id, body={"email": google_ids[user_pk]}
+                )
+            )
+            request_groups.append(group_pk)
+        failed = set()
+        for group_pk, (_, exc) in zip(request_groups, self._batch(requests), strict=True):
+            if exc and not isinstance(exc, ObjectExistsSyncException):
+                failed.add(group_pk)
+        return [group for group in groups if group.pk in failed]
+
     def write(self, obj: Group):
         google_group, created = super().write(obj)
         self.create_sync_members(obj, google_group)
@@ -125,24 +174,23 @@ class GoogleWorkspaceGroupClient(
             return self._patch_remove_users(group, users_set)
 
     def _patch(self, google_group_id: str, direction: Direction, members: list[str]):
+        requests = []
         for user in members:
-            try:
-                if direction == Direction.add:
-                    self._request(
-                        self.directory_service.members().insert(
-                            groupKey=google_group_id, body={"email": user}
-                        )
+            if direction == Direction.add:
+                requests.append(
+                    self.directory_service.members().insert(
+                        groupKey=google_group_id, body={"email": user}
                     )
-                if direction == Direction.remove:
-                    self._request(
-                        self.directory_service.members().delete(
-                            groupKey=google_group_id, memberKey=user
-                        )
+                )
+            if direction == Direction.remove:
+                requests.append(
+                    self.directory_service.members().delete(
+                        groupKey=google_group_id, memberKey=user
                     )
-            except ObjectExistsSyncException:
-                pass
-            except TransientSyncException:
-                raise
+                )
+        for _, exc in self._batch(requests):
+            if exc and not isinstance(exc, ObjectExistsSyncException):
+                raise exc
 
     def _patch_add_users(self, group: Group, users_set: set[int]):
         """Add users in users_set to group"""
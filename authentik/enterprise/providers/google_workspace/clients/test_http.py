@@ -21,6 +21,25 @@ class MockHTTP:
             body = dumps(body)
         self._responses[(uri, method.upper())] = (body, meta or {"status": "200"})
 
+    def add_batch_response(self, uri: str, responses: list[tuple[int, dict]]):
+        """Add response to a batch request, with the responses to the requests of the batch"""
+        boundary = "batch_response"
+        parts = []
+        for idx, (status, body) in enumerate(responses):
+            parts.append(
+                f"--{boundary}\r\n"
+                "Content-Type: application/http\r\n"
+                f"Content-ID: <response-batch + {idx}>\r\n\r\n"
+                f"HTTP/1.1 {status} Status\r\n"
+                "Content-Type: application/json\r\n\r\n"
+                f"{dumps(body)}\r\n"
+            )
+        parts.append(f"--{boundary}--")
+        self._responses[(uri, "POST")] = (
+            "".join(parts),
+            {"status": "200", "content-type": f"multipart/mixed; boundary={boundary}"},
+        )
+
     def requests(self):
         return self._recorded_requests
 
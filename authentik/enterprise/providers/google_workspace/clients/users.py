@@ -44,20 +44,20 @@ class GoogleWorkspaceUserClient(GoogleWorkspaceSyncClient[User, GoogleWorkspaceP
             self.logger.debug("User does not exist in Google, skipping")
             return None
         with transaction.atomic():
-            response = None
-            if self.provider.user_delete_action == OutgoingSyncDeleteAction.DELETE:
-                response = self._request(
-                    self.directory_service.users().delete(userKey=google_user.google_id)
-                )
-            elif self.provider.user_delete_action == OutgoingSyncDeleteAction.SUSPEND:
-                response = self._request(
-                    self.directory_service.users().update(
-                        userKey=google_user.google_id, body={"suspended": True}
-                    )
-                )
+            response = self.delete_remote(google_user.google_id)
             google_user.delete()
         return response
 
+    def delete_remote(self, remote_id: str):
+        """Delete (or suspend) user by google ID, depending on the provider's delete action"""
+        if self.provider.user_delete_action == OutgoingSyncDeleteAction.DELETE:
+            return self._request(self.directory_service.users().delete(userKey=remote_id))
+        if self.provider.user_delete_action == OutgoingSyncDeleteAction.SUSPEND:
+            return self._request(
+                self.directory_service.users().update(userKey=remote_id, body={"suspended": True})
+            )
+        return None
+
     def create(self, user: User):
         """Create user from scratch and create a connection object"""
         google_user = self.to_schema(user, None)
@@ -94,6 +94,24 @@ class GoogleWorkspaceUserClient(GoogleWorkspaceSyncClient[User, GoogleWorkspaceP
         connection.attributes = response
         connection.save()
 
+    def _bulk_request(self, google_user: dict, connection: GoogleWorkspaceProviderUser | None):
+        self.check_email_valid(
+            google_user["primaryEmail"], *[x["address"] for x in google_user.get("emails", [])]
+        )
+        if connection:
+            return self.directory_service.users().update(
+                userKey=connection.google_id, body=google_user
+            )
+        return self.directory_service.users().insert(body=google_user)
+
+    def _bulk_connection(self, user: User, response: dict) -> GoogleWorkspaceProviderUser:
+        return GoogleWorkspaceProviderUser(
+            provider=self.provider,
+            user=user,
+            google_id=response["primaryEmail"],
+            attributes=response,
+        )
+
     def discover(self):
         """Iterate through all users and connect them with authentik users if possible"""
         request = self.directory_service.users().list(
@@ -39,6 +39,7 @@ class GoogleWorkspaceProviderUser(SerializerModel):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     provider = models.ForeignKey("GoogleWorkspaceProvider", on_delete=models.CASCADE)
     attributes = models.JSONField(default=dict)
+    sync_hash = models.TextField(null=True, default=None)
 
     @property
     def serializer(self) -> type[Serializer]:
@@ -65,6 +66,7 @@ class GoogleWorkspaceProviderGroup(SerializerModel):
     group = models.ForeignKey(Group, on_delete=models.CASCADE)
     provider = models.ForeignKey("GoogleWorkspaceProvider", on_delete=models.CASCADE)
     attributes = models.JSONField(default=dict)
+    sync_hash = models.TextField(null=True, default=None)
 
     @property
     def serializer(self) -> type[Serializer]:
@@ -145,6 +147,15 @@ class GoogleWorkspaceProvider(OutgoingSyncProvider, BackchannelProvider):
             return Group.objects.all().order_by("pk")
         raise ValueError(f"Invalid type {type}")
 
+    def get_remote_ids(self, obj: User | Group) -> list[str]:
+        if isinstance(obj, User):
+            connections = GoogleWorkspaceProviderUser.objects.filter(provider=self, user=obj)
+        elif isinstance(obj, Group):
+            connections = GoogleWorkspaceProviderGroup.objects.filter(provider=self, group=obj)
+        else:
+            raise ValueError(f"Invalid object {obj}")
+        return list(connections.values_list("google_id", flat=True))
+
     def google_credentials(self):
         return {
             "credentials": Credentials.from_service_account_info(
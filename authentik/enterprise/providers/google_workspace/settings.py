@@ -10,4 +10,11 @@ CELERY_BEAT_SCHEDULE = {
         "schedule": crontab(minute=fqdn_rand("google_workspace_sync_all"), hour="*/4"),
         "options": {"queue": "authentik_scheduled"},
     },
+    "providers_google_workspace_sync_journal": {
+        "task": (
+            "authentik.enterprise.providers.google_workspace.tasks.google_workspace_sync_journal"
+        ),
+        "schedule": crontab(minute="*/5"),
+        "options": {"queue": "authentik_scheduled"},
+    },
 }
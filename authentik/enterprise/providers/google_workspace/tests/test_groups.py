@@ -165,7 +165,8 @@ class GoogleWorkspaceGroupTests(TestCase):
             ).first()
             self.assertIsNotNone(google_group)
 
-            group.delete()
+            with self.captureOnCommitCallbacks(execute=True):
+                group.delete()
             self.assertFalse(Event.objects.filter(action=EventAction.SYSTEM_EXCEPTION).exists())
             self.assertEqual(len(http.requests()), 4)
 
@@ -284,7 +285,8 @@ class GoogleWorkspaceGroupTests(TestCase):
             ).first()
             self.assertIsNotNone(google_group)
 
-            group.delete()
+            with self.captureOnCommitCallbacks(execute=True):
+                group.delete()
             self.assertEqual(len(http.requests()), 3)
             self.assertFalse(
                 GoogleWorkspaceProviderGroup.objects.filter(
@@ -179,7 +179,8 @@ class GoogleWorkspaceUserTests(TestCase):
             ).first()
             self.assertIsNotNone(google_user)
 
-            user.delete()
+            with self.captureOnCommitCallbacks(execute=True):
+                user.delete()
             self.assertFalse(Event.objects.filter(action=EventAction.SYSTEM_EXCEPTION).exists())
             self.assertEqual(len(http.requests()), 4)
 
@@ -217,7 +218,8 @@ class GoogleWorkspaceUserTests(TestCase):
             ).first()
             self.assertIsNotNone(google_user)
 
-            user.delete()
+            with self.captureOnCommitCallbacks(execute=True):
+                user.delete()
             self.assertEqual(len(http.requests()), 4)
             _, _, body, _ = http.requests()[3]
             self.assertEqual(
@@ -261,7 +263,8 @@ class GoogleWorkspaceUserTests(TestCase):
             ).first()
             self.assertIsNotNone(google_user)
 
-            user.delete()
+            with self.captureOnCommitCallbacks(execute=True):
+                user.delete()
             self.assertEqual(len(http.requests()), 3)
             self.assertFalse(
                 GoogleWorkspaceProviderUser.objects.filter(
@@ -310,3 +313,55 @@ class GoogleWorkspaceUserTests(TestCase):
             )
             self.assertFalse(Event.objects.filter(action=EventAction.SYSTEM_EXCEPTION).exists())
             self.assertEqual(len(http.requests()), 5)
+
+    def test_sync_task_batch(self):
+        """Test full sync with batch requests"""
+        uids = [generate_id(), generate_id()]
+        http = MockHTTP()
+        http.add_response(
+            f"https://admin.googleapis.com/admin/directory/v1/customer/my_customer/domains?key={self.api_key}&alt=json",
+            domains_list_v1_mock,
+        )
+        http.add_response(
+            f"https://admin.googleapis.com/admin/directory/v1/users?customer=my_customer&maxResults=500&orderBy=email&key={self.api_key}&alt=json",
+            method="GET",
+            body={"users": []},
+        )
+        http.add_response(
+            f"https://admin.googleapis.com/admin/directory/v1/groups?customer=my_customer&maxResults=500&orderBy=email&key={self.api_key}&alt=json",
+            method="GET",
+            body={"groups": []},
+        )
+        http.add_batch_response(
+            "https://admin.googleapis.com/batch",
+            [
+                (200, {"primaryEmail": f"{uids[0]}@goauthentik.io"}),
+                (409, {"error": {"code": 409, "message": "Entity already exists."}}),
+            ],
+        )
+        http.add_response(
+            f"https://admin.googleapis.com/admin/directory/v1/users?key={self.api_key}&alt=json",
+            method="POST",
+            body={"error": {"code": 409, "message": "Entity already exists."}},
+            meta={"status": "409"},
+        )
+        self.app.backchannel_providers.remove(self.provider)
+        users = [User.objects.create(username=uid, email=f"{uid}@goauthentik.io") for uid in uids]
+        self.app.backchannel_providers.add(self.provider)
+        with patch(
+            "authentik.enterprise.providers.google_workspace.models.GoogleWorkspaceProvider.google_credentials",
+            MagicMock(return_value={"developerKey": self.api_key, "http": http}),
+        ):
+            google_workspace_sync.delay(self.provider.pk).get()
+            for user in users:
+                self.assertEqual(
+                    GoogleWorkspaceProviderUser.objects.get(
+                        user=user, provider=self.provider
+                    ).google_id,
+                    user.email,
+                )
+            self.assertFalse(Event.objects.filter(action=EventAction.SYSTEM_EXCEPTION).exists())
+            methods = [request[1] for request in http.requests()]
+            # Both users are sent in one batch, the existing user is then connected
+            # by writing it individually
+            self.assertEqual(methods.count("POST"), 2)
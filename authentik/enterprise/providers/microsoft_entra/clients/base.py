@@ -1,6 +1,9 @@
-from asyncio import run
+from asyncio import AbstractEventLoop, gather, new_event_loop
 from collections.abc import Coroutine
 from dataclasses import asdict
+from json import dumps, loads
+from os import register_at_fork
+from threading import local
 from typing import Any
 
 from azure.core.exceptions import (
@@ -9,31 +12,82 @@ from azure.core.exceptions import (
     ServiceResponseError,
 )
 from azure.identity.aio import ClientSecretCredential
+from deepmerge import always_merger
 from django.db.models import Model
 from django.http import HttpResponseBadRequest, HttpResponseNotFound
+from httpx import AsyncClient
 from kiota_abstractions.api_error import APIError
+from kiota_abstractions.base_request_builder import BaseRequestBuilder
+from kiota_abstractions.method import Method
+from kiota_abstractions.request_information import RequestInformation
+from kiota_abstractions.serialization import Parsable
 from kiota_authentication_azure.azure_identity_authentication_provider import (
     AzureIdentityAuthenticationProvider,
 )
 from kiota_http.kiota_client_factory import KiotaClientFactory
+from kiota_serialization_json.json_parse_node import JsonParseNode
 from msgraph.generated.models.entity import Entity
 from msgraph.generated.models.o_data_errors.o_data_error import ODataError
 from msgraph.graph_request_adapter import GraphRequestAdapter, options
 from msgraph.graph_service_client import GraphServiceClient
 from msgraph_core import GraphClientFactory
 
+from authentik.core.expression.exceptions import SkipObjectException
 from authentik.enterprise.providers.microsoft_entra.models import MicrosoftEntraProvider
 from authentik.events.utils import sanitize_item
 from authentik.lib.sync.outgoing import HTTP_CONFLICT
 from authentik.lib.sync.outgoing.base import BaseOutgoingSyncClient
 from authentik.lib.sync.outgoing.exceptions import (
     BadRequestSyncException,
+    BaseSyncException,
     NotFoundSyncException,
     ObjectExistsSyncException,
     StopSync,
     TransientSyncException,
 )
 
+# Maximum amount of requests in a single JSON batch request
+# https://learn.microsoft.com/en-us/graph/json-batching
+GRAPH_BATCH_SIZE = 20
+
+_thread_local = local()
+
+
+def _reset_thread_local():
+    """Don't share event loops and connections with forked processes"""
+    global _thread_local  # noqa: PLW0603
+    _thread_local = local()
+
+
+register_at_fork(after_in_child=_reset_thread_local)
+
+
+def _get_session() -> tuple[AbstractEventLoop, AsyncClient]:
+    """Event loop and HTTP client (and connection pool) of the current thread, which are kept
+    open between requests so connections can be re-used. The client's connections belong to
+    the loop, so a new client is created whenever a new loop is"""
+    session = getattr(_thread_local, "session", None)
+    if not session or session[0].is_closed():
+        session = (
+            new_event_loop(),
+            GraphClientFactory.create_with_default_middleware(
+                options=options, client=KiotaClientFactory.get_default_client()
+            ),
+        )
+        _thread_local.session = session
+    return session
+
+
+def get_event_loop() -> AbstractEventLoop:
+    """Event loop of the current thread"""
+    return _get_session()[0]
+
+
+def get_http_client() -> AsyncClient:
+    """HTTP client of the current thread's event loop, shared by all providers
+    as authentication is handled by the request adapter"""
+    return _get_session()[1]
+
 
 def get_request_adapter(
     credentials: ClientSecretCredential, scopes: list[str] | None = None
@@ -43,12 +97,7 @@ def get_request_adapter(
     else:
         auth_provider = AzureIdentityAuthenticationProvider(credentials=credentials)
 
-    return GraphRequestAdapter(
-        auth_provider=auth_provider,
-        client=GraphClientFactory.create_with_default_middleware(
-            options=options, client=KiotaClientFactory.get_default_client()
-        ),
-    )
+    return GraphRequestAdapter(auth_provider=auth_provider, client=get_http_client())
 
 
 class MicrosoftEntraSyncClient[TModel: Model, TConnection: Model, TSchema: dict](
@@ -57,19 +106,30 @@ class MicrosoftEntraSyncClient[TModel: Model, TConnection: Model, TSchema: dict]
     """Base client for syncing to microsoft entra"""
 
     domains: list
+    # Model of responses to requests created by `_bulk_request`
+    entity_type: type[Entity]
 
     def __init__(self, provider: MicrosoftEntraProvider) -> None:
         super().__init__(provider)
         self.credentials = provider.microsoft_credentials()
+        self._http_client: AsyncClient | None = None
+        self._client: GraphServiceClient | None = None
         self.__prefetch_domains()
 
     @property
-    def client(self):
-        return GraphServiceClient(request_adapter=get_request_adapter(**self.credentials))
+    def client(self) -> GraphServiceClient:
+        """Graph client using the HTTP client of the current thread and event loop"""
+        http_client = get_http_client()
+        if self._http_client is not http_client:
+            self._http_client = http_client
+            self._client = GraphServiceClient(
+                request_adapter=get_request_adapter(**self.credentials)
+            )
+        return self._client
 
     def _request[T](self, request: Coroutine[Any, Any, T]) -> T:
         try:
-            return run(request)
+            return get_event_loop().run_until_complete(request)
         except ClientAuthenticationError as exc:
             raise StopSync(exc, None, None) from exc
         except ODataError as exc:
@@ -77,14 +137,167 @@ class MicrosoftEntraSyncClient[TModel: Model, TConnection: Model, TSchema: dict]
         except (ServiceRequestError, ServiceResponseError) as exc:
             raise TransientSyncException("Failed to sent request") from exc
         except APIError as exc:
-            if exc.response_status_code == HttpResponseNotFound.status_code:
-                raise NotFoundSyncException("Object not found") from exc
-            if exc.response_status_code == HttpResponseBadRequest.status_code:
-                raise BadRequestSyncException("Bad request", exc.response_headers) from exc
-            if exc.response_status_code == HTTP_CONFLICT:
-                raise ObjectExistsSyncException("Object exists", exc.response_headers) from exc
+            sync_exc = self._status_code_exception(exc.response_status_code, exc.response_headers)
+            if sync_exc:
+                raise sync_exc from exc
             raise exc
 
+    def _status_code_exception(self, status_code: int, headers: Any) -> BaseSyncException | None:
+        """Sync exception for the status code of a failed request"""
+        if status_code == HttpResponseNotFound.status_code:
+            return NotFoundSyncException("Object not found")
+        if status_code == HttpResponseBadRequest.status_code:
+            return BadRequestSyncException("Bad request", headers)
+        if status_code == HTTP_CONFLICT:
+            return ObjectExistsSyncException("Object exists", headers)
+        return None
+
+    def _batch(
+        self,
+        requests: list[tuple[BaseRequestBuilder, str, Parsable | None]],
+        response_type: type[Parsable] | None = None,
+    ) -> list[tuple[Any, BaseSyncException | None]]:
+        """Execute requests, given as request builder, method and body, with JSON batch requests
+        of up to `GRAPH_BATCH_SIZE` requests, which are sent concurrently. Returns the response
+        (parsed as `response_type`) or the error of each request, in order.
+        Authentication errors are raised, other errors of a batch request itself are returned
+        as transient errors for all its requests"""
+        if len(requests) == 1:
+            builder, method, body = requests[0]
+            args = (body,) if body is not None else ()
+            try:
+                return [(self._request(getattr(builder, method)(*args)), None)]
+            except BaseSyncException as exc:
+                return [(None, exc)]
+        batch_requests = []
+        for idx, (builder, method, body) in enumerate(requests):
+            args = (body,) if body is not None else ()
+            info: RequestInformation = getattr(builder, f"to_{method}_request_information")(*args)
+            # URLs in batch requests are relative to the API version
+            info.path_parameters["baseurl"] = ""
+            batch_request = {"id": str(idx), "method": info.http_method.value, "url": info.url}
+            if info.content:
+                batch_request["headers"] = {"Content-Type": "application/json"}
+                batch_request["body"] = loads(info.content)
+            batch_requests.append(batch_request)
+
+        async def send_batches():
+            return await gather(
+                *[
+                    self._send_batch(batch_requests[offset : offset + GRAPH_BATCH_SIZE])
+                    for offset in range(0, len(batch_requests), GRAPH_BATCH_SIZE)
+                ],
+                return_exceptions=True,
+            )
+
+        responses = {}
+        for batch_responses in self._request(send_batches()):
+            if isinstance(batch_responses, ClientAuthenticationError | ODataError):
+                raise StopSync(batch_responses, None, None) from batch_responses
+            if isinstance(batch_responses, Exception):
+                # Requests without response are reported as transient errors below
+                self.logger.warning("Failed to send batch request", exc=batch_responses)
+                continue
+            for response in batch_responses:
+                responses[int(response["id"])] = response
+        results = []
+        for idx in range(len(requests)):
+            response = responses.get(idx, {"status": 500})
+            status_code = response["status"]
+            if status_code >= HttpResponseBadRequest.status_code:
+                results.append(
+                    (
+                        None,
+                        self._status_code_exception(status_code, response.get("headers"))
+                        or TransientSyncException(f"Request failed with status {status_code}"),
+                    )
+                )
+                continue
+            body = response.get("body")
+            if not body or not response_type:
+                results.append((None, None))
+                continue
+            results.append((JsonParseNode(body).get_object_value(response_type), None))
+        return results
+
+    async def _send_batch(self, batch_requests: list[dict]) -> list[dict]:
+        """Send a single JSON batch request"""
+        info = RequestInformation(Method.POST, "{+baseurl}/$batch", {})
+        info.set_stream_content(dumps({"requests": batch_requests}).encode(), "application/json")
+        response = await self.client.request_adapter.send_primitive_async(
+            info, "bytes", {"XXX": ODataError}
+        )
+        return loads(response)["responses"]
+
+    def _bulk_request(
+        self, schema: TSchema, connection: TConnection | None
+    ) -> tuple[BaseRequestBuilder, str, Parsable]:
+        """Request to create (without `connection`) or update an object, used by `write_bulk`"""
+        raise NotImplementedError()
+
+    def _bulk_connection(self, obj: TModel, response: Entity) -> TConnection:
+        """Unsaved connection for an object created by `write_bulk`"""
+        raise NotImplementedError()
+
+    def write_bulk(self, objs: list[TModel]) -> list[TModel]:
+        """Create and update objects with JSON batch requests. Objects whose request failed are
+        returned to be written individually, which handles (and reports) their errors"""
+        if len(objs) <= 1:
+            return objs
+        connections = {
+            getattr(connection, f"{self.connection_type_query}_id"): connection
+            for connection in self.connection_type.objects.filter(
+                provider=self.provider, **{f"{self.connection_type_query}__in": objs}
+            )
+        }
+        remaining = []
+        pending: list[tuple[TModel, str | None]] = []
+        requests = []
+        for obj in objs:
+            connection = connections.get(obj.pk)
+            self._schema_hash = None
+            try:
+                requests.append(self._bulk_request(self.to_schema(obj, connection), connection))
+            except SkipObjectException:
+                continue
+            except (StopSync, BadRequestSyncException):
+                remaining.append(obj)
+                continue
+            pending.append((obj, self._schema_hash))
+        written = []
+        hashes = {}
+        created = []
+        for (obj, schema_hash), (response, exc) in zip(
+            pending, self._batch(requests, self.entity_type), strict=True
+        ):
+            if exc or (obj.pk not in connections and not response):
+                remaining.append(obj)
+                continue
+            written.append(obj)
+            hashes[obj.pk] = schema_hash
+            if obj.pk not in connections:
+                connections[obj.pk] = self._bulk_connection(obj, response)
+                created.append(connections[obj.pk])
+            elif response:
+                always_merger.merge(connections[obj.pk].attributes, self.entity_as_dict(response))
+        self.connection_type.objects.bulk_create(created)
+        remaining.extend(self._bulk_written(written, connections))
+        # Remember the written schemas, see `delta`
+        remaining_pks = {obj.pk for obj in remaining}
+        updated = []
+        for obj in written:
+            if obj.pk in remaining_pks:
+                continue
+            connections[obj.pk].sync_hash = hashes[obj.pk]
+            updated.append(connections[obj.pk])
+        self.connection_type.objects.bulk_update(updated, ["attributes", "sync_hash"])
+        return remaining
+
+    def _bulk_written(self, objs: list[TModel], connections: dict) -> list[TModel]:
+        """Called with objects which have been written by `write_bulk`, returns objects
+        which have to be written individually"""
+        return []
+
     def __prefetch_domains(self):
         self.domains = []
         organizations = self._request(self.client.organization.get())
@@ -4,7 +4,7 @@ from msgraph.generated.groups.groups_request_builder import GroupsRequestBuilder
 from msgraph.generated.models.group import Group as MSGroup
 from msgraph.generated.models.reference_create import ReferenceCreate
 
-from authentik.core.models import Group
+from authentik.core.models import Group, User
 from authentik.enterprise.providers.microsoft_entra.clients.base import MicrosoftEntraSyncClient
 from authentik.enterprise.providers.microsoft_entra.models import (
     MicrosoftEntraProvider,
@@ -18,7 +18,6 @@ from authentik.lib.sync.outgoing.exceptions import (
     NotFoundSyncException,
     ObjectExistsSyncException,
     StopSync,
-    TransientSyncException,
 )
 from authentik.lib.sync.outgoing.models import OutgoingSyncDeleteAction
 
@@ -31,6 +30,7 @@ class MicrosoftEntraGroupClient(
     connection_type = MicrosoftEntraProviderGroup
     connection_type_query = "group"
     can_discover = True
+    entity_type = MSGroup
 
     def __init__(self, provider: MicrosoftEntraProvider) -> None:
         super().__init__(provider)
@@ -57,10 +57,14 @@ class MicrosoftEntraGroupClient(
             self.logger.debug("Group does not exist in Microsoft, skipping")
             return None
         with transaction.atomic():
-            if self.provider.group_delete_action == OutgoingSyncDeleteAction.DELETE:
-                self._request(self.client.groups.by_group_id(microsoft_group.microsoft_id).delete())
+            self.delete_remote(microsoft_group.microsoft_id)
             microsoft_group.delete()
 
+    def delete_remote(self, remote_id: str):
+        """Delete group by microsoft ID, depending on the provider's delete action"""
+        if self.provider.group_delete_action == OutgoingSyncDeleteAction.DELETE:
+            self._request(self.client.groups.by_group_id(remote_id).delete())
+
     def create(self, group: Group):
         """Create group from scratch and create a connection object"""
         microsoft_group = self.to_schema(group, None)
@@ -115,6 +119,71 @@ class MicrosoftEntraGroupClient(
             # Resource missing is handled by self.write, which will re-create the group
             raise
 
+    def _bulk_request(
+        self, microsoft_group: MSGroup, connection: MicrosoftEntraProviderGroup | None
+    ):
+        if connection:
+            microsoft_group.id = connection.microsoft_id
+            return (
+                self.client.groups.by_group_id(connection.microsoft_id),
+                "patch",
+                microsoft_group,
+            )
+        return (self.client.groups, "post", microsoft_group)
+
+    def _bulk_connection(self, group: Group, response: MSGroup) -> MicrosoftEntraProviderGroup:
+        return MicrosoftEntraProviderGroup(
+            provider=self.provider,
+            group=group,
+            microsoft_id=response.id,
+            attributes=self.entity_as_dict(response),
+        )
+
+    def _member_request(self, microsoft_group_id: str, direction: Direction, user: str):
+        """Request to add or remove a member, see `_batch`"""
+        group = self.client.groups.by_group_id(microsoft_group_id)
+        if direction == Direction.add:
+            return (
+                group.members.ref,
+                "post",
+                ReferenceCreate(
+                    odata_id=f"https://graph.microsoft.com/v1.0/directoryObjects/{user}",
+                ),
+            )
+        return (group.members.by_directory_object_id(user).ref, "delete", None)
+
+    def _bulk_written(
+        self, groups: list[Group], connections: dict[str, MicrosoftEntraProviderGroup]
+    ) -> list[Group]:
+        """Add all members of groups written in bulk (see `create_sync_members`), with the
+        requests of all groups sent in batches"""
+        memberships = list(
+            User.ak_groups.through.objects.filter(group__in=groups).values_list(
+                "group_id", "user_id"
+            )
+        )
+        microsoft_ids = dict(
+            MicrosoftEntraProviderUser.objects.filter(
+                provider=self.provider, user__pk__in=[user_pk for _, user_pk in memberships]
+            ).values_list("user_id", "microsoft_id")
+        )
+        requests = []
+        request_groups = []
+        for group_pk, user_pk in memberships:
+            if user_pk not in microsoft_ids:
+                continue
+            requests.append(
+                self._member_request(
+                    connections[group_pk].microsoft_id, Direction.add, microsoft_ids[user_pk]
+                )
+            )
+            request_groups.append(group_pk)
+        failed = set()
+        for group_pk, (_, exc) in zip(request_groups, self._batch(requests), strict=True):
+            if exc and not isinstance(exc, ObjectExistsSyncException):
+                failed.add(group_pk)
+        return [group for group in groups if group.pk in failed]
+
     def write(self, obj: Group):
         microsoft_group, created = super().write(obj)
         self.create_sync_members(obj, microsoft_group)
@@ -136,27 +205,10 @@ class MicrosoftEntraGroupClient(
             return self._patch_remove_users(group, users_set)
 
     def _patch(self, microsoft_group_id: str, direction: Direction, members: list[str]):
-        for user in members:
-            try:
-                if direction == Direction.add:
-                    request_body = ReferenceCreate(
-                        odata_id=f"https://graph.microsoft.com/v1.0/directoryObjects/{user}",
-                    )
-                    self._request(
-                        self.client.groups.by_group_id(microsoft_group_id).members.ref.post(
-                            request_body
-                        )
-                    )
-                if direction == Direction.remove:
-                    self._request(
-                        self.client.groups.by_group_id(microsoft_group_id)
-                        .members.by_directory_object_id(user)
-                        .ref.delete()
-                    )
-            except ObjectExistsSyncException:
-                pass
-            except TransientSyncException:
-                raise
+        requests = [self._member_request(microsoft_group_id, direction, user) for user in members]
+        for _, exc in self._batch(requests):
+            if exc and not isinstance(exc, ObjectExistsSyncException):
+                raise exc
 
     def _patch_add_users(self, group: Group, users_set: set[int]):
         """Add users in users_set to group"""
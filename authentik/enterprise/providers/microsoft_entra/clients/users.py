@@ -26,6 +26,7 @@ class MicrosoftEntraUserClient(MicrosoftEntraSyncClient[User, MicrosoftEntraProv
     connection_type = MicrosoftEntraProviderUser
     connection_type_query = "user"
     can_discover = True
+    entity_type = MSUser
 
     def __init__(self, provider: MicrosoftEntraProvider) -> None:
         super().__init__(provider)
@@ -52,20 +53,20 @@ class MicrosoftEntraUserClient(MicrosoftEntraSyncClient[User, MicrosoftEntraProv
             self.logger.debug("User does not exist in Microsoft, skipping")
             return None
         with transaction.atomic():
-            response = None
-            if self.provider.user_delete_action == OutgoingSyncDeleteAction.DELETE:
-                response = self._request(
-                    self.client.users.by_user_id(microsoft_user.microsoft_id).delete()
-                )
-            elif self.provider.user_delete_action == OutgoingSyncDeleteAction.SUSPEND:
-                response = self._request(
-                    self.client.users.by_user_id(microsoft_user.microsoft_id).patch(
-                        MSUser(account_enabled=False)
-                    )
-                )
+            response = self.delete_remote(microsoft_user.microsoft_id)
             microsoft_user.delete()
         return response
 
+    def delete_remote(self, remote_id: str):
+        """Delete (or disable) user by microsoft ID, depending on the provider's delete action"""
+        if self.provider.user_delete_action == OutgoingSyncDeleteAction.DELETE:
+            return self._request(self.client.users.by_user_id(remote_id).delete())
+        if self.provider.user_delete_action == OutgoingSyncDeleteAction.SUSPEND:
+            return self._request(
+                self.client.users.by_user_id(remote_id).patch(MSUser(account_enabled=False))
+            )
+        return None
+
     def get_select_fields(self) -> list[str]:
         """All fields that should be selected when we fetch user data."""
         # TODO: Make this customizable in the future
@@ -137,6 +138,20 @@ class MicrosoftEntraUserClient(MicrosoftEntraSyncClient[User, MicrosoftEntraProv
             always_merger.merge(connection.attributes, self.entity_as_dict(response))
             connection.save()
 
+    def _bulk_request(self, microsoft_user: MSUser, connection: MicrosoftEntraProviderUser | None):
+        self.check_email_valid(microsoft_user.user_principal_name)
+        if connection:
+            return (self.client.users.by_user_id(connection.microsoft_id), "patch", microsoft_user)
+        return (self.client.users, "post", microsoft_user)
+
+    def _bulk_connection(self, user: User, response: MSUser) -> MicrosoftEntraProviderUser:
+        return MicrosoftEntraProviderUser(
+            provider=self.provider,
+            user=user,
+            microsoft_id=response.id,
+            attributes=self.entity_as_dict(response),
+        )
+
     def discover(self):
         """Iterate through all users and connect them with authentik users if possible"""
         request_configuration = UsersRequestBuilder.UsersRequestBuilderGetRequestConfiguration(
@@ -30,6 +30,7 @@ class MicrosoftEntraProviderUser(SerializerModel):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     provider = models.ForeignKey("MicrosoftEntraProvider", on_delete=models.CASCADE)
     attributes = models.JSONField(default=dict)
+    sync_hash = models.TextField(null=True, default=None)
 
     @property
     def serializer(self) -> type[Serializer]:
@@ -56,6 +57,7 @@ class MicrosoftEntraProviderGroup(SerializerModel):
     group = models.ForeignKey(Group, on_delete=models.CASCADE)
     provider = models.ForeignKey("MicrosoftEntraProvider", on_delete=models.CASCADE)
     attributes = models.JSONField(default=dict)
+    sync_hash = models.TextField(null=True, default=None)
 
     @property
     def serializer(self) -> type[Serializer]:
@@ -134,6 +136,15 @@ class MicrosoftEntraProvider(OutgoingSyncProvider, BackchannelProvider):
             return Group.objects.all().order_by("pk")
         raise ValueError(f"Invalid type {type}")
 
+    def get_remote_ids(self, obj: User | Group) -> list[str]:
+        if isinstance(obj, User):
+            connections = MicrosoftEntraProviderUser.objects.filter(provider=self, user=obj)
+        elif isinstance(obj, Group):
+            connections = MicrosoftEntraProviderGroup.objects.filter(provider=self, group=obj)
+        else:
+            raise ValueError(f"Invalid object {obj}")
+        return list(connections.values_list("microsoft_id", flat=True))
+
     def microsoft_credentials(self):
         return {
             "credentials": ClientSecretCredential(
@@ -10,4 +10,9 @@ CELERY_BEAT_SCHEDULE = {
         "schedule": crontab(minute=fqdn_rand("microsoft_entra_sync_all"), hour="*/4"),
         "options": {"queue": "authentik_scheduled"},
     },
+    "providers_microsoft_entra_sync_journal": {
+        "task": "authentik.enterprise.providers.microsoft_entra.tasks.microsoft_entra_sync_journal",
+        "schedule": crontab(minute="*/5"),
+        "options": {"queue": "authentik_scheduled"},
+    },
 }
@@ -3,10 +3,12 @@
 from authentik.enterprise.providers.microsoft_entra.models import MicrosoftEntraProvider
 from authentik.events.system_tasks import SystemTask
 from authentik.lib.sync.outgoing.exceptions import TransientSyncException
+from authentik.lib.sync.outgoing.journal import SyncJournal
 from authentik.lib.sync.outgoing.tasks import SyncTasks
 from authentik.root.celery import CELERY_APP
 
 sync_tasks = SyncTasks(MicrosoftEntraProvider)
+sync_journal = SyncJournal(MicrosoftEntraProvider)
 
 
 @CELERY_APP.task(autoretry_for=(TransientSyncException,), retry_backoff=True)
@@ -32,6 +34,17 @@ def microsoft_entra_sync_direct(*args, **kwargs):
     return sync_tasks.sync_signal_direct(*args, **kwargs)
 
 
+@CELERY_APP.task(autoretry_for=(TransientSyncException,), retry_backoff=True)
+def microsoft_entra_sync_delete(*args, **kwargs):
+    return sync_tasks.sync_signal_delete(*args, **kwargs)
+
+
 @CELERY_APP.task(autoretry_for=(TransientSyncException,), retry_backoff=True)
 def microsoft_entra_sync_m2m(*args, **kwargs):
     return sync_tasks.sync_signal_m2m(*args, **kwargs)
+
+
+@CELERY_APP.task()
+def microsoft_entra_sync_journal():
+    """Sync objects which have changed since the last flush"""
+    return sync_tasks.sync_signal_journal(sync_journal)
@@ -199,7 +199,8 @@ class MicrosoftEntraGroupTests(TestCase):
             ).first()
             self.assertIsNotNone(microsoft_group)
 
-            group.delete()
+            with self.captureOnCommitCallbacks(execute=True):
+                group.delete()
             self.assertFalse(Event.objects.filter(action=EventAction.SYSTEM_EXCEPTION).exists())
             group_create.assert_called_once()
             group_delete.assert_called_once()
@@ -352,7 +353,8 @@ class MicrosoftEntraGroupTests(TestCase):
             ).first()
             self.assertIsNotNone(microsoft_group)
 
-            group.delete()
+            with self.captureOnCommitCallbacks(execute=True):
+                group.delete()
             self.assertFalse(
                 MicrosoftEntraProviderGroup.objects.filter(
                     provider=self.provider, group__name=uid
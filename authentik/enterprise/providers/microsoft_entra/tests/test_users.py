@@ -1,5 +1,6 @@
 """Microsoft Entra User tests"""
 
+from json import dumps, loads
 from unittest.mock import AsyncMock, MagicMock, patch
 
 from azure.identity.aio import ClientSecretCredential
@@ -15,6 +16,11 @@ from rest_framework.test import APITestCase
 from authentik.blueprints.tests import apply_blueprint
 from authentik.core.models import Application, Group, User
 from authentik.core.tests.utils import create_test_admin_user
+from authentik.enterprise.providers.microsoft_entra.clients.base import (
+    get_event_loop,
+    get_http_client,
+)
+from authentik.enterprise.providers.microsoft_entra.clients.users import MicrosoftEntraUserClient
 from authentik.enterprise.providers.microsoft_entra.models import (
     MicrosoftEntraProvider,
     MicrosoftEntraProviderMapping,
@@ -213,7 +219,8 @@ class MicrosoftEntraUserTests(APITestCase):
             ).first()
             self.assertIsNotNone(microsoft_user)
 
-            user.delete()
+            with self.captureOnCommitCallbacks(execute=True):
+                user.delete()
             self.assertFalse(Event.objects.filter(action=EventAction.SYSTEM_EXCEPTION).exists())
             user_create.assert_called_once()
             user_delete.assert_called_once()
@@ -261,7 +268,8 @@ class MicrosoftEntraUserTests(APITestCase):
             ).first()
             self.assertIsNotNone(microsoft_user)
 
-            user.delete()
+            with self.captureOnCommitCallbacks(execute=True):
+                user.delete()
             self.assertFalse(
                 MicrosoftEntraProviderUser.objects.filter(
                     provider=self.provider, user__username=uid
@@ -315,7 +323,8 @@ class MicrosoftEntraUserTests(APITestCase):
             ).first()
             self.assertIsNotNone(microsoft_user)
 
-            user.delete()
+            with self.captureOnCommitCallbacks(execute=True):
+                user.delete()
             self.assertFalse(
                 MicrosoftEntraProviderUser.objects.filter(
                     provider=self.provider, user__username=uid
@@ -375,6 +384,92 @@ class MicrosoftEntraUserTests(APITestCase):
             self.assertFalse(Event.objects.filter(action=EventAction.SYSTEM_EXCEPTION).exists())
             user_list.assert_called_once()
 
+    def test_sync_task_batch(self):
+        """Test full sync with JSON batch requests"""
+        uids = [generate_id(), generate_id()]
+        self.app.backchannel_providers.remove(self.provider)
+        users = [User.objects.create(username=uid, email=f"{uid}@goauthentik.io") for uid in uids]
+        self.app.backchannel_providers.add(self.provider)
+        batch_response = {
+            "responses": [
+                {"id": str(idx), "status": 201, "body": {"id": uid}} for idx, uid in enumerate(uids)
+            ]
+        }
+        with (
+            patch(
+                "authentik.enterprise.providers.microsoft_entra.models.MicrosoftEntraProvider.microsoft_credentials",
+                MagicMock(return_value={"credentials": self.creds}),
+            ),
+            patch(
+                "msgraph.generated.organization.organization_request_builder.OrganizationRequestBuilder.get",
+                AsyncMock(
+                    return_value=OrganizationCollectionResponse(
+                        value=[
+                            Organization(verified_domains=[VerifiedDomain(name="goauthentik.io")])
+                        ]
+                    )
+                ),
+            ),
+            patch(
+                "msgraph.generated.users.users_request_builder.UsersRequestBuilder.get",
+                AsyncMock(return_value=UserCollectionResponse(value=[])),
+            ),
+            patch(
+                "msgraph.generated.groups.groups_request_builder.GroupsRequestBuilder.get",
+                AsyncMock(return_value=GroupCollectionResponse(value=[])),
+            ),
+            patch(
+                "msgraph.generated.users.users_request_builder.UsersRequestBuilder.post",
+                AsyncMock(return_value=MSUser(id=generate_id())),
+            ) as user_create,
+            patch(
+                "msgraph.graph_request_adapter.GraphRequestAdapter.send_primitive_async",
+                AsyncMock(return_value=dumps(batch_response).encode()),
+            ) as batch,
+        ):
+            microsoft_entra_sync.delay(self.provider.pk).get()
+            for user, uid in zip(users, uids, strict=True):
+                self.assertEqual(
+                    MicrosoftEntraProviderUser.objects.get(
+                        user=user, provider=self.provider
+                    ).microsoft_id,
+                    uid,
+                )
+            self.assertFalse(Event.objects.filter(action=EventAction.SYSTEM_EXCEPTION).exists())
+            user_create.assert_not_called()
+            batch.assert_called_once()
+            requests = loads(batch.call_args.args[0].content)["requests"]
+            self.assertEqual([request["method"] for request in requests], ["POST", "POST"])
+            self.assertEqual([request["url"] for request in requests], ["/users", "/users"])
+
+    def test_event_loop_closed(self):
+        """Test a new HTTP client is used once the thread's event loop is closed"""
+        with (
+            patch(
+                "authentik.enterprise.providers.microsoft_entra.models.MicrosoftEntraProvider.microsoft_credentials",
+                MagicMock(return_value={"credentials": self.creds}),
+            ),
+            patch(
+                "msgraph.generated.organization.organization_request_builder.OrganizationRequestBuilder.get",
+                AsyncMock(
+                    return_value=OrganizationCollectionResponse(
+                        value=[
+                            Organization(verified_domains=[VerifiedDomain(name="goauthentik.io")])
+                        ]
+                    )
+                ),
+            ),
+        ):
+            client = MicrosoftEntraUserClient(self.provider)
+            graph_client = client.client
+            loop = get_event_loop()
+            http_client = get_http_client()
+            self.assertIs(client.client, graph_client)
+            loop.close()
+            self.assertIsNot(get_event_loop(), loop)
+            self.assertIsNot(get_http_client(), http_client)
+            self.assertIsNot(client.client, graph_client)
+
     def test_connect_manual(self):
         """test manual user connection"""
         uid = generate_id()
@@ -17,15 +17,19 @@ from authentik.core.models import Provider
 from authentik.enterprise.api import EnterpriseRequiredMixin
 from authentik.enterprise.providers.rac.api.providers import RACProviderSerializer
 from authentik.enterprise.providers.rac.models import Endpoint
+from authentik.lib.utils.cache import get_generation
 from authentik.policies.engine import PolicyEngine
 from authentik.rbac.filters import ObjectFilter
 
 LOGGER = get_logger()
+# Generation namespace of cached endpoint lists, see `authentik.lib.utils.cache`
+USER_ENDPOINT_CACHE_GENERATION = "providers/rac/endpoint_access"
 
 
 def user_endpoint_cache_key(user_pk: str) -> str:
     """Cache key where endpoint list for user is saved"""
-    return f"goauthentik.io/providers/rac/endpoint_access/{user_pk}"
+    generation = get_generation(USER_ENDPOINT_CACHE_GENERATION)
+    return f"goauthentik.io/providers/rac/endpoint_access/{generation}/{user_pk}"
 
 
 class EndpointSerializer(EnterpriseRequiredMixin, ModelSerializer):
@@ -121,12 +125,13 @@ class EndpointViewSet(UsedByMixin, ModelViewSet):
         if not should_cache:
             allowed_endpoints = self._get_allowed_endpoints(queryset)
         if should_cache:
-            allowed_endpoints = cache.get(user_endpoint_cache_key(self.request.user.pk))
+            key = user_endpoint_cache_key(self.request.user.pk)
+            allowed_endpoints = cache.get(key)
             if not allowed_endpoints:
                 LOGGER.debug("Caching allowed endpoint list")
                 allowed_endpoints = self._get_allowed_endpoints(queryset)
                 cache.set(
-                    user_endpoint_cache_key(self.request.user.pk),
+                    key,
                     allowed_endpoints,
                     timeout=86400,
                 )
@@ -3,19 +3,19 @@
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
 from django.contrib.auth.signals import user_logged_out
-from django.core.cache import cache
 from django.db.models import Model
 from django.db.models.signals import post_save, pre_delete
 from django.dispatch import receiver
 from django.http import HttpRequest
 
 from authentik.core.models import User
-from authentik.enterprise.providers.rac.api.endpoints import user_endpoint_cache_key
+from authentik.enterprise.providers.rac.api.endpoints import USER_ENDPOINT_CACHE_GENERATION
 from authentik.enterprise.providers.rac.consumer_client import (
     RAC_CLIENT_GROUP_SESSION,
     RAC_CLIENT_GROUP_TOKEN,
 )
 from authentik.enterprise.providers.rac.models import ConnectionToken, Endpoint
+from authentik.lib.utils.cache import bump_generation
 
 
 @receiver(user_logged_out)
@@ -53,5 +53,4 @@ def post_save_endpoint(sender: type[Model], instance, created: bool, **_):
         return
 
     # Delete user endpoint cache
-    keys = cache.keys(user_endpoint_cache_key("*"))
-    cache.delete_many(keys)
+    bump_generation(USER_ENDPOINT_CACHE_GENERATION)
@@ -57,6 +57,20 @@ class AuthentikEventsConfig(ManagedAppConfig):
                 message=msg,
             ).save()
 
+    @ManagedAppConfig.reconcile_tenant
+    def event_partitions(self):
+        """Create event partitions for the current and upcoming weeks. New tenants are cloned
+        from the template schema, so their partitions are the ones of when it was migrated."""
+        from authentik.events.partitions import create_partitions, empty_default_partition
+
+        # Events in the default partition would prevent creating the partitions of their weeks
+        moved = empty_default_partition()
+        if moved:
+            self.logger.info("Moved events out of the default partition", amount=moved)
+        _, failed = create_partitions()
+        if failed:
+            self.logger.warning("Failed to create event partitions", failed=failed)
+
     @ManagedAppConfig.reconcile_tenant
     def prefill_tasks(self):
         """Prefill tasks"""
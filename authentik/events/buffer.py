@@ -0,0 +1,154 @@
+"""In-process buffer to write events in bulk, outside of the request"""
+
+from atexit import register as register_at_exit
+from collections import defaultdict
+from os import register_at_fork
+from threading import Condition, Thread
+from typing import TYPE_CHECKING
+
+from django.db import DatabaseError, close_old_connections, connection, router, transaction
+from django.db.models.signals import post_save, pre_save
+from django_tenants.utils import schema_context
+from structlog.stdlib import get_logger
+
+from authentik.lib.config import CONFIG
+
+if TYPE_CHECKING:
+    from authentik.events.models import Event
+
+LOGGER = get_logger()
+
+
+class EventBuffer:
+    """Events which are written with a single query per tenant by a background thread, every
+    `events.buffer.flush_interval` seconds or once half of the buffer is used.
+
+    Up to `events.buffer.size` events are kept, when the buffer is full (or disabled with a size
+    of 0), events are written synchronously. Events saved within a transaction are only added
+    once it's committed. As `post_save` is sent once events are written, notifications are only
+    triggered for written events."""
+
+    def __init__(self):
+        self._condition = Condition()
+        self._events: list[tuple[str, Event]] = []
+        self._thread: Thread | None = None
+
+    @property
+    def size(self) -> int:
+        """Maximum amount of buffered events, 0 when buffering is disabled"""
+        return CONFIG.get_int("events.buffer.size", 0)
+
+    @property
+    def flush_interval(self) -> int:
+        """Seconds after which buffered events are written"""
+        return CONFIG.get_int("events.buffer.flush_interval", 1)
+
+    def add(self, event: "Event") -> bool:
+        """Buffer an unsaved event, returns False if the event has to be saved synchronously"""
+        size = self.size
+        if size < 1:
+            return False
+        with self._condition:
+            if len(self._events) >= size:
+                return False
+        pre_save.send(
+            sender=event.__class__,
+            instance=event,
+            raw=False,
+            using=router.db_for_write(event.__class__),
+            update_fields=None,
+        )
+        schema = connection.schema_name
+        if connection.in_atomic_block:
+            transaction.on_commit(lambda: self._append(schema, event))
+        else:
+            self._append(schema, event)
+        event._state.adding = False
+        return True
+
+    def _append(self, schema: str, event: "Event"):
+        with self._condition:
+            if len(self._events) < self.size:
+                self._events.append((schema, event))
+                if len(self._events) >= self.size // 2:
+                    self._condition.notify()
+                self._start()
+                return
+        # Buffer filled up while the transaction was running
+        self._write([(schema, event)])
+
+    def _start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = Thread(target=self._run, name="authentik-event-buffer", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait(timeout=self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        """Write all buffered events"""
+        with self._condition:
+            events, self._events = self._events, []
+        if not events:
+            return
+        close_old_connections()
+        self._write(events)
+        close_old_connections()
+
+    def _write(self, events: list[tuple[str, "Event"]]):
+        by_schema: dict[str, list[Event]] = defaultdict(list)
+        for schema, event in events:
+            by_schema[schema].append(event)
+        for schema, schema_events in by_schema.items():
+            model = schema_events[0].__class__
+            with schema_context(schema):
+                try:
+                    # Events which have been saved again in the meantime already exist
+                    model.objects.bulk_create(schema_events, ignore_conflicts=True)
+                    written = schema_events
+                except DatabaseError as exc:
+                    LOGGER.warning("Failed to write events in bulk", exc=exc)
+                    written = self._write_single(model, schema_events)
+                for event in written:
+                    post_save.send(
+                        sender=model,
+                        instance=event,
+                        created=True,
+                        update_fields=None,
+                        raw=False,
+                        using=router.db_for_write(model),
+                    )
+
+    def _write_single(self, model: type["Event"], events: list["Event"]) -> list["Event"]:
+        """Write events one by one, so only events which can't be written are dropped"""
+        close_old_connections()
+        written = []
+        for event in events:
+            try:
+                model.objects.bulk_create([event], ignore_conflicts=True)
+                written.append(event)
+            except DatabaseError as exc:
+                LOGGER.warning(
+                    "Failed to write event",
+                    exc=exc,
+                    event_uuid=event.event_uuid.hex,
+                    action=event.action,
+                )
+        return written
+
+    def reset(self):
+        """Drop buffered events of the parent process after a fork, as they're written by the
+        parent, and let the child start its own thread"""
+        self._condition = Condition()
+        self._events = []
+        self._thread = None
+
+
+EVENT_BUFFER = EventBuffer()
+
+register_at_fork(after_in_child=EVENT_BUFFER.reset)
+register_at_exit(EVENT_BUFFER.flush)
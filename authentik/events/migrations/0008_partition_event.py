@@ -0,0 +1,109 @@
+# Generated by Django 5.0.9 on 2024-10-07 12:00
+
+import django.db.models.deletion
+from django.apps.registry import Apps
+from django.db import DatabaseError, migrations, models
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+from django.utils.timezone import now
+
+from authentik.events.partitions import (
+    DEFAULT_PARTITION,
+    EVENT_TABLE,
+    PARTITION_INTERVAL,
+    PARTITIONS_AHEAD,
+    create_partitions,
+    week_start,
+)
+
+
+def _rebuild_event_table(schema_editor: BaseDatabaseSchemaEditor, partitioned: bool):
+    """Re-create the event table (partitioned by `created` or not) and copy all events.
+    Postgres can't partition an existing table, and the primary key of a partitioned table
+    has to include the partition key."""
+    quote = schema_editor.quote_name
+    old_table = f"{EVENT_TABLE}_old"
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"SELECT min(created), max(created) FROM {quote(EVENT_TABLE)}")
+        oldest, newest = cursor.fetchone()
+        cursor.execute(
+            "SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'p'",
+            [EVENT_TABLE],
+        )
+        pkey = cursor.fetchone()[0]
+        cursor.execute(
+            "SELECT indexname, indexdef FROM pg_indexes "
+            "WHERE schemaname = current_schema() AND tablename = %s AND indexname != %s",
+            [EVENT_TABLE, pkey],
+        )
+        indexes = cursor.fetchall()
+    schema_editor.execute(f"ALTER TABLE {quote(EVENT_TABLE)} RENAME TO {quote(old_table)}")
+    schema_editor.execute(f"ALTER TABLE {quote(old_table)} DROP CONSTRAINT {quote(pkey)}")
+    for name, _ in indexes:
+        schema_editor.execute(f"DROP INDEX {quote(name)}")
+    if partitioned:
+        schema_editor.execute(
+            f"CREATE TABLE {quote(EVENT_TABLE)} (LIKE {quote(old_table)} "
+            "INCLUDING DEFAULTS INCLUDING CONSTRAINTS) PARTITION BY RANGE (created)"
+        )
+        schema_editor.execute(
+            f"ALTER TABLE {quote(EVENT_TABLE)} ADD CONSTRAINT {quote(pkey)} "
+            "PRIMARY KEY (event_uuid, created)"
+        )
+        schema_editor.execute(
+            f"CREATE TABLE {quote(DEFAULT_PARTITION)} PARTITION OF {quote(EVENT_TABLE)} DEFAULT"
+        )
+        # Create partitions for all existing events, so the default partition stays empty
+        # (which Postgres has to scan whenever a partition is created)
+        ahead = PARTITIONS_AHEAD
+        if newest and newest > now():
+            ahead += (week_start(newest) - week_start(now())) // PARTITION_INTERVAL
+        _, failed = create_partitions(ahead=ahead, since=oldest, using=schema_editor.connection)
+        if failed:
+            raise DatabaseError(f"Failed to create event partitions: {failed}")
+    else:
+        schema_editor.execute(
+            f"CREATE TABLE {quote(EVENT_TABLE)} (LIKE {quote(old_table)} "
+            "INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        )
+        schema_editor.execute(
+            f"ALTER TABLE {quote(EVENT_TABLE)} ADD CONSTRAINT {quote(pkey)} "
+            "PRIMARY KEY (event_uuid)"
+        )
+    schema_editor.execute(f"INSERT INTO {quote(EVENT_TABLE)} SELECT * FROM {quote(old_table)}")
+    schema_editor.execute(f"DROP TABLE {quote(old_table)}")
+    for _, definition in indexes:
+        # Indexes of partitioned tables are listed as only applying to the parent table
+        schema_editor.execute(definition.replace(" ON ONLY ", " ON "))
+
+
+def partition_event_table(apps: Apps, schema_editor: BaseDatabaseSchemaEditor):
+    _rebuild_event_table(schema_editor, True)
+
+
+def unpartition_event_table(apps: Apps, schema_editor: BaseDatabaseSchemaEditor):
+    _rebuild_event_table(schema_editor, False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authentik_events", "0007_event_authentik_e_action_9a9dd9_idx_and_more"),
+    ]
+
+    operations = [
+        # Foreign keys can't reference the partitioned table, as its primary key includes
+        # `created`. Notifications are updated when their event is deleted (or the partition
+        # it's in is dropped) by authentik itself.
+        migrations.AlterField(
+            model_name="notification",
+            name="event",
+            field=models.ForeignKey(
+                blank=True,
+                db_constraint=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                to="authentik_events.event",
+            ),
+        ),
+        migrations.RunPython(code=partition_event_table, reverse_code=unpartition_event_table),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.0.9 on 2024-10-14 12:00
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authentik_events", "0008_partition_event"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="event",
+            name="created",
+            field=models.DateTimeField(
+                blank=True, default=django.utils.timezone.now, editable=False
+            ),
+        ),
+    ]
@@ -4,7 +4,7 @@ import time
 from collections import Counter
 from datetime import timedelta
 from difflib import get_close_matches
-from functools import lru_cache
+from functools import cache, lru_cache
 from inspect import currentframe
 from smtplib import SMTPException
 from uuid import uuid4
@@ -33,6 +33,7 @@ from authentik.core.middleware import (
 )
 from authentik.core.models import ExpiringModel, Group, PropertyMapping, User
 from authentik.events.apps import GAUGE_TASKS, SYSTEM_TASK_STATUS, SYSTEM_TASK_TIME
+from authentik.events.buffer import EVENT_BUFFER
 from authentik.events.context_processors.base import get_context_processors
 from authentik.events.utils import (
     cleanse_dict,
@@ -77,6 +78,26 @@ def django_app_names() -> list[str]:
     return [x.name for x in apps.app_configs.values()]
 
 
+@lru_cache
+def django_app_prefixes() -> frozenset[str]:
+    """Get a cached set of all prefixes of django apps' names"""
+    return frozenset(name[:idx] for name in django_app_names() for idx in range(1, len(name) + 1))
+
+
+@cache
+def django_app_for_module(module: str) -> str:
+    """Match a module to the django app it belongs to, if we can't find a match, keep the
+    module name. The closest django app is only used if it starts with the module's name, so
+    modules which aren't a prefix of any app name are kept without fuzzy matching."""
+    if module not in django_app_prefixes():
+        return module
+    django_apps: list[str] = get_close_matches(module, django_app_names(), n=1)
+    # Also ensure that closest django app has the correct prefix
+    if len(django_apps) > 0 and django_apps[0].startswith(module):
+        return django_apps[0]
+    return module
+
+
 class NotificationTransportError(SentryIgnoredException):
     """Error raised when a notification fails to be delivered"""
 
@@ -179,7 +200,10 @@ class EventManager(Manager):
 
 
 class Event(SerializerModel, ExpiringModel):
-    """An individual Audit/Metrics/Notification/Error Event"""
+    """An individual Audit/Metrics/Notification/Error Event
+
+    The table is partitioned weekly by `created` (see `authentik.events.partitions`), so
+    queries should filter by `created` where possible to only scan the relevant partitions."""
 
     event_uuid = models.UUIDField(primary_key=True, editable=False, default=uuid4)
     user = models.JSONField(default=dict)
@@ -187,7 +211,9 @@ class Event(SerializerModel, ExpiringModel):
     app = models.TextField()
     context = models.JSONField(default=dict, blank=True)
     client_ip = models.GenericIPAddressField(null=True)
-    created = models.DateTimeField(auto_now_add=True)
+    # Set when the event is created instead of when it's written, as new events can be buffered
+    # (see `authentik.events.buffer`) and are used before they're written
+    created = models.DateTimeField(default=now, editable=False, blank=True)
     brand = models.JSONField(default=default_brand, blank=True)
 
     # Shadow the expires attribute from ExpiringModel to override the default duration
@@ -213,13 +239,7 @@ class Event(SerializerModel, ExpiringModel):
         if not app:
             current = currentframe()
             parent = current.f_back
-            app = parent.f_globals["__name__"]
-            # Attempt to match the calling module to the django app it belongs to
-            # if we can't find a match, keep the module name
-            django_apps: list[str] = get_close_matches(app, django_app_names(), n=1)
-            # Also ensure that closest django app has the correct prefix
-            if len(django_apps) > 0 and django_apps[0].startswith(app):
-                app = django_apps[0]
+            app = django_app_for_module(parent.f_globals["__name__"])
         cleaned_kwargs = cleanse_dict(sanitize_dict(kwargs))
         event = Event(action=action, app=app, context=cleaned_kwargs)
         return event
@@ -230,10 +250,14 @@ class Event(SerializerModel, ExpiringModel):
         self.user = get_user(user)
         return self
 
-    def from_http(self, request: HttpRequest, user: User | None = None) -> "Event":
+    def from_http(
+        self, request: HttpRequest, user: User | None = None, buffered: bool = True
+    ) -> "Event":
         """Add data from a Django-HttpRequest, allowing the creation of
         Events independently from requests.
-        `user` arguments optionally overrides user from requests."""
+        `user` arguments optionally overrides user from requests.
+        `buffered` can be disabled by callers which require the event to be written
+        once this returns."""
         if request:
             from authentik.flows.views.executor import QS_QUERY
 
@@ -273,10 +297,10 @@ class Event(SerializerModel, ExpiringModel):
         # If there's no app set, we get it from the requests too
         if not self.app:
             self.app = Event._get_app_from_request(request)
-        self.save()
+        self.save(buffered=buffered)
         return self
 
-    def save(self, *args, **kwargs):
+    def save(self, *args, buffered: bool = True, **kwargs):
         if self._state.adding:
             LOGGER.info(
                 "Created Event",
@@ -285,6 +309,9 @@ class Event(SerializerModel, ExpiringModel):
                 client_ip=self.client_ip,
                 user=self.user,
             )
+            # Plain saves of new events are written in bulk, if enabled
+            if buffered and not args and not kwargs and EVENT_BUFFER.add(self):
+                return
         super().save(*args, **kwargs)
 
     @property
@@ -541,7 +568,10 @@ class Notification(SerializerModel):
     severity = models.TextField(choices=NotificationSeverity.choices)
     body = models.TextField()
     created = models.DateTimeField(auto_now_add=True)
-    event = models.ForeignKey(Event, on_delete=models.SET_NULL, null=True, blank=True)
+    # The event table is partitioned, which can't be referenced by foreign keys
+    event = models.ForeignKey(
+        Event, on_delete=models.SET_NULL, null=True, blank=True, db_constraint=False
+    )
     seen = models.BooleanField(default=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
 
@@ -0,0 +1,141 @@
+"""Weekly range partitions of the event table"""
+
+from datetime import UTC, date, datetime, timedelta
+
+from django.db import DatabaseError, connection, transaction
+from django.utils.timezone import now
+from structlog.stdlib import get_logger
+
+LOGGER = get_logger()
+
+EVENT_TABLE = "authentik_events_event"
+NOTIFICATION_TABLE = "authentik_events_notification"
+DEFAULT_PARTITION = f"{EVENT_TABLE}_default"
+PARTITION_PREFIX = f"{EVENT_TABLE}_p"
+PARTITION_INTERVAL = timedelta(weeks=1)
+# Partitions which are created in advance, in addition to the current week's
+PARTITIONS_AHEAD = 2
+
+
+def partition_name(start: date) -> str:
+    """Name of the partition for the week starting at `start`"""
+    return f"{PARTITION_PREFIX}{start:%Y%m%d}"
+
+
+def partition_start(name: str) -> date | None:
+    """Start of the week a partition is for, None for other tables (like the default partition)"""
+    if not name.startswith(PARTITION_PREFIX):
+        return None
+    try:
+        return datetime.strptime(name.removeprefix(PARTITION_PREFIX), "%Y%m%d").date()
+    except ValueError:
+        return None
+
+
+def week_start(timestamp: datetime) -> date:
+    """Monday of the (UTC) week of `timestamp`"""
+    day = timestamp.astimezone(UTC).date()
+    return day - timedelta(days=day.weekday())
+
+
+def _bound(day: date) -> str:
+    return f"'{datetime(day.year, day.month, day.day, tzinfo=UTC).isoformat()}'"
+
+
+def get_partitions(using=connection) -> dict[str, date]:
+    """All weekly partitions of the event table in the current schema, with their start"""
+    with using.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = %s::regclass",
+            [EVENT_TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    partitions = {}
+    for name in names:
+        start = partition_start(name)
+        if start:
+            partitions[name] = start
+    return partitions
+
+
+def create_partitions(
+    ahead: int = PARTITIONS_AHEAD, since: datetime | None = None, using=connection
+) -> tuple[list[str], list[tuple[str, str]]]:
+    """Create the partitions for the current week (or all weeks from `since`) until `ahead`
+    weeks after the current week. Returns the created partitions, and the partitions which
+    couldn't be created with their error. Creating a partition fails when the default partition
+    contains events of its week, which happens when partitions weren't created in advance."""
+    existing = get_partitions(using)
+    current = week_start(now())
+    start = week_start(since) if since else current
+    created = []
+    failed = []
+    while start <= current + PARTITION_INTERVAL * ahead:
+        name = partition_name(start)
+        end = start + PARTITION_INTERVAL
+        if name not in existing:
+            try:
+                with transaction.atomic(using=using.alias), using.cursor() as cursor:
+                    cursor.execute(
+                        f"CREATE TABLE {using.ops.quote_name(name)} "
+                        f"PARTITION OF {using.ops.quote_name(EVENT_TABLE)} "
+                        f"FOR VALUES FROM ({_bound(start)}) TO ({_bound(end)})"
+                    )
+                created.append(name)
+            except DatabaseError as exc:
+                LOGGER.error("Failed to create event partition", partition=name, exc=exc)
+                failed.append((name, str(exc)))
+        start = end
+    return created, failed
+
+
+def empty_default_partition(using=connection) -> int:
+    """Move events from the default partition into weekly partitions, which are created as
+    needed. Events end up in the default partition when their week's partition didn't exist
+    yet, for example in a tenant cloned from the template schema before its partitions were
+    created. Returns the number of moved events."""
+    default = using.ops.quote_name(DEFAULT_PARTITION)
+    moved = using.ops.quote_name(f"{EVENT_TABLE}_moved")
+    with transaction.atomic(using=using.alias), using.cursor() as cursor:
+        cursor.execute(f"SELECT min(created), max(created) FROM {default}")
+        oldest, newest = cursor.fetchone()
+        if not oldest:
+            return 0
+        cursor.execute(f"CREATE TEMPORARY TABLE {moved} ON COMMIT DROP AS SELECT * FROM {default}")
+        cursor.execute(f"DELETE FROM {default}")
+        ahead = PARTITIONS_AHEAD
+        if newest > now():
+            ahead += (week_start(newest) - week_start(now())) // PARTITION_INTERVAL
+        _, failed = create_partitions(ahead=ahead, since=oldest, using=using)
+        if failed:
+            raise DatabaseError(f"Failed to create event partitions: {failed}")
+        cursor.execute(f"INSERT INTO {using.ops.quote_name(EVENT_TABLE)} SELECT * FROM {moved}")
+        amount = cursor.rowcount
+        cursor.execute(f"DROP TABLE {moved}")
+    return amount
+
+
+def drop_expired_partitions(using=connection) -> list[str]:
+    """Drop partitions of past weeks of which all events have expired. Notifications of those
+    events are kept, like they are when a single event is deleted."""
+    current = week_start(now())
+    dropped = []
+    for name, start in sorted(get_partitions(using).items(), key=lambda item: item[1]):
+        if start + PARTITION_INTERVAL > current:
+            continue
+        partition = using.ops.quote_name(name)
+        with transaction.atomic(using=using.alias), using.cursor() as cursor:
+            cursor.execute(
+                f"SELECT 1 FROM {partition} WHERE NOT expiring OR expires > %s LIMIT 1",
+                [now()],
+            )
+            if cursor.fetchone():
+                continue
+            cursor.execute(
+                f"UPDATE {using.ops.quote_name(NOTIFICATION_TABLE)} SET event_id = NULL "
+                f"WHERE event_id IN (SELECT event_uuid FROM {partition})"
+            )
+            cursor.execute(f"DROP TABLE {partition}")
+        dropped.append(name)
+    return dropped
@@ -10,4 +10,9 @@ CELERY_BEAT_SCHEDULE = {
         "schedule": crontab(minute=fqdn_rand("notification_cleanup"), hour="*/8"),
         "options": {"queue": "authentik_scheduled"},
     },
+    "events_partitions_manage": {
+        "task": "authentik.events.tasks.event_partitions_manage",
+        "schedule": crontab(minute=fqdn_rand("event_partitions_manage"), hour="*/8"),
+        "options": {"queue": "authentik_scheduled"},
+    },
 }
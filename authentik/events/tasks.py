@@ -14,6 +14,7 @@ from authentik.events.models import (
     NotificationTransportError,
     TaskStatus,
 )
+from authentik.events.partitions import create_partitions, drop_expired_partitions
 from authentik.events.system_tasks import SystemTask, prefill_task
 from authentik.policies.engine import PolicyEngine
 from authentik.policies.models import PolicyBinding, PolicyEngineMode
@@ -142,3 +143,25 @@ def notification_cleanup(self: SystemTask):
         notification.delete()
     LOGGER.debug("Expired notifications", amount=amount)
     self.set_status(TaskStatus.SUCCESSFUL, f"Expired {amount} Notifications")
+
+
+@CELERY_APP.task(bind=True, base=SystemTask)
+@prefill_task
+def event_partitions_manage(self: SystemTask):
+    """Create event partitions for the upcoming weeks and drop partitions of which all events
+    have expired. Other expired events are removed by `clean_expired_models`."""
+    created, failed = create_partitions()
+    dropped = drop_expired_partitions()
+    LOGGER.debug("Managed event partitions", created=created, failed=failed, dropped=dropped)
+    messages = [
+        f"Created {len(created)} partitions",
+        f"Dropped {len(dropped)} partitions",
+    ]
+    if failed:
+        self.set_status(
+            TaskStatus.ERROR,
+            *messages,
+            *[f"Failed to create partition {name}: {error}" for name, error in failed],
+        )
+        return
+    self.set_status(TaskStatus.SUCCESSFUL, *messages)
@@ -0,0 +1,90 @@
+"""Event buffer tests"""
+
+from unittest.mock import MagicMock, patch
+
+from django.db import DatabaseError
+from django.test import RequestFactory, TestCase
+
+from authentik.events.buffer import EVENT_BUFFER, EventBuffer
+from authentik.events.models import Event
+from authentik.lib.config import CONFIG
+from authentik.lib.generators import generate_id
+
+
+class TestEventBuffer(TestCase):
+    """Test event buffer"""
+
+    def tearDown(self) -> None:
+        EVENT_BUFFER.reset()
+
+    def test_disabled(self):
+        """Test events are written synchronously by default"""
+        action = generate_id()
+        Event.new(action).save()
+        self.assertTrue(Event.objects.filter(action=action).exists())
+
+    @patch.object(EventBuffer, "_start", MagicMock())
+    def test_buffered(self):
+        """Test events are written and notifications dispatched on flush"""
+        action = generate_id()
+        delay = MagicMock()
+        with (
+            CONFIG.patch("events.buffer.size", 10),
+            patch("authentik.events.signals.event_notification_handler.delay", delay),
+        ):
+            with self.captureOnCommitCallbacks(execute=True):
+                event = Event.new(action)
+                event.save()
+            self.assertFalse(Event.objects.filter(action=action).exists())
+            delay.assert_not_called()
+            EVENT_BUFFER.flush()
+        self.assertTrue(Event.objects.filter(action=action).exists())
+        delay.assert_called_once_with(event.event_uuid.hex)
+
+    @patch.object(EventBuffer, "_start", MagicMock())
+    def test_full(self):
+        """Test events are written synchronously when the buffer is full"""
+        with CONFIG.patch("events.buffer.size", 1):
+            with self.captureOnCommitCallbacks(execute=True):
+                Event.new(generate_id()).save()
+            action = generate_id()
+            Event.new(action).save()
+            self.assertTrue(Event.objects.filter(action=action).exists())
+            EVENT_BUFFER.flush()
+
+    @patch.object(EventBuffer, "_start", MagicMock())
+    def test_bulk_failed(self):
+        """Test events are written one by one when the bulk insert fails"""
+        bulk_create = Event.objects.bulk_create
+        calls = []
+
+        def failing_bulk_create(objs, *args, **kwargs):
+            calls.append(len(objs))
+            if len(calls) == 1 or objs[0].action == "invalid":
+                raise DatabaseError()
+            return bulk_create(objs, *args, **kwargs)
+
+        valid = generate_id()
+        with CONFIG.patch("events.buffer.size", 10):
+            with self.captureOnCommitCallbacks(execute=True):
+                Event.new(valid).save()
+                Event.new("invalid").save()
+            with patch.object(Event.objects, "bulk_create", failing_bulk_create):
+                EVENT_BUFFER.flush()
+        self.assertEqual(calls, [2, 1, 1])
+        self.assertTrue(Event.objects.filter(action=valid).exists())
+        self.assertFalse(Event.objects.filter(action="invalid").exists())
+
+    @patch.object(EventBuffer, "_start", MagicMock())
+    def test_from_http(self):
+        """Test events created from a request are buffered, and usable before they're written"""
+        request = RequestFactory().get("/")
+        with CONFIG.patch("events.buffer.size", 10):
+            with self.captureOnCommitCallbacks(execute=True):
+                event = Event.new("unittest").from_http(request)
+            self.assertIsNotNone(event.created)
+            self.assertFalse(Event.objects.filter(pk=event.pk).exists())
+            written = Event.new("unittest").from_http(request, buffered=False)
+            self.assertTrue(Event.objects.filter(pk=written.pk).exists())
+            EVENT_BUFFER.flush()
+        self.assertEqual(Event.objects.get(pk=event.pk).created, event.created)
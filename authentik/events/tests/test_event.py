@@ -1,5 +1,7 @@
 """event tests"""
 
+import sys
+from difflib import get_close_matches
 from urllib.parse import urlencode
 
 from django.contrib.contenttypes.models import ContentType
@@ -9,7 +11,7 @@ from guardian.shortcuts import get_anonymous_user
 
 from authentik.brands.models import Brand
 from authentik.core.models import Group
-from authentik.events.models import Event
+from authentik.events.models import Event, django_app_for_module, django_app_names
 from authentik.flows.views.executor import QS_QUERY
 from authentik.lib.generators import generate_id
 from authentik.policies.dummy.models import DummyPolicy
@@ -50,6 +52,25 @@ class TestEvents(TestCase):
         self.assertEqual(event.context.get("model").get("app"), model_content_type.app_label)
         self.assertEqual(event.context.get("model").get("pk"), temp_model.pk.hex)
 
+    def test_new_app(self):
+        """Test app is set from the calling module"""
+        self.assertEqual(Event.new("unittest").app, __name__)
+        self.assertEqual(Event.new("unittest", app="foo").app, "foo")
+
+    def test_app_for_module(self):
+        """Test modules resolve to the same app as the closest match of all apps' names"""
+        modules = {name for name in sys.modules if name.startswith(("authentik", "django"))}
+        for app in django_app_names():
+            parts = app.split(".")
+            modules.update(".".join(parts[:idx]) for idx in range(1, len(parts) + 1))
+        for module in modules:
+            with self.subTest(module=module):
+                closest = get_close_matches(module, django_app_names(), n=1)
+                expected = module
+                if len(closest) > 0 and closest[0].startswith(module):
+                    expected = closest[0]
+                self.assertEqual(django_app_for_module(module), expected)
+
     def test_from_http_basic(self):
         """Test plain from_http"""
         event = Event.new("unittest").from_http(self.factory.get("/"))
@@ -0,0 +1,80 @@
+"""Event partition tests"""
+
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase
+from django.utils.timezone import now
+
+from authentik.core.tests.utils import create_test_user
+from authentik.events.models import Event, Notification
+from authentik.events.partitions import (
+    DEFAULT_PARTITION,
+    PARTITIONS_AHEAD,
+    create_partitions,
+    empty_default_partition,
+    get_partitions,
+    partition_name,
+    week_start,
+)
+from authentik.events.tasks import event_partitions_manage
+from authentik.lib.generators import generate_id
+
+
+class TestEventPartitions(TestCase):
+    """Test event partitions"""
+
+    def test_create(self):
+        """Test partitions are created for the current and upcoming weeks"""
+        create_partitions()
+        partitions = get_partitions()
+        start = week_start(now())
+        for week in range(PARTITIONS_AHEAD + 1):
+            self.assertIn(partition_name(start + timedelta(weeks=week)), partitions)
+        self.assertEqual(create_partitions(), ([], []))
+
+    def test_create_since(self):
+        """Test partitions are created for all weeks since a timestamp"""
+        since = now() - timedelta(weeks=10)
+        created, failed = create_partitions(ahead=0, since=since)
+        self.assertEqual(failed, [])
+        partitions = get_partitions()
+        for week in range(11):
+            self.assertIn(partition_name(week_start(since + timedelta(weeks=week))), partitions)
+        self.assertLessEqual(len(created), 11)
+
+    def test_empty_default(self):
+        """Test events in the default partition are moved into weekly partitions"""
+        past = now() - timedelta(weeks=30)
+        event = Event.new(generate_id())
+        event.save(buffered=False)
+        # No partition exists for that week, so the event is moved into the default partition
+        Event.objects.filter(pk=event.pk).update(created=past)
+        self.assertEqual(empty_default_partition(), 1)
+        self.assertIn(partition_name(week_start(past)), get_partitions())
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT count(*) FROM {connection.ops.quote_name(DEFAULT_PARTITION)}")
+            self.assertEqual(cursor.fetchone()[0], 0)
+        self.assertTrue(Event.objects.filter(pk=event.pk, created=past).exists())
+        self.assertEqual(empty_default_partition(), 0)
+
+    def test_drop_expired(self):
+        """Test partitions of which all events have expired are dropped"""
+        past = now() - timedelta(weeks=20)
+        create_partitions(ahead=0, since=past)
+        expired = Event.new(generate_id())
+        expired.save()
+        kept = Event.new(generate_id())
+        kept.save()
+        Event.objects.filter(pk=expired.pk).update(created=past, expires=past)
+        Event.objects.filter(pk=kept.pk).update(created=past + timedelta(weeks=1))
+        notification = Notification.objects.create(user=create_test_user(), event=expired)
+
+        event_partitions_manage.delay().get()
+        partitions = get_partitions()
+        self.assertNotIn(partition_name(week_start(past)), partitions)
+        self.assertIn(partition_name(week_start(past + timedelta(weeks=1))), partitions)
+        self.assertFalse(Event.objects.filter(pk=expired.pk).exists())
+        self.assertTrue(Event.objects.filter(pk=kept.pk).exists())
+        notification.refresh_from_db()
+        self.assertIsNone(notification.event_id)
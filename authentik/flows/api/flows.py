@@ -27,8 +27,15 @@ from authentik.events.logs import LogEventSerializer
 from authentik.flows.api.flows_diagram import FlowDiagram, FlowDiagramSerializer
 from authentik.flows.exceptions import FlowNonApplicableException
 from authentik.flows.models import Flow
-from authentik.flows.planner import CACHE_PREFIX, PLAN_CONTEXT_PENDING_USER, FlowPlanner, cache_key
+from authentik.flows.planner import (
+    CACHE_GENERATION,
+    CACHE_PREFIX,
+    PLAN_CONTEXT_PENDING_USER,
+    FlowPlanner,
+    cache_key,
+)
 from authentik.flows.views.executor import SESSION_KEY_HISTORY, SESSION_KEY_PLAN
+from authentik.lib.utils.cache import bump_generation
 from authentik.lib.utils.file import (
     FilePathSerializer,
     FileUploadSerializer,
@@ -146,6 +153,8 @@ class FlowViewSet(UsedByMixin, ModelViewSet):
         """Clear flow cache"""
         keys = cache.keys(f"{CACHE_PREFIX}*")
         cache.delete_many(keys)
+        # Plans kept in-process by other workers are invalidated by the generation
+        bump_generation(CACHE_GENERATION)
         LOGGER.debug("Cleared flow cache", keys=len(keys))
         return Response(status=204)
 
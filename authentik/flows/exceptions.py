@@ -23,6 +23,10 @@ class EmptyFlowException(SentryIgnoredException):
     """Flow has no stages."""
 
 
+class FlowPlanIncompatibleException(SentryIgnoredException):
+    """Flow plan couldn't be loaded, for example because one of its stages was deleted."""
+
+
 class FlowSkipStageException(SentryIgnoredException):
     """Exception to skip a stage"""
 
@@ -1,7 +1,10 @@
 """Flows Planner"""
 
-from dataclasses import dataclass, field
+from collections.abc import Iterable
+from copy import copy
+from dataclasses import dataclass, field, fields
 from typing import Any
+from uuid import UUID
 
 from django.core.cache import cache
 from django.http import HttpRequest
@@ -12,7 +15,11 @@ from structlog.stdlib import BoundLogger, get_logger
 from authentik.core.models import User
 from authentik.events.models import cleanse_dict
 from authentik.flows.apps import HIST_FLOWS_PLAN_TIME
-from authentik.flows.exceptions import EmptyFlowException, FlowNonApplicableException
+from authentik.flows.exceptions import (
+    EmptyFlowException,
+    FlowNonApplicableException,
+    FlowPlanIncompatibleException,
+)
 from authentik.flows.markers import ReevaluateMarker, StageMarker
 from authentik.flows.models import (
     Flow,
@@ -23,8 +30,10 @@ from authentik.flows.models import (
     in_memory_stage,
 )
 from authentik.lib.config import CONFIG
+from authentik.lib.utils.cache import LocalCache, TieredCache, get_generation
+from authentik.lib.utils.reflection import class_to_path, path_to_class
 from authentik.outposts.models import Outpost
-from authentik.policies.engine import PolicyEngine
+from authentik.policies.engine import PolicyEngine, prefetch_engines
 from authentik.root.middleware import ClientIPMiddleware
 
 LOGGER = get_logger()
@@ -39,20 +48,101 @@ PLAN_CONTEXT_OUTPOST = "outpost"
 PLAN_CONTEXT_IS_RESTORED = "is_restored"
 CACHE_TIMEOUT = CONFIG.get_int("cache.timeout_flows")
 CACHE_PREFIX = "goauthentik.io/flows/planner/"
+# Generation namespace of all cached plans, see `authentik.lib.utils.cache`
+CACHE_GENERATION = "flows"
+
+
+# Plans are immutable per cache key, as the key includes the cache generation
+PLAN_CACHE = TieredCache("flows")
+# Version of the state created by `FlowPlan.__getstate__`, increase on incompatible changes
+PLAN_STATE_VERSION = 1
+# Bindings (with their stages) referenced by plans, used when plans are loaded
+BINDING_CACHE = LocalCache(timeout_config="cache.timeout_flows")
+BINDING_CACHE_PREFIX = "goauthentik.io/flows/planner/bindings/"
+
+
+def flow_cache_generation(flow_pk: str) -> str:
+    """Generation namespace of the cached plans of a single flow"""
+    return f"{CACHE_GENERATION}/{flow_pk}"
 
 
 def cache_key(flow: Flow, user: User | None = None) -> str:
     """Generate Cache key for flow"""
-    prefix = CACHE_PREFIX + str(flow.pk)
+    generation = get_generation(CACHE_GENERATION, flow_cache_generation(flow.pk))
+    prefix = f"{CACHE_PREFIX}{flow.pk}_{generation}_{PLAN_STATE_VERSION}"
     if user:
         prefix += f"#{user.pk}"
     return prefix
 
 
+def _dump_binding(binding: FlowStageBinding) -> tuple[UUID, UUID] | FlowStageBinding:
+    """Reference saved bindings by their primary key and their flow's primary key,
+    in-memory bindings (and stages) are kept as-is"""
+    if binding._state.adding:
+        return binding
+    stage = binding._state.fields_cache.get("stage")
+    if stage is not None and stage._state.adding:
+        return binding
+    return (binding.pk, binding.target_id)
+
+
+def _dump_marker(marker: StageMarker) -> tuple[str, dict[str, Any]] | None:
+    """Compact representation of `marker`, with bindings replaced by references"""
+    if marker.__class__ is StageMarker:
+        return None
+    attrs = {}
+    for marker_field in fields(marker):
+        value = getattr(marker, marker_field.name)
+        if isinstance(value, FlowStageBinding):
+            value = _dump_binding(value)
+        attrs[marker_field.name] = value
+    return (class_to_path(marker.__class__), attrs)
+
+
+def _load_bindings(refs: Iterable[tuple[UUID, UUID]]) -> dict[UUID, FlowStageBinding]:
+    """Load referenced bindings and their stages, from the in-process binding cache or
+    with a single query for bindings and one for stages. Cached bindings are
+    invalidated with the generation of their flow."""
+    refs = set(refs)
+    generations = {
+        target_pk: get_generation(CACHE_GENERATION, flow_cache_generation(target_pk))
+        for target_pk in {target_pk for _, target_pk in refs}
+    }
+    bindings: dict[UUID, FlowStageBinding] = {}
+    missing: dict[UUID, str] = {}
+    for binding_pk, target_pk in refs:
+        key = cache.make_key(f"{BINDING_CACHE_PREFIX}{binding_pk}_{generations[target_pk]}")
+        binding = BINDING_CACHE.get(key) if BINDING_CACHE.timeout > 0 else None
+        if binding is None:
+            missing[binding_pk] = key
+            continue
+        bindings[binding_pk] = binding
+    if missing:
+        queried = list(FlowStageBinding.objects.filter(pk__in=missing.keys()))
+        stages = Stage.objects.filter(
+            pk__in=[binding.stage_id for binding in queried]
+        ).select_subclasses()
+        stages = {stage.pk: stage for stage in stages}
+        for binding in queried:
+            binding.stage = stages[binding.stage_id]
+            bindings[binding.pk] = binding
+            if BINDING_CACHE.timeout > 0:
+                BINDING_CACHE.set(missing[binding.pk], binding)
+    # Cached bindings are shared within the process, so every plan gets its own copy
+    loaded = {}
+    for binding_pk, binding in bindings.items():
+        loaded[binding_pk] = copy(binding)
+        loaded[binding_pk].stage = copy(binding.stage)
+    return loaded
+
+
 @dataclass(slots=True)
 class FlowPlan:
     """This data-class is the output of a FlowPlanner. It holds a flat list
-    of all Stages that should be run."""
+    of all Stages that should be run.
+
+    When pickled (into the session or the plan cache), saved bindings and stages are
+    only referenced by their primary keys and loaded again when unpickled."""
 
     flow_pk: str
 
@@ -60,6 +150,71 @@ class FlowPlan:
     context: dict[str, Any] = field(default_factory=dict)
     markers: list[StageMarker] = field(default_factory=list)
 
+    # Set when the plan couldn't be loaded, for example when a stage was deleted
+    incompatible_reason: str | None = field(default=None, init=False, repr=False, compare=False)
+
+    def __getstate__(self) -> dict[str, Any]:
+        return {
+            "version": PLAN_STATE_VERSION,
+            "flow_pk": self.flow_pk,
+            "bindings": [_dump_binding(binding) for binding in self.bindings],
+            "markers": [_dump_marker(marker) for marker in self.markers],
+            "context": self.context,
+        }
+
+    def __setstate__(self, state: dict[str, Any] | tuple[None, dict[str, Any]]):
+        self.incompatible_reason = None
+        if isinstance(state, tuple) and state[0] is None:
+            # Plans pickled before the compact representation, with the default state of
+            # classes with slots (no __dict__, and all slots with their values as-is)
+            slots = state[1]
+            self.flow_pk = slots.get("flow_pk")
+            self.bindings = slots.get("bindings", [])
+            self.context = slots.get("context", {})
+            self.markers = slots.get("markers", [])
+            return
+        self.flow_pk = state.get("flow_pk")
+        self.context = state.get("context", {})
+        self.bindings = []
+        self.markers = []
+        if state.get("version") != PLAN_STATE_VERSION:
+            self.incompatible_reason = f"Unsupported plan version {state.get('version')}"
+            return
+        try:
+            refs = [binding for binding in state["bindings"] if isinstance(binding, tuple)]
+            for marker in state["markers"]:
+                if not marker:
+                    continue
+                refs.extend(value for value in marker[1].values() if isinstance(value, tuple))
+            loaded = _load_bindings(refs)
+
+            def restore(value: Any) -> Any:
+                return loaded[value[0]] if isinstance(value, tuple) else value
+
+            self.bindings = [restore(binding) for binding in state["bindings"]]
+            for marker in state["markers"]:
+                if not marker:
+                    self.markers.append(StageMarker())
+                    continue
+                marker_class, attrs = marker
+                self.markers.append(
+                    path_to_class(marker_class)(
+                        **{name: restore(value) for name, value in attrs.items()}
+                    )
+                )
+        # Unpickling must not fail (for example when the database or cache is unavailable),
+        # as that would break the session, the plan is marked as incompatible instead
+        except Exception as exc:  # pylint:disable=broad-except
+            LOGGER.warning("f(plan_inst): failed to load plan", exc=exc)
+            self.bindings = []
+            self.markers = []
+            self.incompatible_reason = str(exc)
+
+    @property
+    def compatible(self) -> bool:
+        """Check if the plan was loaded successfully"""
+        return self.incompatible_reason is None
+
     def append_stage(self, stage: Stage, marker: StageMarker | None = None):
         """Append `stage` to the end of the plan, optionally with stage marker"""
         return self.append(FlowStageBinding(stage=stage), marker)
@@ -82,6 +237,8 @@ class FlowPlan:
 
     def next(self, http_request: HttpRequest | None) -> FlowStageBinding | None:
         """Return next pending stage from the bottom of the list"""
+        if not self.compatible:
+            raise FlowPlanIncompatibleException(self.incompatible_reason)
         if not self.has_stages:
             return None
         binding = self.bindings[0]
@@ -108,6 +265,8 @@ class FlowPlan:
     @property
     def has_stages(self) -> bool:
         """Check if there are any stages left in this plan"""
+        if not self.compatible:
+            raise FlowPlanIncompatibleException(self.incompatible_reason)
         return len(self.markers) + len(self.bindings) > 0
 
 
@@ -202,9 +361,9 @@ class FlowPlanner:
                 raise exc
             # User is passing so far, check if we have a cached plan
             cached_plan_key = cache_key(self.flow, user)
-            cached_plan = cache.get(cached_plan_key, None)
+            cached_plan = PLAN_CACHE.get(cached_plan_key, None)
             if self.flow.designation not in [FlowDesignation.STAGE_CONFIGURATION]:
-                if cached_plan and self.use_cache:
+                if cached_plan and cached_plan.compatible and self.use_cache:
                     self._logger.debug(
                         "f(plan): taking plan from cache",
                         key=cached_plan_key,
@@ -217,7 +376,7 @@ class FlowPlanner:
             )
             plan = self._build_plan(user, request, context)
             if self.use_cache:
-                cache.set(cache_key(self.flow, user), plan, CACHE_TIMEOUT)
+                PLAN_CACHE.set(cached_plan_key, plan, CACHE_TIMEOUT)
             if not plan.bindings and not self.allow_empty_flows:
                 raise EmptyFlowException()
             return plan
@@ -249,18 +408,34 @@ class FlowPlanner:
             bindings = list(
                 FlowStageBinding.objects.filter(target__pk=self.flow.pk).order_by("order")
             )
-            stages = Stage.objects.filter(flowstagebinding__in=[binding.pk for binding in bindings])
+            stages = {
+                stage.pk: stage
+                for stage in Stage.objects.filter(
+                    flowstagebinding__in=[binding.pk for binding in bindings]
+                )
+            }
+            # Create engines for all bindings evaluated on plan upfront, so that their
+            # policy bindings and cached results can be fetched together
+            engines = {}
+            for binding in bindings:
+                if not binding.evaluate_on_plan:
+                    continue
+                engine = PolicyEngine(binding, user, request)
+                engine.use_cache = self.use_cache
+                engines[binding.pk] = engine
+            prefetch_engines(engines.values())
             for binding in bindings:
                 binding: FlowStageBinding
-                stage = [stage for stage in stages if stage.pk == binding.stage_id][0]
+                stage = stages[binding.stage_id]
                 marker = StageMarker()
                 if binding.evaluate_on_plan:
                     self._logger.debug(
                         "f(plan): evaluating on plan",
                         stage=stage,
                     )
-                    engine = PolicyEngine(binding, user, request)
-                    engine.use_cache = self.use_cache
+                    # Policies are still evaluated one stage after another, as they
+                    # can access (and modify) the plan which is being built
+                    engine = engines[binding.pk]
                     engine.request.context["flow_plan"] = plan
                     engine.request.context.update(plan.context)
                     engine.build()
@@ -1,5 +1,8 @@
 """flow planner tests"""
 
+from copyreg import __newobj__
+from io import BytesIO
+from pickle import Pickler, dumps, loads  # nosec
 from unittest.mock import MagicMock, Mock, PropertyMock, patch
 
 from django.contrib.auth.models import AnonymousUser
@@ -12,21 +15,34 @@ from guardian.shortcuts import get_anonymous_user
 from authentik.blueprints.tests import reconcile_app
 from authentik.core.models import User
 from authentik.core.tests.utils import create_test_admin_user, create_test_flow
-from authentik.flows.exceptions import EmptyFlowException, FlowNonApplicableException
+from authentik.flows.exceptions import (
+    EmptyFlowException,
+    FlowNonApplicableException,
+    FlowPlanIncompatibleException,
+)
 from authentik.flows.markers import ReevaluateMarker, StageMarker
 from authentik.flows.models import FlowAuthenticationRequirement, FlowDesignation, FlowStageBinding
-from authentik.flows.planner import PLAN_CONTEXT_PENDING_USER, FlowPlanner, cache_key
+from authentik.flows.planner import (
+    PLAN_CACHE,
+    PLAN_CONTEXT_PENDING_USER,
+    FlowPlan,
+    FlowPlanner,
+    cache_key,
+)
+from authentik.lib.config import CONFIG
+from authentik.lib.generators import generate_id
 from authentik.lib.tests.utils import dummy_get_response
 from authentik.outposts.apps import MANAGED_OUTPOST
 from authentik.outposts.models import Outpost
 from authentik.policies.dummy.models import DummyPolicy
+from authentik.policies.engine import prefetch_engines
 from authentik.policies.models import PolicyBinding
 from authentik.policies.types import PolicyResult
 from authentik.root.middleware import ClientIPMiddleware
 from authentik.stages.dummy.models import DummyStage
 
 POLICY_RETURN_FALSE = PropertyMock(return_value=PolicyResult(False))
-CACHE_MOCK = Mock(wraps=cache)
+CACHE_MOCK = Mock(wraps=PLAN_CACHE)
 
 POLICY_RETURN_TRUE = MagicMock(return_value=PolicyResult(True))
 
@@ -117,7 +133,7 @@ class TestFlowPlanner(TestCase):
             planner = FlowPlanner(flow)
             planner.plan(request)
 
-    @patch("authentik.flows.planner.cache", CACHE_MOCK)
+    @patch("authentik.flows.planner.PLAN_CACHE", CACHE_MOCK)
     def test_planner_cache(self):
         """Test planner cache"""
         flow = create_test_flow(FlowDesignation.AUTHENTICATION)
@@ -137,6 +153,26 @@ class TestFlowPlanner(TestCase):
         self.assertEqual(CACHE_MOCK.set.call_count, 1)  # Ensure nothing is written to cache
         self.assertEqual(CACHE_MOCK.get.call_count, 2)  # Get is called twice
 
+    def test_planner_cache_local(self):
+        """Test planner taking plans from the in-process cache"""
+        flow = create_test_flow(FlowDesignation.AUTHENTICATION)
+        FlowStageBinding.objects.create(
+            target=flow, stage=DummyStage.objects.create(name=generate_id()), order=0
+        )
+        request = self.request_factory.get(
+            reverse("authentik_api:flow-executor", kwargs={"flow_slug": flow.slug}),
+        )
+        request.user = get_anonymous_user()
+
+        with CONFIG.patch("cache.local_timeout", 30):
+            plan = FlowPlanner(flow).plan(request)
+            remote = Mock(wraps=cache)
+            with patch("authentik.lib.utils.cache.cache", remote):
+                cached_plan = FlowPlanner(flow).plan(request)
+            remote.get_many.assert_not_called()
+        self.assertEqual(cached_plan.bindings, plan.bindings)
+        self.assertIsNot(cached_plan, plan)
+
     def test_planner_default_context(self):
         """Test planner with default_context"""
         flow = create_test_flow()
@@ -211,3 +247,135 @@ class TestFlowPlanner(TestCase):
 
             self.assertIsInstance(plan.markers[0], StageMarker)
             self.assertIsInstance(plan.markers[1], ReevaluateMarker)
+
+    def test_planner_evaluate_on_plan_batched(self):
+        """Test policies of all stages evaluated on plan are fetched together"""
+        flow = create_test_flow()
+        true_policy = DummyPolicy.objects.create(
+            name=generate_id(), result=True, wait_min=0, wait_max=1
+        )
+        false_policy = DummyPolicy.objects.create(
+            name=generate_id(), result=False, wait_min=0, wait_max=1
+        )
+        binding = FlowStageBinding.objects.create(
+            target=flow,
+            stage=DummyStage.objects.create(name=generate_id()),
+            order=0,
+            evaluate_on_plan=True,
+        )
+        binding2 = FlowStageBinding.objects.create(
+            target=flow,
+            stage=DummyStage.objects.create(name=generate_id()),
+            order=1,
+            evaluate_on_plan=True,
+        )
+        PolicyBinding.objects.create(policy=true_policy, target=binding, order=0)
+        PolicyBinding.objects.create(policy=false_policy, target=binding2, order=0)
+
+        request = self.request_factory.get(
+            reverse("authentik_api:flow-executor", kwargs={"flow_slug": flow.slug}),
+        )
+        request.user = get_anonymous_user()
+
+        with patch("authentik.flows.planner.prefetch_engines", wraps=prefetch_engines) as prefetch:
+            planner = FlowPlanner(flow)
+            planner.use_cache = False
+            plan = planner.plan(request)
+        self.assertEqual(plan.bindings, [binding])
+        engines = list(prefetch.call_args.args[0])
+        self.assertEqual([engine.pbm for engine in engines], [binding, binding2])
+
+    def test_plan_pickle(self):
+        """Test compact plan representation, with saved and in-memory stages"""
+        flow = create_test_flow()
+        binding = FlowStageBinding.objects.create(
+            target=flow, stage=DummyStage.objects.create(name=generate_id()), order=0
+        )
+        plan = FlowPlan(flow_pk=flow.pk.hex)
+        plan.append(binding, ReevaluateMarker(binding=binding))
+        plan.redirect("https://goauthentik.io")
+        plan.context["foo"] = "bar"
+
+        state = plan.__getstate__()
+        self.assertEqual(state["bindings"][0], (binding.pk, flow.pk))
+        self.assertEqual(state["markers"][0][1]["binding"], (binding.pk, flow.pk))
+        self.assertIsInstance(state["bindings"][1], FlowStageBinding)
+
+        loaded = loads(dumps(plan))  # nosec
+        self.assertTrue(loaded.compatible)
+        self.assertEqual(loaded.context, {"foo": "bar"})
+        self.assertEqual(loaded.bindings[0], binding)
+        self.assertIsInstance(loaded.bindings[0].stage, DummyStage)
+        self.assertIsInstance(loaded.markers[0], ReevaluateMarker)
+        self.assertEqual(loaded.markers[0].binding, binding)
+        self.assertEqual(loaded.bindings[1].stage.destination, "https://goauthentik.io")
+        self.assertIsInstance(loaded.markers[1], StageMarker)
+
+    def test_plan_pickle_baseline(self):
+        """Test loading a plan pickled before the compact representation, with the default
+        state of a dataclass with slots"""
+        flow = create_test_flow()
+        binding = FlowStageBinding.objects.create(
+            target=flow, stage=DummyStage.objects.create(name=generate_id()), order=0
+        )
+
+        def baseline_reduce(plan: FlowPlan):
+            return (
+                __newobj__,
+                (FlowPlan,),
+                (
+                    None,
+                    {
+                        "flow_pk": plan.flow_pk,
+                        "bindings": plan.bindings,
+                        "context": plan.context,
+                        "markers": plan.markers,
+                    },
+                ),
+            )
+
+        plan = FlowPlan(flow_pk=flow.pk.hex)
+        plan.append(binding, ReevaluateMarker(binding=binding))
+        plan.context["foo"] = "bar"
+        buffer = BytesIO()
+        pickler = Pickler(buffer)
+        pickler.dispatch_table = {FlowPlan: baseline_reduce}
+        pickler.dump(plan)
+
+        loaded = loads(buffer.getvalue())  # nosec
+        self.assertTrue(loaded.compatible)
+        self.assertEqual(loaded.flow_pk, flow.pk.hex)
+        self.assertEqual(loaded.context, {"foo": "bar"})
+        self.assertEqual(loaded.bindings, [binding])
+        self.assertEqual(loaded.markers[0].binding, binding)
+
+    def test_plan_pickle_unavailable(self):
+        """Test loading a plan while its bindings can't be loaded"""
+        flow = create_test_flow()
+        binding = FlowStageBinding.objects.create(
+            target=flow, stage=DummyStage.objects.create(name=generate_id()), order=0
+        )
+        plan = FlowPlan(flow_pk=flow.pk.hex)
+        plan.append(binding)
+        pickled = dumps(plan)
+        with patch(
+            "authentik.flows.planner.get_generation", MagicMock(side_effect=ConnectionError)
+        ):
+            loaded = loads(pickled)  # nosec
+        self.assertFalse(loaded.compatible)
+
+    def test_plan_pickle_incompatible(self):
+        """Test loading a plan which references a deleted stage"""
+        flow = create_test_flow()
+        binding = FlowStageBinding.objects.create(
+            target=flow, stage=DummyStage.objects.create(name=generate_id()), order=0
+        )
+        plan = FlowPlan(flow_pk=flow.pk.hex)
+        plan.append(binding)
+        pickled = dumps(plan)
+        binding.stage.delete()
+
+        loaded = loads(pickled)  # nosec
+        self.assertFalse(loaded.compatible)
+        with self.assertRaises(FlowPlanIncompatibleException):
+            loaded.next(None)
@@ -4,7 +4,6 @@ from copy import deepcopy
 
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.core.cache import cache
 from django.http import Http404, HttpRequest, HttpResponse, HttpResponseRedirect
 from django.http.request import QueryDict
 from django.shortcuts import get_object_or_404, redirect
@@ -47,7 +46,6 @@ from authentik.flows.models import (
     Stage,
 )
 from authentik.flows.planner import (
-    CACHE_PREFIX,
     PLAN_CONTEXT_IS_RESTORED,
     PLAN_CONTEXT_PENDING_USER,
     PLAN_CONTEXT_REDIRECT,
@@ -193,15 +191,13 @@ class FlowExecutorView(APIView):
             # as it hasn't been successfully passed yet
             try:
                 # This is the first time we actually access any attribute on the selected plan
-                # if the cached plan is from an older version, it might have different attributes
-                # in which case we just delete the plan and invalidate everything
+                # if the plan is from an older version or references deleted stages,
+                # it can't be loaded, in which case we invalidate this run
                 next_binding = self.plan.next(self.request)
             except Exception as exc:
                 self._logger.warning(
                     "f(exec): found incompatible flow plan, invalidating run", exc=exc
                 )
-                keys = cache.keys(f"{CACHE_PREFIX}*")
-                cache.delete_many(keys)
                 return self.stage_invalid()
             if not next_binding:
                 self._logger.debug("f(exec): no more stages, flow is done.")
@@ -342,16 +338,15 @@ class FlowExecutorView(APIView):
     def _initiate_plan(self) -> FlowPlan:
         planner = FlowPlanner(self.flow)
         plan = planner.plan(self.request)
-        self.request.session[SESSION_KEY_PLAN] = plan
         try:
             # Call the has_stages getter to check that
             # there are no issues with the class we might've gotten
-            # from the cache. If there are errors, just delete all cached flows
+            # from the cache. If there are errors, plan again without the cache
             _ = plan.has_stages
         except Exception:
-            keys = cache.keys(f"{CACHE_PREFIX}*")
-            cache.delete_many(keys)
-            return self._initiate_plan()
+            planner.use_cache = False
+            plan = planner.plan(self.request)
+        self.request.session[SESSION_KEY_PLAN] = plan
         return plan
 
     def restart_flow(self, keep_context=False) -> HttpResponse:
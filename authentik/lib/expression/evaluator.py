@@ -2,15 +2,18 @@
 
 import re
 import socket
+from hashlib import sha256
 from ipaddress import ip_address, ip_network
 from textwrap import indent
+from threading import Lock
 from types import CodeType
 from typing import Any
 
-from cachetools import TLRUCache, cached
+from cachetools import LRUCache, TLRUCache, cached
 from django.core.exceptions import FieldError
 from django.utils.text import slugify
 from guardian.shortcuts import get_anonymous_user
+from prometheus_client import Counter
 from rest_framework.serializers import ValidationError
 from sentry_sdk import start_span
 from sentry_sdk.tracing import Span
@@ -21,7 +24,7 @@ from authentik.events.models import Event
 from authentik.lib.expression.exceptions import ControlFlowException
 from authentik.lib.utils.http import get_http_session
 from authentik.policies.models import Policy, PolicyBinding
-from authentik.policies.process import PolicyProcess
+from authentik.policies.process import profile_policy
 from authentik.policies.types import PolicyRequest, PolicyResult
 from authentik.stages.authenticator import devices_for_user
 
@@ -29,6 +32,16 @@ LOGGER = get_logger()
 
 ARG_SANITIZE = re.compile(r"[:.-]")
 
+COUNTER_EXPRESSION_COMPILE_CACHE = Counter(
+    "authentik_expression_compile_cache",
+    "Lookups in the compiled expression cache",
+    ["result"],
+)
+# Compiled code objects, keyed by expression hash, handler signature and filename. Changed
+# expressions have a different hash, so entries don't have to be invalidated
+_COMPILE_CACHE: LRUCache[tuple[str, str, str], CodeType] = LRUCache(maxsize=1024)
+_COMPILE_CACHE_LOCK = Lock()
+
 
 def sanitize_arg(arg_name: str) -> str:
     return re.sub(ARG_SANITIZE, "_", arg_name)
@@ -179,8 +192,7 @@ class BaseEvaluator:
         if "request" in self._context:
             req = self._context["request"]
         req.context.update(kwargs)
-        proc = PolicyProcess(PolicyBinding(policy=policy), request=req, connection=None)
-        return proc.profiling_wrapper()
+        return profile_policy(PolicyBinding(policy=policy), req)
 
     def wrap_expression(self, expression: str) -> str:
         """Wrap expression in a function, call it, and save the result as `result`"""
@@ -192,9 +204,20 @@ class BaseEvaluator:
         return full_expression
 
     def compile(self, expression: str) -> CodeType:
-        """Parse expression. Raises SyntaxError or ValueError if the syntax is incorrect."""
-        expression = self.wrap_expression(expression)
-        return compile(expression, self._filename, "exec")
+        """Parse expression. Raises SyntaxError or ValueError if the syntax is incorrect.
+        Compiled expressions are cached per process."""
+        handler_signature = ",".join(sanitize_arg(x) for x in self._context.keys())
+        key = (sha256(expression.encode()).hexdigest(), handler_signature, self._filename)
+        with _COMPILE_CACHE_LOCK:
+            code = _COMPILE_CACHE.get(key)
+        if code:
+            COUNTER_EXPRESSION_COMPILE_CACHE.labels(result="hit").inc()
+            return code
+        COUNTER_EXPRESSION_COMPILE_CACHE.labels(result="miss").inc()
+        code = compile(self.wrap_expression(expression), self._filename, "exec")
+        with _COMPILE_CACHE_LOCK:
+            _COMPILE_CACHE[key] = code
+        return code
 
     def evaluate(self, expression_source: str) -> Any:
         """Parse and evaluate expression. If the syntax is incorrect, a SyntaxError is raised.
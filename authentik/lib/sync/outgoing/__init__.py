@@ -2,7 +2,10 @@
 
 PAGE_SIZE = 100
 PAGE_TIMEOUT = 60 * 60 * 0.5  # Half an hour
+RECONCILE_PREFIX = "goauthentik.io/lib/sync/outgoing/reconciled/"
 HTTP_CONFLICT = 409
 HTTP_NO_CONTENT = 204
 HTTP_SERVICE_UNAVAILABLE = 503
 HTTP_TOO_MANY_REQUESTS = 429
+BACKOFF_DEFAULT = 5
+BACKOFF_MAX = 60
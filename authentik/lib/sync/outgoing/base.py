@@ -1,20 +1,28 @@
 """Basic outgoing sync Client"""
 
 from enum import StrEnum
+from hashlib import sha256
+from json import dumps
+from time import sleep, time
 from typing import TYPE_CHECKING
 
 from deepmerge import always_merger
+from django.core.cache import cache
 from django.db import DatabaseError
 from structlog.stdlib import get_logger
 
 from authentik.core.expression.exceptions import (
     PropertyMappingExpressionException,
+    SkipObjectException,
 )
+from authentik.core.models import Group
 from authentik.events.models import Event, EventAction
 from authentik.lib.expression.exceptions import ControlFlowException
 from authentik.lib.sync.mapper import PropertyMappingManager
+from authentik.lib.sync.outgoing import BACKOFF_DEFAULT, BACKOFF_MAX
 from authentik.lib.sync.outgoing.exceptions import NotFoundSyncException, StopSync
 from authentik.lib.utils.errors import exception_to_string
+from authentik.lib.utils.reflection import class_to_path
 
 if TYPE_CHECKING:
     from django.db.models import Model
@@ -39,10 +47,37 @@ class BaseOutgoingSyncClient[
     mapper: PropertyMappingManager
 
     can_discover = False
+    # When enabled, objects whose mapped schema hasn't changed since they've last been
+    # written are skipped
+    delta = False
 
     def __init__(self, provider: TProvider):
         self.logger = get_logger().bind(provider=provider.name)
         self.provider = provider
+        self._schema_hash: str | None = None
+
+    @property
+    def _backoff_key(self) -> str:
+        return (
+            "goauthentik.io/lib/sync/outgoing/backoff/"
+            f"{class_to_path(self.provider.__class__)}/{self.provider.pk}"
+        )
+
+    def backoff(self, retry_after: str | None = None):
+        """Pause requests to the remote system of all workers syncing this provider, after
+        the remote system signalled that it's overloaded (429/503)"""
+        try:
+            seconds = min(int(retry_after), BACKOFF_MAX)
+        except (TypeError, ValueError):
+            seconds = BACKOFF_DEFAULT
+        self.logger.info("Remote system is rate-limiting requests, backing off", seconds=seconds)
+        cache.set(self._backoff_key, time() + seconds, timeout=seconds + 1)
+
+    def wait_for_backoff(self):
+        """Wait for a backoff (see `backoff`) to pass before sending a request"""
+        until = cache.get(self._backoff_key)
+        if until and until > time():
+            sleep(min(until - time(), BACKOFF_MAX))
 
     def create(self, obj: TModel) -> TConnection:
         """Create object in remote destination"""
@@ -58,16 +93,20 @@ class BaseOutgoingSyncClient[
         connection = self.connection_type.objects.filter(
             provider=self.provider, **{self.connection_type_query: obj}
         ).first()
+        self._schema_hash = None
         try:
             if not connection:
                 connection = self.create(obj)
+                self.store_schema_hash(connection)
                 return connection, True
             try:
                 self.update(obj, connection)
+                self.store_schema_hash(connection)
                 return connection, False
             except NotFoundSyncException:
                 connection.delete()
                 connection = self.create(obj)
+                self.store_schema_hash(connection)
                 return connection, True
         except DatabaseError as exc:
             self.logger.warning("Failed to write object", obj=obj, exc=exc)
@@ -75,10 +114,21 @@ class BaseOutgoingSyncClient[
                 connection.delete()
         return None, False
 
+    def write_bulk(self, objs: list[TModel]) -> list[TModel]:
+        """Optional method. Write multiple objects to destination with as few requests as
+        possible, returns the objects which haven't been written and have to be written
+        individually with self.write"""
+        return objs
+
     def delete(self, obj: TModel):
         """Delete object from destination"""
         raise NotImplementedError()
 
+    def delete_remote(self, remote_id: str):
+        """Delete object from destination by its ID in the destination. Used when the object
+        has already been deleted in authentik, and only the ID of its connection is known"""
+        raise NotImplementedError()
+
     def to_schema(self, obj: TModel, connection: TConnection | None, **defaults) -> TSchema:
         """Convert object to destination schema"""
         raw_final_object = {}
@@ -106,8 +156,27 @@ class BaseOutgoingSyncClient[
             raise StopSync(ValueError("No mappings configured"), obj)
         for key, value in defaults.items():
             raw_final_object.setdefault(key, value)
+        hashed = raw_final_object
+        if isinstance(obj, Group):
+            # Members are written separately from the mapped schema, so a group whose members
+            # changed has to be written again too
+            hashed = {
+                "schema": raw_final_object,
+                "members": sorted(str(pk) for pk in obj.users.values_list("pk", flat=True)),
+            }
+        schema_hash = sha256(dumps(hashed, sort_keys=True, default=str).encode()).hexdigest()
+        if self.delta and connection and connection.sync_hash == schema_hash:
+            raise SkipObjectException()
+        self._schema_hash = schema_hash
         return raw_final_object
 
+    def store_schema_hash(self, connection: TConnection | None):
+        """Remember the hash of the schema last written for `connection`, see `delta`"""
+        if not connection or not self._schema_hash:
+            return
+        connection.sync_hash = self._schema_hash
+        self.connection_type.objects.filter(pk=connection.pk).update(sync_hash=self._schema_hash)
+
     def discover(self):
         """Optional method. Can be used to implement a "discovery" where
         upon creation of this provider, this function will be called and can
@@ -0,0 +1,60 @@
+"""Journal of objects which have changed since they've last been synced"""
+
+from django.core.cache import cache
+from django_redis import get_redis_connection
+
+from authentik.lib.config import CONFIG
+from authentik.lib.sync.outgoing.models import OutgoingSyncProvider
+from authentik.lib.utils.reflection import class_to_path
+
+JOURNAL_PREFIX = "goauthentik.io/lib/sync/outgoing/journal/"
+
+
+class SyncJournal:
+    """Set of objects (by model and primary key) which have changed and need to be synced
+    to all providers of `provider_type`. Objects which change multiple times before the
+    journal is flushed are only synced once."""
+
+    def __init__(self, provider_type: type[OutgoingSyncProvider]):
+        self.uid = class_to_path(provider_type)
+
+    @property
+    def window(self) -> int:
+        """Seconds for which changes are collected before they are synced"""
+        return CONFIG.get_int("outgoing_sync.debounce", 5)
+
+    @property
+    def batch_size(self) -> int:
+        """Amount of changed objects after which the journal is flushed immediately"""
+        return CONFIG.get_int("outgoing_sync.batch_size", 1000)
+
+    def _key(self, suffix: str) -> str:
+        return cache.make_key(f"{JOURNAL_PREFIX}{self.uid}/{suffix}")
+
+    def add(self, model: str, pk: str | int) -> tuple[bool, bool]:
+        """Record that an object has changed. Returns if a flush should be scheduled
+        after the window, and if the journal should be flushed immediately."""
+        pipeline = get_redis_connection().pipeline()
+        pipeline.sadd(self._key("entries"), f"{model}|{pk}")
+        pipeline.scard(self._key("entries"))
+        # Only the first change after a flush schedules the next flush. The flag expires
+        # on its own in case the scheduled flush was lost
+        pipeline.set(self._key("scheduled"), 1, nx=True, ex=self.window * 2 + 60)
+        _, size, scheduled = pipeline.execute()
+        return bool(scheduled), size >= self.batch_size
+
+    def pop(self) -> list[tuple[str, str]]:
+        """Remove and return a batch of changed objects as (model, primary key). As the
+        flush is running, the next change has to schedule a new one."""
+        redis = get_redis_connection()
+        redis.delete(self._key("scheduled"))
+        entries = redis.spop(self._key("entries"), self.batch_size) or []
+        return [tuple(entry.decode().split("|", 1)) for entry in entries]
+
+    def requeue(self, entries: list[tuple[str, str]]):
+        """Add objects which failed to sync back, to be synced by the next flush"""
+        if not entries:
+            return
+        get_redis_connection().sadd(
+            self._key("entries"), *[f"{model}|{pk}" for model, pk in entries]
+        )
@@ -30,6 +30,10 @@ class OutgoingSyncProvider(Model):
     def get_object_qs[T: User | Group](self, type: type[T]) -> QuerySet[T]:
         raise NotImplementedError
 
+    def get_remote_ids(self, obj: User | Group) -> list[str]:
+        """IDs of `obj` in the remote destination, based on its connection objects"""
+        raise NotImplementedError
+
     @property
     def sync_lock(self) -> pglock.advisory:
         """Postgres lock for syncing SCIM to prevent multiple parallel syncs happening"""
@@ -1,13 +1,16 @@
 from collections.abc import Callable
+from functools import partial
 
+from django.core.cache import cache
 from django.core.paginator import Paginator
+from django.db import transaction
 from django.db.models import Model
 from django.db.models.query import Q
 from django.db.models.signals import m2m_changed, post_save, pre_delete
 
 from authentik.core.models import Group, User
-from authentik.lib.sync.outgoing import PAGE_SIZE, PAGE_TIMEOUT
-from authentik.lib.sync.outgoing.base import Direction
+from authentik.lib.sync.outgoing import PAGE_SIZE, PAGE_TIMEOUT, RECONCILE_PREFIX
+from authentik.lib.sync.outgoing.journal import SyncJournal
 from authentik.lib.sync.outgoing.models import OutgoingSyncProvider
 from authentik.lib.utils.reflection import class_to_path
 
@@ -15,14 +18,18 @@ from authentik.lib.utils.reflection import class_to_path
 def register_signals(
     provider_type: type[OutgoingSyncProvider],
     task_sync_single: Callable[[int], None],
-    task_sync_direct: Callable[[int], None],
+    task_sync_delete: Callable[[int, str, str], None],
     task_sync_m2m: Callable[[int], None],
+    task_sync_journal: Callable[[], None],
 ):
     """Register sync signals"""
     uid = class_to_path(provider_type)
+    journal = SyncJournal(provider_type)
 
     def post_save_provider(sender: type[Model], instance: OutgoingSyncProvider, created: bool, **_):
         """Trigger sync when Provider is saved"""
+        # The provider's configuration might have changed, so write all objects
+        cache.delete(f"{RECONCILE_PREFIX}{uid}/{instance.pk}")
         users_paginator = Paginator(instance.get_object_qs(User), PAGE_SIZE)
         groups_paginator = Paginator(instance.get_object_qs(Group), PAGE_SIZE)
         soft_time_limit = (users_paginator.num_pages + groups_paginator.num_pages) * PAGE_TIMEOUT
@@ -34,25 +41,40 @@ def register_signals(
     post_save.connect(post_save_provider, provider_type, dispatch_uid=uid, weak=False)
 
     def model_post_save(sender: type[Model], instance: User | Group, created: bool, **_):
-        """Post save handler"""
+        """Post save handler, changes are collected in the journal and synced together"""
         if not provider_type.objects.filter(
             Q(backchannel_application__isnull=False) | Q(application__isnull=False)
         ).exists():
             return
-        task_sync_direct.delay(class_to_path(instance.__class__), instance.pk, Direction.add.value)
+        schedule, flush = journal.add(class_to_path(instance.__class__), instance.pk)
+        if flush:
+            task_sync_journal.delay()
+        elif schedule:
+            task_sync_journal.apply_async(countdown=journal.window)
 
     post_save.connect(model_post_save, User, dispatch_uid=uid, weak=False)
     post_save.connect(model_post_save, Group, dispatch_uid=uid, weak=False)
 
     def model_pre_delete(sender: type[Model], instance: User | Group, **_):
-        """Pre-delete handler"""
-        if not provider_type.objects.filter(
+        """Pre-delete handler, captures the remote IDs of the object before its connections are
+        deleted, and deletes them in the background once the delete is committed, without
+        waiting for the remote system"""
+        for provider in provider_type.objects.filter(
             Q(backchannel_application__isnull=False) | Q(application__isnull=False)
-        ).exists():
-            return
-        task_sync_direct.delay(
-            class_to_path(instance.__class__), instance.pk, Direction.remove.value
-        ).get(propagate=False)
+        ):
+            # Only propagate deletes for objects within the provider's restrictions
+            if not provider.get_object_qs(instance.__class__).filter(pk=instance.pk).exists():
+                continue
+            for remote_id in provider.get_remote_ids(instance):
+                # Only delete the remote object once the delete has been committed
+                transaction.on_commit(
+                    partial(
+                        task_sync_delete.delay,
+                        provider.pk,
+                        class_to_path(instance.__class__),
+                        remote_id,
+                    )
+                )
 
     pre_delete.connect(model_pre_delete, User, dispatch_uid=uid, weak=False)
     pre_delete.connect(model_pre_delete, Group, dispatch_uid=uid, weak=False)
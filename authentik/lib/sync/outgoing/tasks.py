@@ -1,9 +1,12 @@
 from collections.abc import Callable
 from dataclasses import asdict
+from time import sleep
 
 from celery.exceptions import Retry
-from celery.result import allow_join_result
+from celery.result import AsyncResult, allow_join_result
+from django.core.cache import cache
 from django.core.paginator import Paginator
+from django.db import DatabaseError
 from django.db.models import Model, QuerySet
 from django.db.models.query import Q
 from django.utils.text import slugify
@@ -16,16 +19,24 @@ from authentik.events.logs import LogEvent
 from authentik.events.models import TaskStatus
 from authentik.events.system_tasks import SystemTask
 from authentik.events.utils import sanitize_item
-from authentik.lib.sync.outgoing import PAGE_SIZE, PAGE_TIMEOUT
+from authentik.lib.config import CONFIG
+from authentik.lib.sync.outgoing import PAGE_SIZE, PAGE_TIMEOUT, RECONCILE_PREFIX
 from authentik.lib.sync.outgoing.base import Direction
 from authentik.lib.sync.outgoing.exceptions import (
     BadRequestSyncException,
+    BaseSyncException,
+    NotFoundSyncException,
     StopSync,
     TransientSyncException,
 )
+from authentik.lib.sync.outgoing.journal import SyncJournal
 from authentik.lib.sync.outgoing.models import OutgoingSyncProvider
+from authentik.lib.utils.errors import exception_to_string
 from authentik.lib.utils.reflection import class_to_path, path_to_class
 
+# Seconds between checks whether any page being synced is done
+PAGE_POLL_INTERVAL = 0.5
+
 
 class SyncTasks:
     """Container for all sync 'tasks' (this class doesn't actually contain celery
@@ -71,9 +82,16 @@ class SyncTasks:
         if not provider:
             return
         task.set_uid(slugify(provider.name))
+        # Only objects which changed since they've been last written are synced, unless
+        # the last full sync is older than `outgoing_sync.reconcile_interval_hours`
+        reconcile_key = f"{RECONCILE_PREFIX}{class_to_path(self._provider_model)}/{provider_pk}"
+        delta = cache.get(reconcile_key) is not None
         messages = []
-        messages.append(_("Starting full provider sync"))
-        self.logger.debug("Starting provider sync")
+        if delta:
+            messages.append(_("Starting provider sync of changed objects"))
+        else:
+            messages.append(_("Starting full provider sync"))
+        self.logger.debug("Starting provider sync", delta=delta)
         users_paginator = Paginator(provider.get_object_qs(User), PAGE_SIZE)
         groups_paginator = Paginator(provider.get_object_qs(Group), PAGE_SIZE)
         with allow_join_result(), provider.sync_lock as lock_acquired:
@@ -81,31 +99,68 @@ class SyncTasks:
                 self.logger.debug("Failed to acquire sync lock, skipping", provider=provider.name)
                 return
             try:
-                for page in users_paginator.page_range:
-                    messages.append(_("Syncing page %(page)d of users" % {"page": page}))
-                    for msg in sync_objects.apply_async(
-                        args=(class_to_path(User), page, provider_pk),
-                        time_limit=PAGE_TIMEOUT,
-                        soft_time_limit=PAGE_TIMEOUT,
-                    ).get():
-                        messages.append(LogEvent(**msg))
-                for page in groups_paginator.page_range:
-                    messages.append(_("Syncing page %(page)d of groups" % {"page": page}))
-                    for msg in sync_objects.apply_async(
-                        args=(class_to_path(Group), page, provider_pk),
-                        time_limit=PAGE_TIMEOUT,
-                        soft_time_limit=PAGE_TIMEOUT,
-                    ).get():
-                        messages.append(LogEvent(**msg))
+                # Users are synced before groups, so that group memberships can be synced
+                messages.extend(
+                    self._sync_pages(sync_objects, User, users_paginator, provider_pk, delta)
+                )
+                messages.extend(
+                    self._sync_pages(sync_objects, Group, groups_paginator, provider_pk, delta)
+                )
             except TransientSyncException as exc:
                 self.logger.warning("transient sync exception", exc=exc)
                 raise task.retry(exc=exc) from exc
             except StopSync as exc:
                 task.set_error(exc)
                 return
+        if not delta:
+            cache.set(
+                reconcile_key,
+                True,
+                timeout=CONFIG.get_int("outgoing_sync.reconcile_interval_hours", 24) * 60 * 60,
+            )
         task.set_status(TaskStatus.SUCCESSFUL, *messages)
 
-    def sync_objects(self, object_type: str, page: int, provider_pk: int, **filter):
+    def _sync_pages(
+        self,
+        sync_objects: Callable[[int, int], list[str]],
+        object_type: type[User | Group],
+        paginator: Paginator,
+        provider_pk: int,
+        delta: bool,
+    ) -> list[str | LogEvent]:
+        """Sync all pages of `paginator`, with up to `outgoing_sync.page_concurrency` pages
+        being synced at once. The next page is started as soon as any page is done"""
+        concurrency = max(CONFIG.get_int("outgoing_sync.page_concurrency", 1), 1)
+        pages = list(reversed(paginator.page_range))
+        pending: dict[int, AsyncResult] = {}
+        results: dict[int, list[dict]] = {}
+        while pages or pending:
+            while pages and len(pending) < concurrency:
+                page = pages.pop()
+                pending[page] = sync_objects.apply_async(
+                    args=(class_to_path(object_type), page, provider_pk),
+                    kwargs={"delta": delta},
+                    time_limit=PAGE_TIMEOUT,
+                    soft_time_limit=PAGE_TIMEOUT,
+                )
+            done = [page for page, result in pending.items() if result.ready()]
+            if not done:
+                sleep(PAGE_POLL_INTERVAL)
+            for page in done:
+                results[page] = pending.pop(page).get()
+        messages = []
+        for page in paginator.page_range:
+            if object_type == User:
+                messages.append(_("Syncing page %(page)d of users" % {"page": page}))
+            else:
+                messages.append(_("Syncing page %(page)d of groups" % {"page": page}))
+            for msg in results[page]:
+                messages.append(LogEvent(**msg))
+        return messages
+
+    def sync_objects(
+        self, object_type: str, page: int, provider_pk: int, delta: bool = False, **filter
+    ):
         _object_type = path_to_class(object_type)
         self.logger = get_logger().bind(
             provider_type=class_to_path(self._provider_model),
@@ -120,12 +175,19 @@ class SyncTasks:
             client = provider.client_for_model(_object_type)
         except TransientSyncException:
             return messages
+        client.delta = delta
         paginator = Paginator(provider.get_object_qs(_object_type).filter(**filter), PAGE_SIZE)
         if client.can_discover:
             self.logger.debug("starting discover")
             client.discover()
         self.logger.debug("starting sync for page", page=page)
-        for obj in paginator.page(page).object_list:
+        # Objects which couldn't be written in bulk are written (and errors reported) one by one
+        objs = list(paginator.page(page).object_list)
+        try:
+            objs = client.write_bulk(objs)
+        except TransientSyncException as exc:
+            self.logger.warning("failed to write objects in bulk", exc=exc)
+        for obj in objs:
             obj: Model
             try:
                 client.write(obj)
@@ -234,6 +296,96 @@ class SyncTasks:
             except StopSync as exc:
                 self.logger.warning(exc, provider_pk=provider.pk)
 
+    def sync_signal_delete(self, provider_pk: int, model: str, remote_id: str):
+        """Delete an object, which has already been deleted in authentik, by its ID in the
+        remote destination. Transient errors are raised so the task is retried"""
+        self.logger = get_logger().bind(
+            provider_type=class_to_path(self._provider_model),
+            provider_pk=provider_pk,
+        )
+        provider = self._provider_model.objects.filter(pk=provider_pk).first()
+        if not provider:
+            return
+        client = provider.client_for_model(path_to_class(model))
+        try:
+            client.delete_remote(remote_id)
+        except NotFoundSyncException:
+            self.logger.debug("Object already deleted", model=model, remote_id=remote_id)
+        except StopSync as exc:
+            self.logger.warning(exc, model=model, remote_id=remote_id)
+
+    def sync_signal_journal(self, journal: SyncJournal):
+        """Sync all objects recorded in `journal` to all providers, each object once. Objects
+        which couldn't be synced due to a transient error are added back to the journal."""
+        self.logger = get_logger().bind(
+            provider_type=class_to_path(self._provider_model),
+        )
+        providers = None
+        failed = []
+        try:
+            while entries := journal.pop():
+                if providers is None:
+                    providers = list(
+                        self._provider_model.objects.filter(
+                            Q(backchannel_application__isnull=False) | Q(application__isnull=False)
+                        )
+                    )
+                changed: dict[str, set[str]] = {}
+                for model, pk in entries:
+                    changed.setdefault(model, set()).add(pk)
+                for model, pks in changed.items():
+                    model_class: type[Model] = path_to_class(model)
+                    for provider in providers:
+                        try:
+                            failed.extend(self._sync_journal_provider(provider, model_class, pks))
+                        except (TransientSyncException, DatabaseError) as exc:
+                            self.logger.warning(
+                                "failed to sync objects", exc=exc, provider_pk=provider.pk
+                            )
+                            failed.extend((model, pk) for pk in pks)
+                        except Exception as exc:  # pylint:disable=broad-except
+                            self.logger.warning(
+                                "failed to sync objects",
+                                exc=exception_to_string(exc),
+                                provider_pk=provider.pk,
+                            )
+        finally:
+            journal.requeue(list(set(failed)))
+
+    def _sync_journal_provider(
+        self, provider: OutgoingSyncProvider, model_class: type[Model], pks: set[str]
+    ) -> list[tuple[str, str]]:
+        """Write all objects of `model_class` in `pks` which are allowed by `provider`,
+        returns objects which failed with a transient error"""
+        failed = []
+        # Check if the objects are allowed within the provider's restrictions
+        queryset = provider.get_object_qs(model_class)
+        if not queryset:
+            return failed
+        client = provider.client_for_model(model_class)
+        instances = list(queryset.filter(pk__in=pks))
+        try:
+            instances = client.write_bulk(instances)
+        except TransientSyncException as exc:
+            self.logger.info(exc, provider_pk=provider.pk)
+            return [(class_to_path(model_class), str(instance.pk)) for instance in instances]
+        for instance in instances:
+            try:
+                client.write(instance)
+            except TransientSyncException as exc:
+                self.logger.info(exc, provider_pk=provider.pk, instance=instance)
+                failed.append((class_to_path(model_class), str(instance.pk)))
+            except SkipObjectException:
+                continue
+            except StopSync as exc:
+                self.logger.warning(exc, provider_pk=provider.pk)
+                break
+            except BaseSyncException as exc:
+                self.logger.warning(
+                    "failed to sync object", exc=exc, provider_pk=provider.pk, obj=instance
+                )
+        return failed
+
     def sync_signal_m2m(self, group_pk: str, action: str, pk_set: list[int]):
         self.logger = get_logger().bind(
             provider_type=class_to_path(self._provider_model),
@@ -41,3 +41,19 @@ class TestEvaluator(TestCase):
         event = Event.objects.filter(action="custom_foo").first()
         self.assertIsNotNone(event)
         self.assertEqual(event.context, {"bar": "baz", "foo": "bar"})
+
+    def test_compile_cache(self):
+        """Test compiled expressions are cached per expression, context and filename"""
+        filename = generate_id()
+        evaluator = BaseEvaluator(filename)
+        evaluator._context = {"foo": "bar"}
+        code = evaluator.compile("return foo")
+        other = BaseEvaluator(filename)
+        other._context = {"foo": "baz"}
+        self.assertIs(other.compile("return foo"), code)
+        # Changed expressions are compiled again
+        self.assertIsNot(other.compile("return not foo"), code)
+        # Different context keys result in a different handler signature
+        other._context = {"foo": "bar", "bar": "baz"}
+        self.assertIsNot(other.compile("return foo"), code)
+        self.assertEqual(other.evaluate("return foo"), "bar")
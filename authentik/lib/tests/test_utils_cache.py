@@ -0,0 +1,66 @@
+"""Test cache utils"""
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from authentik.lib.config import CONFIG
+from authentik.lib.generators import generate_id
+from authentik.lib.utils.cache import (
+    GENERATION_PREFIX,
+    TieredCache,
+    bump_generation,
+    get_generation,
+)
+
+
+class TestCacheUtils(TestCase):
+    """Test cache utils"""
+
+    def test_generation_initial(self):
+        """Test generation is initialized when not set"""
+        namespace = generate_id()
+        generation = get_generation(namespace)
+        self.assertIsNotNone(cache.get(f"{GENERATION_PREFIX}{namespace}"))
+        self.assertEqual(get_generation(namespace), generation)
+
+    def test_generation_bump(self):
+        """Test bumping a generation only changes the generation of that namespace"""
+        namespace, other = generate_id(), generate_id()
+        before = get_generation(namespace, other)
+        bump_generation(namespace)
+        after = get_generation(namespace, other)
+        self.assertNotEqual(before, after)
+        self.assertEqual(before.split(".")[1], after.split(".")[1])
+
+    def test_generation_bump_missing(self):
+        """Test bumping a generation which isn't set yet"""
+        namespace = generate_id()
+        bump_generation(namespace)
+        self.assertIsNotNone(cache.get(f"{GENERATION_PREFIX}{namespace}"))
+
+    def test_tiered(self):
+        """Test tiered cache serving values from the local tier"""
+        tiered = TieredCache(generate_id())
+        key, other = generate_id(), generate_id()
+        with CONFIG.patch("cache.local_timeout", 30):
+            tiered.set(key, {"foo": "bar"})
+            cache.delete(key)
+            value = tiered.get(key)
+            self.assertEqual(value, {"foo": "bar"})
+            # Values are copies which can be modified
+            value["foo"] = "baz"
+            self.assertEqual(tiered.get(key), {"foo": "bar"})
+            # Values from the remote tier are kept locally
+            cache.set(other, "bar")
+            self.assertEqual(tiered.get_many([other]), {other: "bar"})
+            cache.delete(other)
+            self.assertEqual(tiered.get(other), "bar")
+
+    def test_tiered_disabled(self):
+        """Test tiered cache without a local tier"""
+        tiered = TieredCache(generate_id())
+        key = generate_id()
+        with CONFIG.patch("cache.local_timeout", 0):
+            tiered.set(key, "foo")
+            cache.delete(key)
+            self.assertIsNone(tiered.get(key))
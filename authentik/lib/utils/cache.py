@@ -0,0 +1,177 @@
+"""Generation-based cache invalidation and in-process caching"""
+
+from os import register_at_fork
+from pickle import dumps, loads  # nosec
+from threading import Lock
+from time import time_ns
+from typing import Any
+
+from cachetools import TTLCache
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from prometheus_client import Counter
+
+from authentik.lib.config import CONFIG
+
+GENERATION_PREFIX = "goauthentik.io/generation/"
+
+COUNTER_TIERED_CACHE = Counter(
+    "authentik_tiered_cache",
+    "Lookups in the in-process (local) and shared (remote) cache tiers",
+    ["namespace", "tier", "result"],
+)
+
+_LOCAL_CACHES: list["LocalCache"] = []
+
+
+class LocalCache:
+    """Size-bounded in-process cache with a TTL, configured by `cache.local_size` and
+    `cache.local_timeout` (or the setting given by `timeout_config`). Keys are the full keys
+    of the django cache, which include the tenant."""
+
+    def __init__(self, timeout_config: str = "cache.local_timeout"):
+        self.timeout_config = timeout_config
+        self._lock = Lock()
+        self._cache: TTLCache | None = None
+        _LOCAL_CACHES.append(self)
+
+    @property
+    def timeout(self) -> int:
+        """TTL of local entries, 0 when the local cache is disabled"""
+        return CONFIG.get_int(self.timeout_config, 0)
+
+    def _get_cache(self) -> TTLCache:
+        if self._cache is None:
+            self._cache = TTLCache(
+                maxsize=CONFIG.get_int("cache.local_size", 1024),
+                ttl=self.timeout,
+            )
+        return self._cache
+
+    def get(self, key: str) -> Any | None:
+        """Get a value, None if it's not set or has expired"""
+        with self._lock:
+            return self._get_cache().get(key, None)
+
+    def set(self, key: str, value: Any):
+        """Set a value"""
+        with self._lock:
+            self._get_cache()[key] = value
+
+    def delete(self, key: str):
+        """Delete a value"""
+        with self._lock:
+            self._get_cache().pop(key, None)
+
+    def clear(self):
+        """Delete all values"""
+        with self._lock:
+            self._cache = None
+
+
+def _reset_local_caches():
+    """Don't share local caches (and their locks) with forked processes"""
+    for local in _LOCAL_CACHES:
+        local._lock = Lock()
+        local._cache = None
+
+
+register_at_fork(after_in_child=_reset_local_caches)
+
+_GENERATIONS = LocalCache()
+
+
+def _generation_key(namespace: str) -> str:
+    return f"{GENERATION_PREFIX}{namespace}"
+
+
+def get_generation(*namespaces: str) -> str:
+    """Get the current generation of `namespaces`, which is included in the cache keys
+    of these namespaces. Bumping the generation of a namespace invalidates all its keys,
+    as they are not looked up anymore and expire on their own.
+
+    Generations are kept in-process for `cache.local_timeout` seconds, which bounds how
+    long other processes might use the previous generation after a bump."""
+    keys = [_generation_key(namespace) for namespace in namespaces]
+    generations = {}
+    if _GENERATIONS.timeout > 0:
+        for key in keys:
+            local = _GENERATIONS.get(cache.make_key(key))
+            if local is not None:
+                generations[key] = local
+    missing = [key for key in keys if key not in generations]
+    if missing:
+        generations.update(cache.get_many(missing))
+    for key in missing:
+        if key not in generations:
+            # Start at the current time, so a generation is never re-used
+            # after its counter has been evicted from the cache
+            cache.add(key, time_ns(), timeout=None)
+            generations[key] = cache.get(key, 0)
+        if _GENERATIONS.timeout > 0:
+            _GENERATIONS.set(cache.make_key(key), generations[key])
+    return ".".join(str(generations[key]) for key in keys)
+
+
+def bump_generation(*namespaces: str):
+    """Invalidate all cache keys of `namespaces`"""
+    for namespace in namespaces:
+        key = _generation_key(namespace)
+        _GENERATIONS.delete(cache.make_key(key))
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time_ns(), timeout=None)
+
+
+class TieredCache:
+    """Read-through cache for a `namespace`, which keeps entries in-process (see `LocalCache`)
+    in front of the django cache. Entries must not need explicit invalidation, which is the
+    case when their keys include a generation (see `get_generation`).
+    Values are kept pickled in-process, so callers always get their own copy to modify."""
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self.local = LocalCache()
+
+    def _observe(self, tier: str, hit: bool):
+        COUNTER_TIERED_CACHE.labels(
+            namespace=self.namespace,
+            tier=tier,
+            result="hit" if hit else "miss",
+        ).inc()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get a single value"""
+        return self.get_many([key]).get(key, default)
+
+    def get_many(self, keys: list[str]) -> dict[str, Any]:
+        """Get multiple values, looking up all keys missing locally with a single request"""
+        values = {}
+        missing = keys
+        if self.local.timeout > 0:
+            missing = []
+            for key in keys:
+                local = self.local.get(cache.make_key(key))
+                self._observe("local", local is not None)
+                if local is None:
+                    missing.append(key)
+                    continue
+                values[key] = loads(local)  # nosec
+        if not missing:
+            return values
+        remote = cache.get_many(missing)
+        for key in missing:
+            self._observe("remote", key in remote)
+            if key not in remote:
+                continue
+            values[key] = remote[key]
+            if self.local.timeout > 0:
+                self.local.set(cache.make_key(key), dumps(remote[key]))
+        return values
+
+    def set(self, key: str, value: Any, timeout: int | None = DEFAULT_TIMEOUT):
+        """Set a value in both tiers"""
+        cache.set(key, value, timeout)
+        if self.local.timeout > 0:
+            self.local.set(cache.make_key(key), dumps(value))
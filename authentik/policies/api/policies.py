@@ -12,7 +12,7 @@ from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 from structlog.stdlib import get_logger
 
-from authentik.core.api.applications import user_app_cache_key
+from authentik.core.api.applications import USER_APP_CACHE_GENERATION
 from authentik.core.api.object_types import TypesMixin
 from authentik.core.api.used_by import UsedByMixin
 from authentik.core.api.utils import (
@@ -21,10 +21,11 @@ from authentik.core.api.utils import (
     ModelSerializer,
 )
 from authentik.events.logs import LogEventSerializer, capture_logs
+from authentik.lib.utils.cache import bump_generation
 from authentik.policies.api.exec import PolicyTestResultSerializer, PolicyTestSerializer
 from authentik.policies.models import Policy, PolicyBinding
 from authentik.policies.process import PolicyProcess
-from authentik.policies.types import CACHE_PREFIX, PolicyRequest
+from authentik.policies.types import CACHE_GENERATION, CACHE_PREFIX, PolicyRequest
 from authentik.rbac.decorators import permission_required
 
 LOGGER = get_logger()
@@ -114,10 +115,10 @@ class PolicyViewSet(
         """Clear policy cache"""
         keys = cache.keys(f"{CACHE_PREFIX}*")
         cache.delete_many(keys)
+        bump_generation(CACHE_GENERATION)
         LOGGER.debug("Cleared Policy cache", keys=len(keys))
         # Also delete user application cache
-        keys = cache.keys(user_app_cache_key("*"))
-        cache.delete_many(keys)
+        bump_generation(USER_APP_CACHE_GENERATION)
         return Response(status=204)
 
     @permission_required("authentik_policies.view_policy")
@@ -14,6 +14,11 @@ HIST_POLICIES_ENGINE_TOTAL_TIME = Histogram(
     "(Total) Duration the policy engine took to evaluate a result.",
     ["obj_type", "obj_pk"],
 )
+HIST_POLICIES_CACHE_FETCH_TIME = Histogram(
+    "authentik_policies_cache_fetch_time_seconds",
+    "Duration of fetching the cached results of all policies bound to an object.",
+    ["obj_type", "obj_pk"],
+)
 HIST_POLICIES_EXECUTION_TIME = Histogram(
     "authentik_policies_execution_time",
     "Execution times for single policies",
@@ -1,38 +1,83 @@
 """authentik policy engine"""
 
-from collections.abc import Iterator
+from collections.abc import Iterable, Iterator
 from multiprocessing import Pipe, current_process
 from multiprocessing.connection import Connection
+from threading import Lock
 from time import perf_counter
+from uuid import UUID
 
-from django.core.cache import cache
+from cachetools import LRUCache
 from django.http import HttpRequest
 from sentry_sdk import start_span
 from sentry_sdk.tracing import Span
 from structlog.stdlib import BoundLogger, get_logger
 
 from authentik.core.models import User
+from authentik.lib.config import CONFIG
+from authentik.lib.utils.cache import get_generation
 from authentik.lib.utils.reflection import class_to_path
-from authentik.policies.apps import HIST_POLICIES_ENGINE_TOTAL_TIME, HIST_POLICIES_EXECUTION_TIME
+from authentik.policies.apps import (
+    HIST_POLICIES_CACHE_FETCH_TIME,
+    HIST_POLICIES_ENGINE_TOTAL_TIME,
+)
 from authentik.policies.exceptions import PolicyEngineException
 from authentik.policies.models import Policy, PolicyBinding, PolicyBindingModel, PolicyEngineMode
-from authentik.policies.process import PolicyProcess, cache_key
-from authentik.policies.types import PolicyRequest, PolicyResult
+from authentik.policies.pool import PolicyPoolTask, get_pool
+from authentik.policies.process import POLICY_CACHE, PolicyProcess, cache_key
+from authentik.policies.thread import PolicyThreadTask, dispatch_thread, should_run_in_thread
+from authentik.policies.types import CACHE_GENERATION, PolicyRequest, PolicyResult
 
 CURRENT_PROCESS = current_process()
+SHORT_CIRCUIT_ORDER_COST = "cost"
+
+
+class BindingCosts:
+    """Running average of the execution time of bindings in this process, to evaluate the
+    cheapest bindings first. Only the last `window` executions are weighted significantly, so
+    the average follows bindings which become slower or faster."""
+
+    def __init__(self, maxsize: int = 4096, window: int = 100):
+        self.window = window
+        self._costs: LRUCache[UUID, tuple[float, int]] = LRUCache(maxsize=maxsize)
+        self._lock = Lock()
+
+    def get(self, binding: PolicyBinding) -> float:
+        """Average execution time of `binding` in seconds, 0 without any history"""
+        with self._lock:
+            average, _ = self._costs.get(binding.pk, (0.0, 0))
+        return average
+
+    def record(self, binding: PolicyBinding, duration: float):
+        """Add an execution of `binding` which took `duration` seconds"""
+        with self._lock:
+            average, count = self._costs.get(binding.pk, (0.0, 0))
+            count = min(count + 1, self.window)
+            self._costs[binding.pk] = (average + (duration - average) / count, count)
+
+
+BINDING_COSTS = BindingCosts()
 
 
 class PolicyProcessInfo:
     """Dataclass to hold all information and communication channels to a process"""
 
-    process: PolicyProcess
-    connection: Connection
+    process: PolicyProcess | None
+    connection: Connection | None
+    task: PolicyPoolTask | PolicyThreadTask | None
     result: PolicyResult | None
     binding: PolicyBinding
 
-    def __init__(self, process: PolicyProcess, connection: Connection, binding: PolicyBinding):
+    def __init__(
+        self,
+        binding: PolicyBinding,
+        process: PolicyProcess | None = None,
+        connection: Connection | None = None,
+        task: PolicyPoolTask | PolicyThreadTask | None = None,
+    ):
         self.process = process
         self.connection = connection
+        self.task = task
         self.binding = binding
         self.result = None
 
@@ -41,6 +86,10 @@ class PolicyEngine:
     """Orchestrate policy checking, launch tasks and return result"""
 
     use_cache: bool
+    # Stop evaluating bindings once the result is known
+    short_circuit: bool
+    # Either `order` (binding order) or `cost` (cheapest first, based on execution history)
+    short_circuit_order: str
     request: PolicyRequest
 
     logger: BoundLogger
@@ -65,11 +114,38 @@ class PolicyEngine:
             self.request.set_http_request(request)
         self.__cached_policies: list[PolicyResult] = []
         self.__processes: list[PolicyProcessInfo] = []
+        # Set by `prefetch()`, bindings and their cached results (by cache key)
+        self.__bindings: list[PolicyBinding] | None = None
+        self.__cached_results: dict[str, PolicyResult] | None = None
+        self.__prefetched_results = False
+        self.__cache_generation: str | None = None
         self.use_cache = True
+        self.short_circuit = CONFIG.get_bool("policies.short_circuit", False)
+        self.short_circuit_order = CONFIG.get("policies.short_circuit_order", "order")
         self.__expected_result_count = 0
 
+    @property
+    def pbm(self) -> PolicyBindingModel:
+        """Object whose bindings are evaluated"""
+        return self.__pbm
+
+    def prefetch(
+        self,
+        bindings: list[PolicyBinding],
+        cached_results: dict[str, PolicyResult] | None = None,
+        cache_generation: str | None = None,
+    ):
+        """Use `bindings` and their `cached_results` (keyed by cache key) which have been
+        fetched in advance instead of querying them when building"""
+        self.__bindings = bindings
+        self.__cached_results = cached_results
+        self.__prefetched_results = cached_results is not None
+        self.__cache_generation = cache_generation
+
     def iterate_bindings(self) -> Iterator[PolicyBinding]:
         """Make sure all Policies are their respective classes"""
+        if self.__bindings is not None:
+            return iter(self.__bindings)
         return (
             PolicyBinding.objects.filter(target=self.__pbm, enabled=True)
             .order_by("order")
@@ -84,10 +160,10 @@ class PolicyEngine:
     def _check_cache(self, binding: PolicyBinding):
         if not self.use_cache:
             return False
-        before = perf_counter()
-        key = cache_key(binding, self.request)
-        cached_policy = cache.get(key, None)
-        duration = max(perf_counter() - before, 0)
+        if self.__cache_generation is None:
+            self.__cache_generation = get_generation(CACHE_GENERATION)
+        key = cache_key(binding, self.request, self.__cache_generation)
+        cached_policy = (self.__cached_results or {}).get(key, None)
         if not cached_policy:
             return False
         self.logger.debug(
@@ -96,18 +172,82 @@ class PolicyEngine:
             cache_key=key,
             request=self.request,
         )
-        HIST_POLICIES_EXECUTION_TIME.labels(
-            binding_order=binding.order,
-            binding_target_type=binding.target_type,
-            binding_target_name=binding.target_name,
-            object_pk=str(self.request.obj.pk),
-            object_type=class_to_path(self.request.obj.__class__),
-            mode="cache_retrieve",
-        ).observe(duration)
-        # It's a bit silly to time this, but
         self.__cached_policies.append(cached_policy)
         return True
 
+    def _fetch_cached_results(self, bindings: list[PolicyBinding]):
+        """Fetch the cached results of all `bindings` with a single cache lookup,
+        unless they have already been fetched by `prefetch()`"""
+        if not self.use_cache or self.__prefetched_results or not bindings:
+            return
+        if self.__cache_generation is None:
+            self.__cache_generation = get_generation(CACHE_GENERATION)
+        keys = [cache_key(binding, self.request, self.__cache_generation) for binding in bindings]
+        with HIST_POLICIES_CACHE_FETCH_TIME.labels(
+            obj_type=class_to_path(self.__pbm.__class__),
+            obj_pk=str(self.__pbm.pk),
+        ).time():
+            self.__cached_results = POLICY_CACHE.get_many(keys)
+
+    def _binding_cost(self, binding: PolicyBinding) -> float:
+        """Average execution time of `binding` in this process, 0 for bindings without any
+        history"""
+        return BINDING_COSTS.get(binding)
+
+    def _ordered_bindings(self) -> Iterator[PolicyBinding]:
+        """Bindings in the order they should be evaluated in"""
+        if not self.short_circuit or self.short_circuit_order != SHORT_CIRCUIT_ORDER_COST:
+            return self.iterate_bindings()
+        bindings = list(self.iterate_bindings())
+        for binding in bindings:
+            self._check_policy_type(binding)
+        # sorted() is stable, so bindings with the same cost stay in their configured order
+        return iter(sorted(bindings, key=self._binding_cost))
+
+    def _is_decisive(self, result: PolicyResult) -> bool:
+        """Check if `result` decides the outcome, so that remaining bindings can be skipped"""
+        if not self.short_circuit:
+            return False
+        if self.mode == PolicyEngineMode.MODE_ALL:
+            return not result.passing
+        if self.mode == PolicyEngineMode.MODE_ANY:
+            return result.passing
+        return False
+
+    def _dispatch(self, binding: PolicyBinding) -> PolicyProcessInfo:
+        """Start evaluating `binding`, either in a thread, the process pool or a new process"""
+        if should_run_in_thread(binding):
+            thread_task = dispatch_thread(binding, self.request)
+            if thread_task:
+                return PolicyProcessInfo(binding=binding, task=thread_task)
+        pool = get_pool()
+        if pool:
+            pool_task = pool.dispatch(binding, self.request)
+            if pool_task:
+                return PolicyProcessInfo(binding=binding, task=pool_task)
+        our_end, task_end = Pipe(False)
+        task = PolicyProcess(binding, self.request, task_end)
+        task.daemon = False
+        self.logger.debug("P_ENG: Starting Process", binding=binding, request=self.request)
+        if not CURRENT_PROCESS._config.get("daemon"):
+            task.run()
+        else:
+            task.start()
+        return PolicyProcessInfo(process=task, connection=our_end, binding=binding)
+
+    def _collect(self, proc_info: PolicyProcessInfo):
+        """Wait for the result of a dispatched binding"""
+        if proc_info.result:
+            return
+        if proc_info.task:
+            proc_info.result = proc_info.task.result()
+            return
+        if proc_info.process.is_alive():
+            proc_info.process.join(proc_info.binding.timeout)
+        # Only call .recv() if no result is saved, otherwise we just deadlock here
+        if not proc_info.result:
+            proc_info.result = proc_info.connection.recv()
+
     def build(self) -> "PolicyEngine":
         """Build wrapper which monitors performance"""
         with (
@@ -123,31 +263,29 @@ class PolicyEngine:
             span: Span
             span.set_data("pbm", self.__pbm)
             span.set_data("request", self.request)
-            for binding in self.iterate_bindings():
+            bindings = list(self._ordered_bindings())
+            self._fetch_cached_results(bindings)
+            for binding in bindings:
                 self.__expected_result_count += 1
 
                 self._check_policy_type(binding)
                 if self._check_cache(binding):
+                    if self._is_decisive(self.__cached_policies[-1]):
+                        break
                     continue
                 self.logger.debug("P_ENG: Evaluating policy", binding=binding, request=self.request)
-                our_end, task_end = Pipe(False)
-                task = PolicyProcess(binding, self.request, task_end)
-                task.daemon = False
-                self.logger.debug("P_ENG: Starting Process", binding=binding, request=self.request)
-                if not CURRENT_PROCESS._config.get("daemon"):
-                    task.run()
-                else:
-                    task.start()
-                self.__processes.append(
-                    PolicyProcessInfo(process=task, connection=our_end, binding=binding)
-                )
+                started = perf_counter()
+                proc_info = self._dispatch(binding)
+                self.__processes.append(proc_info)
+                # When short-circuiting, wait for each result before starting the next binding
+                if self.short_circuit:
+                    self._collect(proc_info)
+                    BINDING_COSTS.record(binding, perf_counter() - started)
+                    if self._is_decisive(proc_info.result):
+                        break
             # If all policies are cached, we have an empty list here.
             for proc_info in self.__processes:
-                if proc_info.process.is_alive():
-                    proc_info.process.join(proc_info.binding.timeout)
-                # Only call .recv() if no result is saved, otherwise we just deadlock here
-                if not proc_info.result:
-                    proc_info.result = proc_info.connection.recv()
+                self._collect(proc_info)
             return self
 
     @property
@@ -174,3 +312,25 @@ class PolicyEngine:
     def passing(self) -> bool:
         """Only get true/false if user passes"""
         return self.result.passing
+
+
+def prefetch_engines(engines: Iterable[PolicyEngine]):
+    """Fetch the bindings of all `engines` with a single query and their cached
+    results with a single cache lookup, instead of one query and one lookup per binding"""
+    engines = list(engines)
+    if not engines:
+        return
+    bindings: dict[UUID, list[PolicyBinding]] = {engine.pbm.pbm_uuid: [] for engine in engines}
+    queryset = PolicyBinding.objects.filter(target__in=bindings.keys(), enabled=True)
+    for binding in queryset.order_by("order"):
+        bindings[binding.target_id].append(binding)
+    generation = get_generation(CACHE_GENERATION)
+    keys = [
+        cache_key(binding, engine.request, generation)
+        for engine in engines
+        if engine.use_cache
+        for binding in bindings[engine.pbm.pbm_uuid]
+    ]
+    cached_results = POLICY_CACHE.get_many(keys) if keys else {}
+    for engine in engines:
+        engine.prefetch(bindings[engine.pbm.pbm_uuid], cached_results, generation)
@@ -0,0 +1,312 @@
+"""authentik policy benchmark command"""
+
+from contextlib import ExitStack, contextmanager
+from itertools import product
+from json import dumps
+from multiprocessing import Manager, cpu_count, get_context
+from random import Random
+from statistics import mean, quantiles
+from sys import stdout
+from time import perf_counter
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django import db
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from structlog.stdlib import get_logger
+
+from authentik import __version__
+from authentik.core.models import Group, User
+from authentik.events.models import Event, EventAction
+from authentik.lib.config import CONFIG
+from authentik.policies.engine import PolicyEngine
+from authentik.policies.event_matcher.models import EventMatcherPolicy
+from authentik.policies.expression.models import ExpressionPolicy
+from authentik.policies.models import Policy, PolicyBinding, PolicyBindingModel
+from authentik.policies.pool import start_pool, stop_pool
+from authentik.policies.reputation.models import Reputation, ReputationPolicy
+from authentik.policies.thread import binding_thread_type
+
+LOGGER = get_logger()
+FORK_CTX = get_context("fork")
+
+FIXTURE_PREFIX = "benchmark-policies-"
+FIXTURE_IP = "192.0.2.1"
+
+CACHE_MODES = ("cached", "uncached")
+EXECUTION_MODES = ("inline", "fork", "pool", "thread")
+CONCURRENCY_MODES = ("sequential", "parallel")
+
+
+class PolicyFixtures:
+    """Synthetic PolicyBindingModel with a configurable amount of policies of each type.
+    Fixtures are generated from `seed`, so runs with the same arguments are comparable."""
+
+    def __init__(self, seed: int, expression: int, group: int, reputation: int, event: int):
+        self.rand = Random(seed)  # nosec
+        self.counts = {
+            "expression": expression,
+            "group": group,
+            "reputation": reputation,
+            "event_matcher": event,
+        }
+        self.pbm: PolicyBindingModel | None = None
+        self.user: User | None = None
+
+    @property
+    def bindings(self) -> list[PolicyBinding]:
+        """All bindings of the fixtures"""
+        return list(PolicyBinding.objects.filter(target=self.pbm))
+
+    def _name(self, kind: str, index: int) -> str:
+        return f"{FIXTURE_PREFIX}{kind}-{index}"
+
+    def create(self):
+        """Create all fixtures, removing leftovers of previous runs first"""
+        self.delete()
+        self.user = User.objects.create(username=f"{FIXTURE_PREFIX}user")
+        self.pbm = PolicyBindingModel.objects.create()
+        policies: list[Policy] = []
+        for idx in range(self.counts["expression"]):
+            length = self.rand.randint(1, 32)
+            policies.append(
+                ExpressionPolicy.objects.create(
+                    name=self._name("expression", idx),
+                    expression=f"return len(request.user.username) > {length}",
+                )
+            )
+        if self.counts["reputation"] > 0:
+            # Reputation is unique per identifier and IP, and shared by all reputation policies
+            Reputation.objects.create(
+                identifier=self.user.username,
+                ip=FIXTURE_IP,
+                score=self.rand.randint(-10, 10),
+            )
+        for idx in range(self.counts["reputation"]):
+            policies.append(
+                ReputationPolicy.objects.create(
+                    name=self._name("reputation", idx),
+                    threshold=self.rand.randint(-10, 10),
+                )
+            )
+        for idx in range(self.counts["event_matcher"]):
+            policies.append(
+                EventMatcherPolicy.objects.create(
+                    name=self._name("event-matcher", idx),
+                    action=self.rand.choice(EventAction.values),
+                )
+            )
+        order = 0
+        for policy in policies:
+            PolicyBinding.objects.create(target=self.pbm, policy=policy, order=order)
+            order += 1
+        for idx in range(self.counts["group"]):
+            group = Group.objects.create(name=self._name("group", idx))
+            if self.rand.choice((True, False)):
+                group.users.add(self.user)
+            PolicyBinding.objects.create(target=self.pbm, group=group, order=order)
+            order += 1
+
+    def delete(self):
+        """Remove all fixtures"""
+        if self.pbm:
+            self.pbm.delete()
+        Policy.objects.filter(name__startswith=FIXTURE_PREFIX).delete()
+        Group.objects.filter(name__startswith=FIXTURE_PREFIX).delete()
+        Reputation.objects.filter(identifier__startswith=FIXTURE_PREFIX).delete()
+        User.objects.filter(username__startswith=FIXTURE_PREFIX).delete()
+
+    def engine(self, use_cache: bool) -> PolicyEngine:
+        """Create a policy engine for the fixtures"""
+        request = RequestFactory().get("/", REMOTE_ADDR=FIXTURE_IP)
+        request.user = self.user
+        engine = PolicyEngine(self.pbm, self.user, request)
+        engine.use_cache = use_cache
+        engine.request.context["event"] = Event(
+            action=EventAction.LOGIN,
+            app="authentik.core",
+            client_ip=FIXTURE_IP,
+        )
+        return engine
+
+
+@contextmanager
+def execution_mode(mode: str, fixtures: PolicyFixtures):
+    """Configure how bindings are executed"""
+    with ExitStack() as stack:
+        if mode == "fork":
+            # The engine forks a process for each binding when running in a daemon process,
+            # which is the case in the worker but not for this command
+            stack.enter_context(
+                patch(
+                    "authentik.policies.engine.CURRENT_PROCESS",
+                    SimpleNamespace(_config={"daemon": True}),
+                )
+            )
+        if mode == "pool":
+            start_pool(max(len(fixtures.bindings), 1))
+            stack.callback(stop_pool)
+        if mode == "thread":
+            types = {binding_thread_type(binding) for binding in fixtures.bindings}
+            stack.enter_context(CONFIG.patch("policies.thread_types", list(types)))
+        yield
+
+
+def run_builds(fixtures: PolicyFixtures, cache: str, execution: str, iterations: int):
+    """Build the policy engine `iterations` times and return each build's duration"""
+    use_cache = cache == "cached"
+    durations = []
+    with execution_mode(execution, fixtures):
+        if use_cache:
+            # Warm up the cache, so all measured builds use cached results
+            fixtures.engine(use_cache).build()
+        for _ in range(iterations):
+            engine = fixtures.engine(use_cache)
+            start = perf_counter()
+            engine.build()
+            durations.append(perf_counter() - start)
+    return durations
+
+
+class BenchmarkProcess(FORK_CTX.Process):  # pragma: no cover
+    """Process which builds the policy engine in parallel to other processes"""
+
+    def __init__(self, index, return_dict, fixtures, cache, execution, iterations) -> None:
+        super().__init__()
+        self.index = index
+        self.return_dict = return_dict
+        self.fixtures = fixtures
+        self.cache = cache
+        self.execution = execution
+        self.iterations = iterations
+
+    def run(self):
+        self.return_dict[self.index] = run_builds(
+            self.fixtures, self.cache, self.execution, self.iterations
+        )
+
+
+class Command(BaseCommand):
+    """Benchmark policy evaluation"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--expression", type=int, default=5, help="Count of expression policies."
+        )
+        parser.add_argument("--group", type=int, default=5, help="Count of group bindings.")
+        parser.add_argument(
+            "--reputation", type=int, default=1, help="Count of reputation policies."
+        )
+        parser.add_argument(
+            "--event-matcher", type=int, default=1, help="Count of event matcher policies."
+        )
+        parser.add_argument(
+            "-i",
+            "--iterations",
+            type=int,
+            default=100,
+            help="Builds per process and mode, at least 1.",
+        )
+        parser.add_argument(
+            "-p",
+            "--processes",
+            type=int,
+            default=cpu_count(),
+            help="How many processes should be started for parallel runs.",
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Seed to generate fixtures.")
+        parser.add_argument("--cache", nargs="+", choices=CACHE_MODES, default=CACHE_MODES)
+        parser.add_argument(
+            "--execution", nargs="+", choices=EXECUTION_MODES, default=EXECUTION_MODES
+        )
+        parser.add_argument(
+            "--concurrency", nargs="+", choices=CONCURRENCY_MODES, default=CONCURRENCY_MODES
+        )
+        parser.add_argument("-o", "--output", help="Write JSON results to file instead of stdout.")
+
+    def benchmark_parallel(self, fixtures, cache, execution, iterations, proc_count):
+        """Run builds in `proc_count` processes at once"""
+        manager = Manager()
+        return_dict = manager.dict()
+        jobs = []
+        db.connections.close_all()
+        for idx in range(proc_count):
+            proc = BenchmarkProcess(idx, return_dict, fixtures, cache, execution, iterations)
+            jobs.append(proc)
+            proc.start()
+        for proc in jobs:
+            proc.join()
+        return list(return_dict.values())
+
+    def handle(self, *args, **options):
+        """Start benchmark"""
+        if options["iterations"] < 1:
+            raise CommandError("At least one iteration is required")
+        fixtures = PolicyFixtures(
+            options["seed"],
+            options["expression"],
+            options["group"],
+            options["reputation"],
+            options["event_matcher"],
+        )
+        fixtures.create()
+        results = []
+        try:
+            for cache, execution, concurrency in product(
+                options["cache"], options["execution"], options["concurrency"]
+            ):
+                LOGGER.info(
+                    "Running benchmark", cache=cache, execution=execution, concurrency=concurrency
+                )
+                start = perf_counter()
+                if concurrency == "parallel":
+                    values = self.benchmark_parallel(
+                        fixtures, cache, execution, options["iterations"], options["processes"]
+                    )
+                else:
+                    values = [run_builds(fixtures, cache, execution, options["iterations"])]
+                wall_time = perf_counter() - start
+                results.append(
+                    {
+                        "cache": cache,
+                        "execution": execution,
+                        "concurrency": concurrency,
+                        "processes": len(values),
+                        **self.summarize(values, wall_time),
+                    }
+                )
+        finally:
+            fixtures.delete()
+        output = dumps(
+            {
+                "version": __version__,
+                "seed": options["seed"],
+                "iterations": options["iterations"],
+                "fixtures": fixtures.counts,
+                "results": results,
+            },
+            indent=4,
+        )
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as _file:
+                _file.write(output)
+        else:
+            stdout.write(output + "\n")
+
+    def summarize(self, values: list[list[float]], wall_time: float) -> dict:
+        """Latency (in milliseconds) and throughput (builds per second) of a run"""
+        durations = sorted(value * 1000 for inner in values for value in inner)
+        percentiles = quantiles(durations, n=100) if len(durations) > 1 else durations * 99
+        return {
+            "builds": len(durations),
+            "latency_ms": {
+                "min": durations[0],
+                "max": durations[-1],
+                "avg": mean(durations),
+                "p50": percentiles[49],
+                "p95": percentiles[94],
+                "p99": percentiles[98],
+            },
+            "throughput": len(durations) / wall_time,
+        }
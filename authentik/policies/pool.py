@@ -0,0 +1,257 @@
+"""authentik policy process pool"""
+
+from importlib import import_module
+from multiprocessing.connection import Connection
+from pickle import PicklingError  # nosec
+from queue import Empty, SimpleQueue
+from threading import Lock
+from typing import Any
+
+from django.conf import settings
+from django.db import connection, connections
+from django.http import HttpRequest
+from structlog.stdlib import get_logger
+
+from authentik.lib.config import CONFIG
+from authentik.lib.utils.errors import exception_to_string
+from authentik.policies.models import PolicyBinding
+from authentik.policies.process import FORK_CTX, PolicyProcess
+from authentik.policies.types import PolicyRequest, PolicyResult
+
+LOGGER = get_logger()
+
+# Attributes set on the request by middlewares which are used during policy execution
+DETACHED_REQUEST_ATTRIBUTES = (
+    "brand",
+    "client_ip",
+    "outpost_user",
+    "request_id",
+    "tenant",
+    "user",
+)
+
+
+class DetachedHttpRequest(HttpRequest):
+    """Picklable copy of an HttpRequest, with all data that policies might access.
+    The session is transferred as its key and data and re-created on the receiving end."""
+
+    def __init__(self, request: HttpRequest):
+        super().__init__()
+        self.method = request.method
+        self.path = request.path
+        self.path_info = request.path_info
+        self.META = {
+            key: value
+            for key, value in request.META.items()
+            if isinstance(value, str | int | float | bool)
+        }
+        self.GET = request.GET.copy()
+        # Only copy POST data when it has already been parsed, to not consume the request body
+        if hasattr(request, "_post"):
+            self.POST = request.POST.copy()
+        self.COOKIES = dict(request.COOKIES)
+        for attr in DETACHED_REQUEST_ATTRIBUTES:
+            if hasattr(request, attr):
+                setattr(self, attr, getattr(request, attr))
+        if hasattr(request, "session"):
+            self.session = request.session
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        session = state.pop("session", None)
+        if session is not None:
+            state["_session_state"] = (session.session_key, dict(session.items()))
+        return state
+
+    def __setstate__(self, state: dict[str, Any]):
+        session_state = state.pop("_session_state", None)
+        self.__dict__.update(state)
+        if session_state:
+            session_key, session_data = session_state
+            store = import_module(settings.SESSION_ENGINE).SessionStore(session_key)
+            store._session_cache = session_data
+            self.session = store
+
+
+def detach_request(request: PolicyRequest) -> PolicyRequest:
+    """Create a copy of `request` which can be sent to a pool process"""
+    detached = PolicyRequest(request.user)
+    detached.obj = request.obj
+    detached.context = request.context
+    detached.debug = request.debug
+    if request.http_request:
+        detached.http_request = DetachedHttpRequest(request.http_request)
+    return detached
+
+
+def _slot_main(conn: Connection):  # pragma: no cover
+    """Main loop of a pool process, receives bindings and sends back results"""
+    # Database connections inherited from the parent must not be used (and must not be closed,
+    # as that would terminate the parent's session), so keep a reference and start fresh
+    inherited = []
+    for db_conn in connections.all(initialized_only=True):
+        inherited.append(db_conn.connection)
+        db_conn.connection = None
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+        tenant, binding, request = message
+        connection.set_tenant(tenant)
+        task = PolicyProcess(binding, request, conn)
+        task.run()
+
+
+class PolicyPoolSlot:
+    """A single long-lived policy process and the connection to it"""
+
+    process: Any
+    connection: Connection
+
+    def __init__(self, index: int):
+        self.index = index
+        self.spawn()
+
+    def spawn(self):
+        """Start a new process for this slot"""
+        our_end, task_end = FORK_CTX.Pipe(True)
+        self.connection = our_end
+        self.process = FORK_CTX.Process(
+            target=_slot_main, args=(task_end,), name=f"authentik-policy-{self.index}"
+        )
+        self.process.daemon = True
+        self.process.start()
+        task_end.close()
+
+    def respawn(self):
+        """Kill the current process (for example after a timeout) and start a new one"""
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+        self.spawn()
+
+    def stop(self):
+        """Ask the process to exit and wait for it"""
+        try:
+            self.connection.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(1)
+        if self.process.is_alive():
+            self.process.kill()
+        self.connection.close()
+
+
+class PolicyPoolTask:
+    """A binding which has been dispatched to a pool slot"""
+
+    def __init__(self, pool: "PolicyPool", slot: PolicyPoolSlot, binding: PolicyBinding):
+        self.pool = pool
+        self.slot = slot
+        self.binding = binding
+        self._result: PolicyResult | None = None
+
+    def result(self) -> PolicyResult:
+        """Wait for the result, killing the slot's process if the binding's timeout is exceeded"""
+        if self._result:
+            return self._result
+        try:
+            if not self.slot.connection.poll(self.binding.timeout):
+                LOGGER.warning(
+                    "P_ENG(pool): Policy timed out, restarting process",
+                    binding=self.binding,
+                    timeout=self.binding.timeout,
+                )
+                self.slot.respawn()
+                self._result = PolicyResult(
+                    self.binding.failure_result, "Policy execution timed out"
+                )
+                self._result.source_binding = self.binding
+                return self._result
+            self._result = self.slot.connection.recv()
+        except (EOFError, OSError) as exc:
+            LOGGER.warning("P_ENG(pool): Policy process died", exc=exception_to_string(exc))
+            self.slot.respawn()
+            self._result = PolicyResult(self.binding.failure_result, str(exc))
+            self._result.source_binding = self.binding
+        finally:
+            self.pool.release(self.slot)
+        return self._result
+
+
+class PolicyPool:
+    """Pool of pre-forked policy processes, used instead of forking a new process
+    for each binding"""
+
+    def __init__(self, size: int):
+        self.slots = [PolicyPoolSlot(index) for index in range(size)]
+        self._idle: SimpleQueue[PolicyPoolSlot] = SimpleQueue()
+        for slot in self.slots:
+            self._idle.put(slot)
+
+    def release(self, slot: PolicyPoolSlot):
+        """Return a slot to the pool"""
+        self._idle.put(slot)
+
+    def dispatch(self, binding: PolicyBinding, request: PolicyRequest) -> PolicyPoolTask | None:
+        """Send binding to an idle slot. Returns None when no slot is available or
+        the request cannot be transferred, in which case the caller should fall back
+        to a separate process"""
+        try:
+            slot = self._idle.get_nowait()
+        except Empty:
+            return None
+        try:
+            slot.connection.send((connection.tenant, binding, detach_request(request)))
+        except (PicklingError, TypeError, AttributeError) as exc:
+            LOGGER.debug("P_ENG(pool): Failed to send request to pool", exc=exc)
+            self.release(slot)
+            return None
+        except (BrokenPipeError, OSError) as exc:
+            LOGGER.warning("P_ENG(pool): Policy process died", exc=exc)
+            slot.respawn()
+            self.release(slot)
+            return None
+        return PolicyPoolTask(self, slot, binding)
+
+    def stop(self):
+        """Stop all processes"""
+        for slot in self.slots:
+            slot.stop()
+
+
+_POOL: PolicyPool | None = None
+_POOL_LOCK = Lock()
+
+
+def get_pool() -> PolicyPool | None:
+    """Get the current process's policy pool, if one has been started"""
+    return _POOL
+
+
+def start_pool(size: int | None = None) -> PolicyPool | None:
+    """Start the policy pool for the current process, if enabled in the configuration.
+    Should be called after the web worker has been forked."""
+    global _POOL  # noqa: PLW0603
+    if size is None:
+        size = CONFIG.get_int("policies.pool_size", 0)
+    if size < 1:
+        return None
+    with _POOL_LOCK:
+        if _POOL is None:
+            LOGGER.debug("Starting policy pool", size=size)
+            _POOL = PolicyPool(size)
+    return _POOL
+
+
+def stop_pool():
+    """Stop the policy pool for the current process"""
+    global _POOL  # noqa: PLW0603
+    with _POOL_LOCK:
+        if _POOL is None:
+            return
+        _POOL.stop()
+        _POOL = None
@@ -3,30 +3,35 @@
 from multiprocessing import get_context
 from multiprocessing.connection import Connection
 
-from django.core.cache import cache
 from sentry_sdk import start_span
 from sentry_sdk.tracing import Span
 from structlog.stdlib import get_logger
 
 from authentik.events.models import Event, EventAction
 from authentik.lib.config import CONFIG
+from authentik.lib.utils.cache import TieredCache, get_generation
 from authentik.lib.utils.errors import exception_to_string
 from authentik.lib.utils.reflection import class_to_path
 from authentik.policies.apps import HIST_POLICIES_EXECUTION_TIME
 from authentik.policies.exceptions import PolicyException
 from authentik.policies.models import PolicyBinding
-from authentik.policies.types import CACHE_PREFIX, PolicyRequest, PolicyResult
+from authentik.policies.types import CACHE_GENERATION, CACHE_PREFIX, PolicyRequest, PolicyResult
 
 LOGGER = get_logger()
 
 FORK_CTX = get_context("fork")
 CACHE_TIMEOUT = CONFIG.get_int("cache.timeout_policies")
+# Policy results are immutable per cache key, as the key includes the cache generation
+POLICY_CACHE = TieredCache("policies")
 PROCESS_CLASS = FORK_CTX.Process
 
 
-def cache_key(binding: PolicyBinding, request: PolicyRequest) -> str:
-    """Generate Cache key for policy"""
-    prefix = f"{CACHE_PREFIX}{binding.policy_binding_uuid.hex}_"
+def cache_key(binding: PolicyBinding, request: PolicyRequest, generation: str | None = None) -> str:
+    """Generate Cache key for policy. `generation` can be passed when already looked up,
+    to avoid a cache lookup per binding."""
+    if generation is None:
+        generation = get_generation(CACHE_GENERATION)
+    prefix = f"{CACHE_PREFIX}{binding.policy_binding_uuid.hex}_{generation}"
     if request.http_request and hasattr(request.http_request, "session"):
         prefix += f"_{request.http_request.session.session_key}"
     if request.user:
@@ -34,6 +39,98 @@ def cache_key(binding: PolicyBinding, request: PolicyRequest) -> str:
     return prefix
 
 
+def create_event(
+    binding: PolicyBinding, request: PolicyRequest, action: str, message: str, **kwargs
+):
+    """Create event with common values from `request` and `binding`."""
+    event = Event.new(
+        action=action,
+        message=message,
+        policy_uuid=binding.policy.policy_uuid.hex,
+        binding=binding,
+        request=request,
+        **kwargs,
+    )
+    event.set_user(request.user)
+    if request.http_request:
+        event.from_http(request.http_request)
+    else:
+        event.save()
+
+
+def execute_policy(binding: PolicyBinding, request: PolicyRequest) -> PolicyResult:
+    """Run actual policy, returns result"""
+    LOGGER.debug(
+        "P_ENG(proc): Running policy",
+        policy=binding.policy,
+        user=request.user.username,
+        # this is used for filtering in access checking where logs are sent to the admin
+        process="PolicyProcess",
+    )
+    try:
+        policy_result = binding.passes(request)
+        # Invert result if policy.negate is set
+        if binding.negate:
+            policy_result.passing = not policy_result.passing
+        if binding.policy and not request.debug:
+            if binding.policy.execution_logging:
+                create_event(
+                    binding,
+                    request,
+                    EventAction.POLICY_EXECUTION,
+                    message="Policy Execution",
+                    result=policy_result,
+                )
+    except PolicyException as exc:
+        # Either use passed original exception or whatever we have
+        src_exc = exc.src_exc if exc.src_exc else exc
+        error_string = exception_to_string(src_exc)
+        # Create policy exception event, only when we're not debugging
+        if not request.debug:
+            create_event(binding, request, EventAction.POLICY_EXCEPTION, message=error_string)
+        LOGGER.debug("P_ENG(proc): error, using failure result", exc=src_exc)
+        policy_result = PolicyResult(binding.failure_result, str(src_exc))
+    policy_result.source_binding = binding
+    should_cache = request.should_cache
+    if should_cache:
+        key = cache_key(binding, request)
+        POLICY_CACHE.set(key, policy_result, CACHE_TIMEOUT)
+    LOGGER.debug(
+        "P_ENG(proc): finished",
+        policy=binding.policy,
+        cached=should_cache,
+        result=policy_result,
+        # this is used for filtering in access checking where logs are sent to the admin
+        process="PolicyProcess",
+        passing=policy_result.passing,
+        user=request.user.username,
+    )
+    return policy_result
+
+
+def profile_policy(
+    binding: PolicyBinding, request: PolicyRequest, mode: str = "execute_process"
+) -> PolicyResult:
+    """Run policy with profiling enabled, `mode` is the way the policy is executed"""
+    with (
+        start_span(
+            op="authentik.policy.process.execute",
+        ) as span,
+        HIST_POLICIES_EXECUTION_TIME.labels(
+            binding_order=binding.order,
+            binding_target_type=binding.target_type,
+            binding_target_name=binding.target_name,
+            object_pk=str(request.obj.pk) if request.obj else "",
+            object_type=class_to_path(request.obj.__class__) if request.obj else "",
+            mode=mode,
+        ).time(),
+    ):
+        span: Span
+        span.set_data("policy", binding.policy)
+        span.set_data("request", request)
+        return execute_policy(binding, request)
+
+
 class PolicyProcess(PROCESS_CLASS):
     """Evaluate a single policy within a separate process"""
 
@@ -57,86 +154,15 @@ class PolicyProcess(PROCESS_CLASS):
 
     def create_event(self, action: str, message: str, **kwargs):
         """Create event with common values from `self.request` and `self.binding`."""
-        event = Event.new(
-            action=action,
-            message=message,
-            policy_uuid=self.binding.policy.policy_uuid.hex,
-            binding=self.binding,
-            request=self.request,
-            **kwargs,
-        )
-        event.set_user(self.request.user)
-        if self.request.http_request:
-            event.from_http(self.request.http_request)
-        else:
-            event.save()
+        create_event(self.binding, self.request, action, message, **kwargs)
 
     def execute(self) -> PolicyResult:
         """Run actual policy, returns result"""
-        LOGGER.debug(
-            "P_ENG(proc): Running policy",
-            policy=self.binding.policy,
-            user=self.request.user.username,
-            # this is used for filtering in access checking where logs are sent to the admin
-            process="PolicyProcess",
-        )
-        try:
-            policy_result = self.binding.passes(self.request)
-            # Invert result if policy.negate is set
-            if self.binding.negate:
-                policy_result.passing = not policy_result.passing
-            if self.binding.policy and not self.request.debug:
-                if self.binding.policy.execution_logging:
-                    self.create_event(
-                        EventAction.POLICY_EXECUTION,
-                        message="Policy Execution",
-                        result=policy_result,
-                    )
-        except PolicyException as exc:
-            # Either use passed original exception or whatever we have
-            src_exc = exc.src_exc if exc.src_exc else exc
-            error_string = exception_to_string(src_exc)
-            # Create policy exception event, only when we're not debugging
-            if not self.request.debug:
-                self.create_event(EventAction.POLICY_EXCEPTION, message=error_string)
-            LOGGER.debug("P_ENG(proc): error, using failure result", exc=src_exc)
-            policy_result = PolicyResult(self.binding.failure_result, str(src_exc))
-        policy_result.source_binding = self.binding
-        should_cache = self.request.should_cache
-        if should_cache:
-            key = cache_key(self.binding, self.request)
-            cache.set(key, policy_result, CACHE_TIMEOUT)
-        LOGGER.debug(
-            "P_ENG(proc): finished",
-            policy=self.binding.policy,
-            cached=should_cache,
-            result=policy_result,
-            # this is used for filtering in access checking where logs are sent to the admin
-            process="PolicyProcess",
-            passing=policy_result.passing,
-            user=self.request.user.username,
-        )
-        return policy_result
+        return execute_policy(self.binding, self.request)
 
     def profiling_wrapper(self):
         """Run with profiling enabled"""
-        with (
-            start_span(
-                op="authentik.policy.process.execute",
-            ) as span,
-            HIST_POLICIES_EXECUTION_TIME.labels(
-                binding_order=self.binding.order,
-                binding_target_type=self.binding.target_type,
-                binding_target_name=self.binding.target_name,
-                object_pk=str(self.request.obj.pk) if self.request.obj else "",
-                object_type=class_to_path(self.request.obj.__class__) if self.request.obj else "",
-                mode="execute_process",
-            ).time(),
-        ):
-            span: Span
-            span.set_data("policy", self.binding.policy)
-            span.set_data("request", self.request)
-            return self.execute()
+        return profile_policy(self.binding, self.request)
 
     def run(self):  # pragma: no cover
         """Task wrapper to run policy checking"""
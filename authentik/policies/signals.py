@@ -6,11 +6,12 @@ from django.db.models.signals import post_save
 from django.dispatch import receiver
 from structlog.stdlib import get_logger
 
-from authentik.core.api.applications import user_app_cache_key
+from authentik.core.api.applications import USER_APP_CACHE_GENERATION
 from authentik.core.models import Group, User
+from authentik.lib.utils.cache import bump_generation
 from authentik.policies.apps import GAUGE_POLICIES_CACHED
 from authentik.policies.models import Policy, PolicyBinding, PolicyBindingModel
-from authentik.policies.types import CACHE_PREFIX
+from authentik.policies.types import CACHE_GENERATION, CACHE_PREFIX
 from authentik.root.monitoring import monitoring_set
 
 LOGGER = get_logger()
@@ -24,21 +25,15 @@ def monitoring_set_policies(sender, **kwargs):
     )
 
 
-@receiver(post_save, sender=Policy)
-@receiver(post_save, sender=PolicyBinding)
-@receiver(post_save, sender=PolicyBindingModel)
-@receiver(post_save, sender=Group)
-@receiver(post_save, sender=User)
+@receiver(post_save)
 def invalidate_policy_cache(sender, instance, **_):
     """Invalidate Policy cache when policy is updated"""
-    if sender == Policy:
-        total = 0
-        for binding in PolicyBinding.objects.filter(policy=instance):
-            prefix = f"{CACHE_PREFIX}{binding.policy_binding_uuid.hex}_{binding.policy.pk.hex}*"
-            keys = cache.keys(prefix)
-            total += len(keys)
-            cache.delete_many(keys)
-        LOGGER.debug("Invalidating policy cache", policy=instance, keys=total)
+    if isinstance(instance, Policy):
+        # Cached results embed the policy's configuration, so all of them are invalidated
+        # by bumping the generation instead of scanning for matching keys
+        LOGGER.debug("Invalidating policy cache", policy=instance)
+        bump_generation(CACHE_GENERATION)
+    elif sender not in (PolicyBinding, PolicyBindingModel, Group, User):
+        return
     # Also delete user application cache
-    keys = cache.keys(user_app_cache_key("*")) or []
-    cache.delete_many(keys)
+    bump_generation(USER_APP_CACHE_GENERATION)
@@ -0,0 +1,39 @@
+"""policy benchmark tests"""
+
+from json import loads
+from tempfile import NamedTemporaryFile
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from authentik.policies.management.commands.benchmark_policies import FIXTURE_PREFIX
+from authentik.policies.models import Policy
+
+
+class TestPolicyBenchmark(TestCase):
+    """Policy benchmark tests"""
+
+    def test_benchmark(self):
+        """Test benchmark command output and fixture cleanup"""
+        with NamedTemporaryFile(suffix=".json") as output:
+            call_command(
+                "benchmark_policies",
+                "--iterations=2",
+                "--reputation=2",
+                "--execution",
+                "inline",
+                "thread",
+                "--concurrency=sequential",
+                f"--output={output.name}",
+            )
+            results = loads(output.read())
+        self.assertEqual(
+            results["fixtures"],
+            {"expression": 5, "group": 5, "reputation": 2, "event_matcher": 1},
+        )
+        self.assertEqual(len(results["results"]), 4)
+        for result in results["results"]:
+            self.assertEqual(result["builds"], 2)
+            self.assertGreater(result["throughput"], 0)
+            self.assertLessEqual(result["latency_ms"]["min"], result["latency_ms"]["max"])
+        self.assertFalse(Policy.objects.filter(name__startswith=FIXTURE_PREFIX).exists())
@@ -1,15 +1,19 @@
 """policy engine tests"""
 
+from unittest.mock import patch
+
 from django.core.cache import cache
 from django.test import TestCase
 
 from authentik.core.tests.utils import create_test_admin_user
+from authentik.lib.config import CONFIG
 from authentik.lib.generators import generate_id
 from authentik.policies.dummy.models import DummyPolicy
-from authentik.policies.engine import PolicyEngine
+from authentik.policies.engine import BINDING_COSTS, BindingCosts, PolicyEngine
 from authentik.policies.exceptions import PolicyEngineException
 from authentik.policies.expression.models import ExpressionPolicy
 from authentik.policies.models import Policy, PolicyBinding, PolicyBindingModel, PolicyEngineMode
+from authentik.policies.process import POLICY_CACHE
 from authentik.policies.tests.test_process import clear_policy_cache
 from authentik.policies.types import CACHE_PREFIX
 
@@ -127,3 +131,88 @@ class TestPolicyEngine(TestCase):
         self.assertEqual(len(cache.keys(f"{CACHE_PREFIX}{binding.policy_binding_uuid.hex}*")), 1)
         self.assertEqual(engine.build().passing, False)
         self.assertEqual(len(cache.keys(f"{CACHE_PREFIX}{binding.policy_binding_uuid.hex}*")), 1)
+
+    def test_engine_short_circuit_all(self):
+        """Test short-circuit with MODE_ALL stops at the first failing binding"""
+        pbm = PolicyBindingModel.objects.create(policy_engine_mode=PolicyEngineMode.MODE_ALL)
+        PolicyBinding.objects.create(target=pbm, policy=self.policy_false, order=0)
+        PolicyBinding.objects.create(target=pbm, policy=self.policy_true, order=1)
+        with CONFIG.patch("policies.short_circuit", True):
+            engine = PolicyEngine(pbm, self.user)
+        result = engine.build().result
+        self.assertEqual(result.passing, False)
+        self.assertEqual(result.messages, ("dummy",))
+        self.assertEqual(len(result.source_results), 1)
+
+    def test_engine_short_circuit_any(self):
+        """Test short-circuit with MODE_ANY stops at the first passing binding"""
+        pbm = PolicyBindingModel.objects.create(policy_engine_mode=PolicyEngineMode.MODE_ANY)
+        PolicyBinding.objects.create(target=pbm, policy=self.policy_true, order=0)
+        PolicyBinding.objects.create(target=pbm, policy=self.policy_false, order=1)
+        with CONFIG.patch("policies.short_circuit", True):
+            engine = PolicyEngine(pbm, self.user)
+        result = engine.build().result
+        self.assertEqual(result.passing, True)
+        self.assertEqual(len(result.source_results), 1)
+        self.assertEqual(result.source_results[0].source_binding.policy, self.policy_true)
+
+    def test_engine_short_circuit_cost(self):
+        """Test short-circuit with cheapest-first ordering"""
+        pbm = PolicyBindingModel.objects.create(policy_engine_mode=PolicyEngineMode.MODE_ANY)
+        PolicyBinding.objects.create(target=pbm, policy=self.policy_false, order=0)
+        PolicyBinding.objects.create(target=pbm, policy=self.policy_true, order=1)
+        with (
+            CONFIG.patch("policies.short_circuit", True),
+            CONFIG.patch("policies.short_circuit_order", "cost"),
+        ):
+            engine = PolicyEngine(pbm, self.user)
+        with patch.object(
+            PolicyEngine,
+            "_binding_cost",
+            lambda _, binding: 1.0 if binding.policy == self.policy_false else 0.1,
+        ):
+            result = engine.build().result
+        self.assertEqual(result.passing, True)
+        self.assertEqual(len(result.source_results), 1)
+        self.assertEqual(result.source_results[0].source_binding.policy, self.policy_true)
+
+    def test_engine_short_circuit_cost_recorded(self):
+        """Test execution times are recorded when short-circuiting"""
+        pbm = PolicyBindingModel.objects.create()
+        binding = PolicyBinding.objects.create(target=pbm, policy=self.policy_true, order=0)
+        with CONFIG.patch("policies.short_circuit", True):
+            engine = PolicyEngine(pbm, self.user)
+        engine.use_cache = False
+        engine.build()
+        self.assertGreater(BINDING_COSTS.get(binding), 0)
+
+    def test_binding_costs(self):
+        """Test running average of binding execution times"""
+        costs = BindingCosts(window=2)
+        binding = PolicyBinding(policy=self.policy_true, order=0)
+        self.assertEqual(costs.get(binding), 0)
+        costs.record(binding, 1.0)
+        self.assertEqual(costs.get(binding), 1.0)
+        costs.record(binding, 2.0)
+        self.assertEqual(costs.get(binding), 1.5)
+        # Older executions are weighted less once the window is full
+        costs.record(binding, 3.0)
+        self.assertEqual(costs.get(binding), 2.25)
+
+    def test_engine_cache_batched(self):
+        """Test that cached results of all bindings are fetched with a single lookup"""
+        pbm = PolicyBindingModel.objects.create()
+        PolicyBinding.objects.create(target=pbm, policy=self.policy_true, order=0)
+        PolicyBinding.objects.create(target=pbm, policy=self.policy_true, order=1)
+        PolicyEngine(pbm, self.user).build()
+        with (
+            patch(
+                "authentik.policies.engine.POLICY_CACHE.get_many", wraps=POLICY_CACHE.get_many
+            ) as get_many,
+            patch("authentik.policies.engine.PolicyEngine._dispatch") as dispatch,
+        ):
+            result = PolicyEngine(pbm, self.user).build().result
+        get_many.assert_called_once()
+        dispatch.assert_not_called()
+        self.assertEqual(result.passing, True)
+        self.assertEqual(result.messages, ("dummy", "dummy"))
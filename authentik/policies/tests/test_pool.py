@@ -0,0 +1,78 @@
+"""policy pool tests"""
+
+from django.test import RequestFactory, TestCase
+
+from authentik.core.tests.utils import create_test_admin_user
+from authentik.lib.generators import generate_id
+from authentik.policies.dummy.models import DummyPolicy
+from authentik.policies.engine import PolicyEngine
+from authentik.policies.models import PolicyBinding, PolicyBindingModel
+from authentik.policies.pool import DetachedHttpRequest, get_pool, start_pool, stop_pool
+from authentik.policies.tests.test_process import clear_policy_cache
+
+
+class TestPolicyPool(TestCase):
+    """Policy pool tests"""
+
+    def setUp(self):
+        clear_policy_cache()
+        self.user = create_test_admin_user()
+        self.pool = start_pool(1)
+
+    def tearDown(self):
+        stop_pool()
+
+    def test_start_disabled(self):
+        """Test pool is not started with a size of 0"""
+        stop_pool()
+        self.assertIsNone(start_pool(0))
+        self.assertIsNone(get_pool())
+
+    def test_engine(self):
+        """Test engine dispatches bindings to the pool"""
+        policy = DummyPolicy.objects.create(name=generate_id(), result=True, wait_min=0, wait_max=1)
+        pbm = PolicyBindingModel.objects.create()
+        PolicyBinding.objects.create(target=pbm, policy=policy, order=0)
+        engine = PolicyEngine(pbm, self.user)
+        engine.use_cache = False
+        result = engine.build().result
+        self.assertEqual(result.passing, True)
+        self.assertEqual(result.messages, ("dummy",))
+
+    def test_timeout(self):
+        """Test that a binding exceeding its timeout is terminated and the slot restarted"""
+        policy = DummyPolicy.objects.create(name=generate_id(), result=True, wait_min=5, wait_max=6)
+        pbm = PolicyBindingModel.objects.create()
+        PolicyBinding.objects.create(target=pbm, policy=policy, order=0, timeout=1)
+        slot = self.pool.slots[0]
+        pid = slot.process.pid
+        engine = PolicyEngine(pbm, self.user)
+        engine.use_cache = False
+        result = engine.build().result
+        self.assertEqual(result.passing, False)
+        self.assertEqual(result.messages, ("Policy execution timed out",))
+        self.assertNotEqual(slot.process.pid, pid)
+        self.assertTrue(slot.process.is_alive())
+
+    def test_fallback_busy(self):
+        """Test that bindings are executed in a separate process when all slots are busy"""
+        policy = DummyPolicy.objects.create(name=generate_id(), result=True, wait_min=0, wait_max=1)
+        pbm = PolicyBindingModel.objects.create()
+        PolicyBinding.objects.create(target=pbm, policy=policy, order=0)
+        PolicyBinding.objects.create(target=pbm, policy=policy, order=1)
+        engine = PolicyEngine(pbm, self.user)
+        engine.use_cache = False
+        result = engine.build().result
+        self.assertEqual(result.passing, True)
+        self.assertEqual(result.messages, ("dummy", "dummy"))
+
+    def test_detached_request(self):
+        """Test detached request keeps attributes set by middlewares"""
+        request = RequestFactory().get("/?foo=bar")
+        request.user = self.user
+        request.client_ip = "127.0.0.1"
+        detached = DetachedHttpRequest(request)
+        self.assertEqual(detached.GET["foo"], "bar")
+        self.assertEqual(detached.user, self.user)
+        self.assertEqual(detached.client_ip, "127.0.0.1")
+        self.assertNotIn("wsgi.input", detached.META)
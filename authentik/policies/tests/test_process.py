@@ -10,17 +10,19 @@ from guardian.shortcuts import get_anonymous_user
 from authentik.core.models import Application, Group, User
 from authentik.events.models import Event, EventAction
 from authentik.lib.generators import generate_id
+from authentik.lib.utils.cache import bump_generation
 from authentik.policies.dummy.models import DummyPolicy
 from authentik.policies.expression.models import ExpressionPolicy
 from authentik.policies.models import Policy, PolicyBinding
 from authentik.policies.process import PolicyProcess
-from authentik.policies.types import CACHE_PREFIX, PolicyRequest
+from authentik.policies.types import CACHE_GENERATION, CACHE_PREFIX, PolicyRequest
 
 
 def clear_policy_cache():
     """Ensure no policy-related keys are still cached"""
     keys = cache.keys(f"{CACHE_PREFIX}*")
     cache.delete(keys)
+    bump_generation(CACHE_GENERATION)
 
 
 class TestPolicyProcess(TestCase):
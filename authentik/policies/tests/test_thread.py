@@ -0,0 +1,90 @@
+"""policy thread execution tests"""
+
+from django.test import TransactionTestCase
+
+from authentik.core.models import Group
+from authentik.core.tests.utils import create_test_admin_user
+from authentik.lib.config import CONFIG
+from authentik.lib.generators import generate_id
+from authentik.policies.dummy.models import DummyPolicy
+from authentik.policies.engine import PolicyEngine
+from authentik.policies.models import PolicyBinding, PolicyBindingModel
+from authentik.policies.tests.test_process import clear_policy_cache
+from authentik.policies.thread import (
+    binding_thread_type,
+    dispatch_thread,
+    get_executor,
+    should_run_in_thread,
+)
+
+DUMMY_TYPE = "authentik_policies_dummy.dummypolicy"
+
+
+class TestPolicyThread(TransactionTestCase):
+    """Policy thread execution tests, threads use their own database connections and only
+    see committed data"""
+
+    def setUp(self):
+        clear_policy_cache()
+        self.user = create_test_admin_user()
+
+    def test_binding_type(self):
+        """Test binding type identifiers"""
+        policy = DummyPolicy(name=generate_id())
+        self.assertEqual(binding_thread_type(PolicyBinding(policy=policy)), DUMMY_TYPE)
+        self.assertEqual(binding_thread_type(PolicyBinding(user=self.user)), "user")
+        with CONFIG.patch("policies.thread_types", ["user"]):
+            self.assertTrue(should_run_in_thread(PolicyBinding(user=self.user)))
+            self.assertFalse(should_run_in_thread(PolicyBinding(policy=policy)))
+        # Set via environment variable
+        with CONFIG.patch("policies.thread_types", f"{DUMMY_TYPE}s, group"):
+            self.assertTrue(should_run_in_thread(PolicyBinding(group=Group(name=generate_id()))))
+            self.assertFalse(should_run_in_thread(PolicyBinding(policy=policy)))
+
+    def test_engine(self):
+        """Test engine with in-thread execution"""
+        group = Group.objects.create(name=generate_id())
+        group.users.add(self.user)
+        policy = DummyPolicy.objects.create(name=generate_id(), result=True, wait_min=0, wait_max=1)
+        pbm = PolicyBindingModel.objects.create()
+        PolicyBinding.objects.create(target=pbm, policy=policy, order=0)
+        PolicyBinding.objects.create(target=pbm, group=group, order=1)
+        with CONFIG.patch("policies.thread_types", [DUMMY_TYPE, "group"]):
+            engine = PolicyEngine(pbm, self.user)
+            engine.use_cache = False
+            result = engine.build().result
+        self.assertEqual(result.passing, True)
+        self.assertEqual(result.messages, ("dummy",))
+
+    def test_timeout(self):
+        """Test binding exceeding its timeout"""
+        policy = DummyPolicy.objects.create(name=generate_id(), result=True, wait_min=2, wait_max=3)
+        pbm = PolicyBindingModel.objects.create()
+        PolicyBinding.objects.create(target=pbm, policy=policy, order=0, timeout=1)
+        with CONFIG.patch("policies.thread_types", [DUMMY_TYPE]):
+            engine = PolicyEngine(pbm, self.user)
+            engine.use_cache = False
+            result = engine.build().result
+        self.assertEqual(result.passing, False)
+        self.assertEqual(result.messages, ("Policy execution timed out",))
+
+    def test_no_idle_thread(self):
+        """Test bindings are executed in a process when all threads are busy"""
+        policy = DummyPolicy.objects.create(name=generate_id(), result=True, wait_min=0, wait_max=1)
+        pbm = PolicyBindingModel.objects.create()
+        PolicyBinding.objects.create(target=pbm, policy=policy, order=0)
+        _, idle = get_executor()
+        taken = 0
+        while idle.acquire(blocking=False):
+            taken += 1
+        try:
+            with CONFIG.patch("policies.thread_types", [DUMMY_TYPE]):
+                engine = PolicyEngine(pbm, self.user)
+                engine.use_cache = False
+                self.assertIsNone(dispatch_thread(PolicyBinding(policy=policy), engine.request))
+                result = engine.build().result
+        finally:
+            for _ in range(taken):
+                idle.release()
+        self.assertEqual(result.passing, True)
+        self.assertEqual(result.messages, ("dummy",))
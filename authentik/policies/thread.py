@@ -0,0 +1,131 @@
+"""authentik policy in-process (thread) execution"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextvars import copy_context
+from threading import BoundedSemaphore, Lock
+
+from django.db import close_old_connections, connection
+from django_tenants.utils import schema_context
+from structlog.stdlib import get_logger
+
+from authentik.lib.config import CONFIG
+from authentik.policies.models import PolicyBinding
+from authentik.policies.process import profile_policy
+from authentik.policies.types import PolicyRequest, PolicyResult
+
+LOGGER = get_logger()
+
+_EXECUTOR: ThreadPoolExecutor | None = None
+# Threads which aren't running a binding, taken before submitting a binding and released once
+# it's done (not once it timed out, as the thread keeps running)
+_IDLE_THREADS: BoundedSemaphore | None = None
+_EXECUTOR_LOCK = Lock()
+
+
+def get_executor() -> tuple[ThreadPoolExecutor, BoundedSemaphore]:
+    """Get (and lazily create) the thread pool used for in-process policy execution, and the
+    semaphore of its idle threads"""
+    global _EXECUTOR, _IDLE_THREADS  # noqa: PLW0603
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            size = max(CONFIG.get_int("policies.thread_pool_size", 8), 1)
+            _EXECUTOR = ThreadPoolExecutor(max_workers=size, thread_name_prefix="authentik-policy")
+            _IDLE_THREADS = BoundedSemaphore(size)
+    return _EXECUTOR, _IDLE_THREADS
+
+
+def binding_thread_type(binding: PolicyBinding) -> str:
+    """Get the type identifier of a binding used by `policies.thread_types`, which is
+    the policy's model label, or `group`/`user` for bindings to groups or users."""
+    if binding.policy:
+        return binding.policy._meta.label_lower
+    return binding.target_type
+
+
+def get_thread_types() -> list[str]:
+    """Types of bindings configured in `policies.thread_types`, which is either a list or
+    (when set via environment variable) a comma-separated string"""
+    thread_types = CONFIG.get("policies.thread_types", [])
+    if isinstance(thread_types, str):
+        thread_types = [value.strip() for value in thread_types.split(",") if value.strip()]
+    return thread_types
+
+
+def should_run_in_thread(binding: PolicyBinding) -> bool:
+    """Check if binding is configured to be executed in-process"""
+    return binding_thread_type(binding) in get_thread_types()
+
+
+def _execute(
+    binding: PolicyBinding, request: PolicyRequest, schema_name: str, idle: BoundedSemaphore
+) -> PolicyResult:
+    """Run binding in a worker thread, with the thread's own database connections set to the
+    calling thread's tenant"""
+    close_old_connections()
+    try:
+        with schema_context(schema_name):
+            return profile_policy(binding, request, mode="execute_thread")
+    finally:
+        close_old_connections()
+        idle.release()
+
+
+def dispatch_thread(binding: PolicyBinding, request: PolicyRequest) -> "PolicyThreadTask | None":
+    """Start executing `binding` in a thread. Returns None when all threads are busy (for
+    example with policies which timed out but are still running), in which case the binding
+    should be executed in a process instead."""
+    executor, idle = get_executor()
+    if not idle.acquire(blocking=False):
+        LOGGER.debug("P_ENG(thread): No idle thread", binding=binding)
+        return None
+    try:
+        return PolicyThreadTask(binding, request, executor, idle)
+    except Exception:
+        idle.release()
+        raise
+
+
+class PolicyThreadTask:
+    """A binding which is being executed in a thread of the current process, see
+    `dispatch_thread`. Timeouts are cooperative: the thread can't be stopped, however once the
+    deadline has passed the result is discarded. Threads use their own database
+    connections, so (like policies executed in a separate process) they don't see
+    uncommitted changes of the calling thread."""
+
+    future: Future
+    binding: PolicyBinding
+
+    def __init__(
+        self,
+        binding: PolicyBinding,
+        request: PolicyRequest,
+        executor: ThreadPoolExecutor,
+        idle: BoundedSemaphore,
+    ):
+        self.binding = binding
+        self._result: PolicyResult | None = None
+        context = copy_context()
+        self.future = executor.submit(
+            context.run, _execute, binding, request, connection.schema_name, idle
+        )
+
+    def result(self) -> PolicyResult:
+        """Wait for the result until the binding's timeout is reached"""
+        if self._result:
+            return self._result
+        try:
+            self._result = self.future.result(timeout=self.binding.timeout)
+        except TimeoutError:
+            LOGGER.warning(
+                "P_ENG(thread): Policy timed out",
+                binding=self.binding,
+                timeout=self.binding.timeout,
+            )
+            self.future.cancel()
+            self._result = PolicyResult(self.binding.failure_result, "Policy execution timed out")
+            self._result.source_binding = self.binding
+        except Exception as exc:
+            LOGGER.warning("P_ENG(thread): Policy failed to run", exc=exc)
+            self._result = PolicyResult(False, str(exc))
+            self._result.source_binding = self.binding
+        return self._result
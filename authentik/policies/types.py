@@ -18,6 +18,8 @@ if TYPE_CHECKING:
 
 LOGGER = get_logger()
 CACHE_PREFIX = "goauthentik.io/policies/"
+# Generation namespace of cached policy results, see `authentik.lib.utils.cache`
+CACHE_GENERATION = "policies"
 
 
 @dataclass(slots=True)
@@ -1,11 +1,14 @@
 """SCIM Client"""
 
-from typing import TYPE_CHECKING
+from collections.abc import Generator
+from json import dumps
+from typing import TYPE_CHECKING, Any
 
 from django.http import HttpResponseBadRequest, HttpResponseNotFound
 from pydantic import ValidationError
 from requests import RequestException, Session
 
+from authentik.core.expression.exceptions import SkipObjectException
 from authentik.lib.sync.outgoing import (
     HTTP_CONFLICT,
     HTTP_NO_CONTENT,
@@ -16,17 +19,27 @@ from authentik.lib.sync.outgoing.base import BaseOutgoingSyncClient
 from authentik.lib.sync.outgoing.exceptions import (
     NotFoundSyncException,
     ObjectExistsSyncException,
+    StopSync,
     TransientSyncException,
 )
 from authentik.lib.utils.http import get_http_session
 from authentik.providers.scim.clients.exceptions import SCIMRequestException
-from authentik.providers.scim.clients.schema import ServiceProviderConfiguration
+from authentik.providers.scim.clients.schema import (
+    BulkOperation,
+    BulkRequest,
+    BulkResponse,
+    BulkResponseOperation,
+    ServiceProviderConfiguration,
+)
 from authentik.providers.scim.models import SCIMProvider
 
 if TYPE_CHECKING:
     from django.db.models import Model
     from pydantic import BaseModel
 
+# Allowance for the envelope of a bulk request when checking `maxPayloadSize`
+BULK_REQUEST_OVERHEAD = 1024
+
 
 class SCIMClient[TModel: "Model", TConnection: "Model", TSchema: "BaseModel"](
     BaseOutgoingSyncClient[TModel, TConnection, TSchema, SCIMProvider]
@@ -35,6 +48,7 @@ class SCIMClient[TModel: "Model", TConnection: "Model", TSchema: "BaseModel"](
 
     base_url: str
     token: str
+    resource_path: str
 
     _session: Session
     _config: ServiceProviderConfiguration
@@ -50,9 +64,12 @@ class SCIMClient[TModel: "Model", TConnection: "Model", TSchema: "BaseModel"](
         self.base_url = base_url
         self.token = provider.token
         self._config = self.get_service_provider_config()
+        # Schemas of objects which `write_bulk` couldn't write, see `_schema_for`
+        self._bulk_schemas: dict[Any, tuple[TSchema, str | None] | StopSync] = {}
 
     def _request(self, method: str, path: str, **kwargs) -> dict:
         """Wrapper to send a request to the full URL"""
+        self.wait_for_backoff()
         try:
             response = self._session.request(
                 method,
@@ -71,6 +88,7 @@ class SCIMClient[TModel: "Model", TConnection: "Model", TSchema: "BaseModel"](
             if response.status_code == HttpResponseNotFound.status_code:
                 raise NotFoundSyncException(response)
             if response.status_code in [HTTP_TOO_MANY_REQUESTS, HTTP_SERVICE_UNAVAILABLE]:
+                self.backoff(response.headers.get("Retry-After"))
                 raise TransientSyncException()
             if response.status_code == HTTP_CONFLICT:
                 raise ObjectExistsSyncException(response)
@@ -92,3 +110,146 @@ class SCIMClient[TModel: "Model", TConnection: "Model", TSchema: "BaseModel"](
         except (ValidationError, SCIMRequestException, NotFoundSyncException) as exc:
             self.logger.warning("failed to get ServiceProviderConfig", exc=exc)
             return default_config
+
+    @property
+    def can_bulk(self) -> bool:
+        """Check if the service provider accepts bulk requests with multiple operations"""
+        return self._config.bulk.supported and (self._config.bulk.maxOperations or 0) > 1
+
+    def _bulk_chunks(
+        self, operations: list[BulkOperation]
+    ) -> Generator[list[BulkOperation], None, None]:
+        """Split operations into chunks within `maxOperations` and `maxPayloadSize`"""
+        max_operations = self._config.bulk.maxOperations
+        max_size = (self._config.bulk.maxPayloadSize or 0) - BULK_REQUEST_OVERHEAD
+        chunk, chunk_size = [], 0
+        for operation in operations:
+            size = len(dumps(operation.model_dump(mode="json", exclude_none=True)))
+            if chunk and (
+                len(chunk) >= max_operations or (max_size > 0 and chunk_size + size > max_size)
+            ):
+                yield chunk
+                chunk, chunk_size = [], 0
+            chunk.append(operation)
+            chunk_size += size
+        if chunk:
+            yield chunk
+
+    def _bulk(self, operations: list[BulkOperation]) -> dict[str, BulkResponseOperation]:
+        """Send operations with as few bulk requests as possible, returns the results by
+        bulkId. Operations of failed requests don't have a result"""
+        results = {}
+        for chunk in self._bulk_chunks(operations):
+            try:
+                response = BulkResponse.model_validate(
+                    self._request(
+                        "POST",
+                        "/Bulk",
+                        json=BulkRequest(Operations=chunk).model_dump(
+                            mode="json", exclude_none=True
+                        ),
+                    )
+                )
+            except (
+                ValidationError,
+                TransientSyncException,
+                NotFoundSyncException,
+                ObjectExistsSyncException,
+            ) as exc:
+                self.logger.warning("Failed to send bulk request", exc=exc)
+                continue
+            for result in response.Operations:
+                if result.bulkId:
+                    results[result.bulkId] = result
+        return results
+
+    def write_bulk(self, objs: list[TModel]) -> list[TModel]:
+        """Create and update objects with bulk requests, if supported by the service provider.
+        Objects whose operation failed are returned to be written individually, which
+        handles (and reports) their errors"""
+        if not self.can_bulk:
+            return objs
+        connections = {
+            getattr(connection, f"{self.connection_type_query}_id"): connection
+            for connection in self.connection_type.objects.filter(
+                provider=self.provider, **{f"{self.connection_type_query}__in": objs}
+            )
+        }
+        remaining = []
+        operations: dict[str, tuple[TModel, BulkOperation]] = {}
+        schemas: dict[Any, tuple[TSchema, str | None] | StopSync] = {}
+        for obj in objs:
+            connection = connections.get(obj.pk)
+            self._schema_hash = None
+            try:
+                schema = self.to_schema(obj, connection)
+            except SkipObjectException:
+                continue
+            except StopSync as exc:
+                schemas[obj.pk] = exc
+                remaining.append(obj)
+                continue
+            schemas[obj.pk] = (schema, self._schema_hash)
+            operation = self._bulk_operation(obj, connection, schema.model_copy())
+            operations[operation.bulkId] = (obj, operation)
+        results = self._bulk([operation for _, operation in operations.values()])
+        written = []
+        created = []
+        for bulk_id, (obj, operation) in operations.items():
+            result = results.get(bulk_id)
+            if not result or result.status >= HttpResponseBadRequest.status_code:
+                remaining.append(obj)
+                continue
+            if operation.method == "POST" and not result.id:
+                # Written individually, which reports the missing ID
+                remaining.append(obj)
+                continue
+            written.append(obj)
+            if operation.method != "POST":
+                continue
+            connections[obj.pk] = self.connection_type(
+                provider=self.provider, scim_id=result.id, **{self.connection_type_query: obj}
+            )
+            created.append(connections[obj.pk])
+        self.connection_type.objects.bulk_create(created)
+        remaining.extend(self._bulk_written(written, connections))
+        # Remember the written schemas, see `delta`
+        remaining_pks = {obj.pk for obj in remaining}
+        updated = []
+        for obj in written:
+            connection = connections.get(obj.pk)
+            if obj.pk in remaining_pks or not connection:
+                continue
+            connection.sync_hash = schemas[obj.pk][1]
+            updated.append(connection)
+        self.connection_type.objects.bulk_update(updated, ["sync_hash"])
+        self._bulk_schemas = {pk: schemas[pk] for pk in remaining_pks}
+        return remaining
+
+    def _bulk_operation(
+        self, obj: TModel, connection: TConnection | None, schema: TSchema
+    ) -> BulkOperation:
+        """Operation to create or update `obj`"""
+        operation = BulkOperation(method="POST", path=self.resource_path, bulkId=str(obj.pk))
+        if connection:
+            schema.id = connection.scim_id
+            operation.method = "PUT"
+            operation.path = f"{self.resource_path}/{connection.scim_id}"
+        operation.data = schema.model_dump(mode="json", exclude_unset=True)
+        return operation
+
+    def _schema_for(self, obj: TModel, connection: TConnection | None) -> TSchema:
+        """Schema of `obj`, reusing the schema of objects which `write_bulk` couldn't write so
+        property mappings aren't evaluated (and their errors reported) twice"""
+        schema = self._bulk_schemas.pop(obj.pk, None)
+        if schema is None:
+            return self.to_schema(obj, connection)
+        if isinstance(schema, StopSync):
+            raise schema
+        schema, self._schema_hash = schema
+        return schema
+
+    def _bulk_written(self, objs: list[TModel], connections: dict) -> list[TModel]:
+        """Called with objects which have been written by `write_bulk`, returns objects
+        which have to be written individually"""
+        return []
@@ -2,11 +2,12 @@
 
 from itertools import batched
 
+from django.http import HttpResponseBadRequest
 from pydantic import ValidationError
 from pydanticscim.group import GroupMember
 from pydanticscim.responses import PatchOp, PatchOperation
 
-from authentik.core.models import Group
+from authentik.core.models import Group, User
 from authentik.lib.sync.mapper import PropertyMappingManager
 from authentik.lib.sync.outgoing.base import Direction
 from authentik.lib.sync.outgoing.exceptions import (
@@ -19,7 +20,11 @@ from authentik.providers.scim.clients.base import SCIMClient
 from authentik.providers.scim.clients.exceptions import (
     SCIMRequestException,
 )
-from authentik.providers.scim.clients.schema import SCIM_GROUP_SCHEMA, PatchRequest
+from authentik.providers.scim.clients.schema import (
+    SCIM_GROUP_SCHEMA,
+    BulkOperation,
+    PatchRequest,
+)
 from authentik.providers.scim.clients.schema import Group as SCIMGroupSchema
 from authentik.providers.scim.models import (
     SCIMMapping,
@@ -34,6 +39,7 @@ class SCIMGroupClient(SCIMClient[Group, SCIMProviderGroup, SCIMGroupSchema]):
 
     connection_type = SCIMProviderGroup
     connection_type_query = "group"
+    resource_path = "/Groups"
     mapper: PropertyMappingManager
 
     def __init__(self, provider: SCIMProvider):
@@ -82,13 +88,17 @@ class SCIMGroupClient(SCIMClient[Group, SCIMProviderGroup, SCIMGroupSchema]):
         if not scim_group:
             self.logger.debug("Group does not exist in SCIM, skipping")
             return None
-        response = self._request("DELETE", f"/Groups/{scim_group.scim_id}")
+        response = self.delete_remote(scim_group.scim_id)
         scim_group.delete()
         return response
 
+    def delete_remote(self, remote_id: str):
+        """Delete group by SCIM ID"""
+        return self._request("DELETE", f"/Groups/{remote_id}")
+
     def create(self, group: Group):
         """Create group from scratch and create a connection object"""
-        scim_group = self.to_schema(group, None)
+        scim_group = self._schema_for(group, None)
         response = self._request(
             "POST",
             "/Groups",
@@ -109,7 +119,7 @@ class SCIMGroupClient(SCIMClient[Group, SCIMProviderGroup, SCIMGroupSchema]):
 
     def update(self, group: Group, connection: SCIMProviderGroup):
         """Update existing group"""
-        scim_group = self.to_schema(group, connection)
+        scim_group = self._schema_for(group, connection)
         scim_group.id = connection.scim_id
         try:
             self._request(
@@ -159,6 +169,57 @@ class SCIMGroupClient(SCIMClient[Group, SCIMProviderGroup, SCIMGroupSchema]):
                     return self._patch_remove_users(group, users_set)
             raise exc
 
+    def _bulk_written(
+        self, groups: list[Group], connections: dict[str, SCIMProviderGroup]
+    ) -> list[Group]:
+        """Add members of groups written in bulk with PATCH operations, which are sent
+        in bulk as well. Without PATCH support, members are already part of the group"""
+        if not self._config.patch.supported or not groups:
+            return []
+        memberships = User.ak_groups.through.objects.filter(group__in=groups).values_list(
+            "group_id", "user_id"
+        )
+        members: dict[str, list[int]] = {}
+        for group_pk, user_pk in memberships:
+            members.setdefault(group_pk, []).append(user_pk)
+        user_ids = dict(
+            SCIMProviderUser.objects.filter(
+                provider=self.provider,
+                user__pk__in=[user_pk for users in members.values() for user_pk in users],
+            ).values_list("user_id", "scim_id")
+        )
+        operations: dict[str, tuple[Group, BulkOperation]] = {}
+        for group in groups:
+            connection = connections.get(group.pk)
+            scim_ids = [user_ids[pk] for pk in members.get(group.pk, []) if pk in user_ids]
+            if not connection or not scim_ids:
+                continue
+            for idx, chunk in enumerate(batched(scim_ids, self._config.bulk.maxOperations)):
+                req = PatchRequest(
+                    Operations=[
+                        PatchOperation(
+                            op=PatchOp.add,
+                            path="members",
+                            value=[{"value": x}],
+                        )
+                        for x in chunk
+                    ]
+                )
+                operation = BulkOperation(
+                    method="PATCH",
+                    path=f"/Groups/{connection.scim_id}",
+                    bulkId=f"{group.pk}-members-{idx}",
+                    data=req.model_dump(mode="json"),
+                )
+                operations[operation.bulkId] = (group, operation)
+        results = self._bulk([operation for _, operation in operations.values()])
+        remaining = {}
+        for bulk_id, (group, _) in operations.items():
+            result = results.get(bulk_id)
+            if not result or result.status >= HttpResponseBadRequest.status_code:
+                remaining[group.pk] = group
+        return list(remaining.values())
+
     def _patch(
         self,
         group_id: str,
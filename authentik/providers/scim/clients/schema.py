@@ -1,6 +1,6 @@
 """Custom SCIM schemas"""
 
-from pydantic import Field
+from pydantic import BaseModel, Field
 from pydanticscim.group import Group as BaseGroup
 from pydanticscim.responses import PatchRequest as BasePatchRequest
 from pydanticscim.responses import SCIMError as BaseSCIMError
@@ -13,6 +13,7 @@ from pydanticscim.user import User as BaseUser
 
 SCIM_USER_SCHEMA = "urn:ietf:params:scim:schemas:core:2.0:User"
 SCIM_GROUP_SCHEMA = "urn:ietf:params:scim:schemas:core:2.0:Group"
+SCIM_BULK_REQUEST_SCHEMA = "urn:ietf:params:scim:api:messages:2.0:BulkRequest"
 
 
 class User(BaseUser):
@@ -68,6 +69,47 @@ class PatchRequest(BasePatchRequest):
     schemas: tuple[str] = ("urn:ietf:params:scim:api:messages:2.0:PatchOp",)
 
 
+class BulkOperation(BaseModel):
+    """Single operation of a bulk request"""
+
+    method: str
+    path: str
+    bulkId: str | None = None
+    data: dict | None = None
+
+
+class BulkRequest(BaseModel):
+    """Bulk request, see https://datatracker.ietf.org/doc/html/rfc7644#section-3.7"""
+
+    schemas: tuple[str] = (SCIM_BULK_REQUEST_SCHEMA,)
+    Operations: list[BulkOperation]
+
+
+class BulkResponseOperation(BaseModel):
+    """Result of a single operation of a bulk request"""
+
+    method: str | None = None
+    bulkId: str | None = None
+    location: str | None = None
+    status: int
+    response: dict | None = None
+
+    @property
+    def id(self) -> str | None:
+        """ID of the resource, from the response or the resource's location"""
+        if self.response and self.response.get("id"):
+            return self.response["id"]
+        if self.location:
+            return self.location.rstrip("/").rsplit("/", 1)[-1]
+        return None
+
+
+class BulkResponse(BaseModel):
+    """Bulk response"""
+
+    Operations: list[BulkResponseOperation] = Field(default_factory=list)
+
+
 class SCIMError(BaseSCIMError):
     """SCIM error with optional status code"""
 
@@ -17,6 +17,7 @@ class SCIMUserClient(SCIMClient[User, SCIMProviderUser, SCIMUserSchema]):
 
     connection_type = SCIMProviderUser
     connection_type_query = "user"
+    resource_path = "/Users"
     mapper: PropertyMappingManager
 
     def __init__(self, provider: SCIMProvider):
@@ -48,13 +49,17 @@ class SCIMUserClient(SCIMClient[User, SCIMProviderUser, SCIMUserSchema]):
         if not scim_user:
             self.logger.debug("User does not exist in SCIM, skipping")
             return None
-        response = self._request("DELETE", f"/Users/{scim_user.scim_id}")
+        response = self.delete_remote(scim_user.scim_id)
         scim_user.delete()
         return response
 
+    def delete_remote(self, remote_id: str):
+        """Delete user by SCIM ID"""
+        return self._request("DELETE", f"/Users/{remote_id}")
+
     def create(self, user: User):
         """Create user from scratch and create a connection object"""
-        scim_user = self.to_schema(user, None)
+        scim_user = self._schema_for(user, None)
         response = self._request(
             "POST",
             "/Users",
@@ -70,7 +75,7 @@ class SCIMUserClient(SCIMClient[User, SCIMProviderUser, SCIMUserSchema]):
 
     def update(self, user: User, connection: SCIMProviderUser):
         """Update existing user"""
-        scim_user = self.to_schema(user, connection)
+        scim_user = self._schema_for(user, connection)
         scim_user.id = connection.scim_id
         self._request(
             "PUT",
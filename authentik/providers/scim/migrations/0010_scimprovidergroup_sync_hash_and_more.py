@@ -0,0 +1,23 @@
+# Generated by Django 5.0.8 on 2024-08-20 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authentik_providers_scim", "0009_alter_scimmapping_options"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="scimprovidergroup",
+            name="sync_hash",
+            field=models.TextField(default=None, null=True),
+        ),
+        migrations.AddField(
+            model_name="scimprovideruser",
+            name="sync_hash",
+            field=models.TextField(default=None, null=True),
+        ),
+    ]
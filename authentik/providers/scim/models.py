@@ -22,6 +22,7 @@ class SCIMProviderUser(SerializerModel):
     scim_id = models.TextField()
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     provider = models.ForeignKey("SCIMProvider", on_delete=models.CASCADE)
+    sync_hash = models.TextField(null=True, default=None)
 
     @property
     def serializer(self) -> type[Serializer]:
@@ -43,6 +44,7 @@ class SCIMProviderGroup(SerializerModel):
     scim_id = models.TextField()
     group = models.ForeignKey(Group, on_delete=models.CASCADE)
     provider = models.ForeignKey("SCIMProvider", on_delete=models.CASCADE)
+    sync_hash = models.TextField(null=True, default=None)
 
     @property
     def serializer(self) -> type[Serializer]:
@@ -110,6 +112,15 @@ class SCIMProvider(OutgoingSyncProvider, BackchannelProvider):
             return Group.objects.all().order_by("pk")
         raise ValueError(f"Invalid type {type}")
 
+    def get_remote_ids(self, obj: User | Group) -> list[str]:
+        if isinstance(obj, User):
+            connections = SCIMProviderUser.objects.filter(provider=self, user=obj)
+        elif isinstance(obj, Group):
+            connections = SCIMProviderGroup.objects.filter(provider=self, group=obj)
+        else:
+            raise ValueError(f"Invalid object {obj}")
+        return list(connections.values_list("scim_id", flat=True))
+
     @property
     def component(self) -> str:
         return "ak-provider-scim-form"
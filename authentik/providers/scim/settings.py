@@ -10,4 +10,9 @@ CELERY_BEAT_SCHEDULE = {
         "schedule": crontab(minute=fqdn_rand("scim_sync_all"), hour="*/4"),
         "options": {"queue": "authentik_scheduled"},
     },
+    "providers_scim_sync_journal": {
+        "task": "authentik.providers.scim.tasks.scim_sync_journal",
+        "schedule": crontab(minute="*/5"),
+        "options": {"queue": "authentik_scheduled"},
+    },
 }
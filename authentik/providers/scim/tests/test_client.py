@@ -1,11 +1,14 @@
 """SCIM Client tests"""
 
+from unittest.mock import MagicMock, patch
+
 from django.test import TestCase
 from requests_mock import Mocker
 
 from authentik.blueprints.tests import apply_blueprint
 from authentik.core.models import Application
 from authentik.lib.generators import generate_id
+from authentik.lib.sync.outgoing.exceptions import TransientSyncException
 from authentik.providers.scim.clients.base import SCIMClient
 from authentik.providers.scim.models import SCIMMapping, SCIMProvider
 from authentik.providers.scim.tasks import scim_sync_all
@@ -85,6 +88,28 @@ class SCIMClientTests(TestCase):
             self.assertEqual(mock.call_count, 1)
             self.assertEqual(mock.request_history[0].method, "GET")
 
+    def test_backoff(self):
+        """Test rate-limited requests pause further requests"""
+        with Mocker() as mock:
+            mock: Mocker
+            mock.get(
+                "https://localhost/ServiceProviderConfig",
+                json={},
+            )
+            mock.get(
+                "https://localhost/Users",
+                status_code=429,
+                headers={"Retry-After": "2"},
+            )
+            client = SCIMClient(self.provider)
+            with self.assertRaises(TransientSyncException):
+                client._request("GET", "/Users")
+            sleep = MagicMock()
+            with patch("authentik.lib.sync.outgoing.base.sleep", sleep):
+                client._request("GET", "/ServiceProviderConfig")
+            sleep.assert_called_once()
+            self.assertLessEqual(sleep.call_args.args[0], 2)
+
     def test_scim_sync_all(self):
         """test scim_sync_all task"""
         scim_sync_all()
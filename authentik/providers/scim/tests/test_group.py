@@ -1,15 +1,18 @@
 """SCIM Group tests"""
 
 from json import loads
+from unittest.mock import patch
 
 from django.test import TestCase
 from jsonschema import validate
 from requests_mock import Mocker
 
 from authentik.blueprints.tests import apply_blueprint
+from authentik.core.expression.exceptions import SkipObjectException
 from authentik.core.models import Application, Group, User
 from authentik.lib.generators import generate_id
-from authentik.providers.scim.models import SCIMMapping, SCIMProvider
+from authentik.providers.scim.clients.groups import SCIMGroupClient
+from authentik.providers.scim.models import SCIMMapping, SCIMProvider, SCIMProviderGroup
 
 
 class SCIMGroupTests(TestCase):
@@ -143,8 +146,33 @@ class SCIMGroupTests(TestCase):
                 "displayName": group.name,
             },
         )
-        group.delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            group.delete()
         self.assertEqual(mock.call_count, 4)
         self.assertEqual(mock.request_history[0].method, "GET")
         self.assertEqual(mock.request_history[3].method, "DELETE")
         self.assertEqual(mock.request_history[3].url, f"https://localhost/Groups/{scim_id}")
+
+    @Mocker()
+    def test_group_delta_members(self, mock: Mocker):
+        """Test groups aren't skipped by delta syncs when only their members changed"""
+        mock.get(
+            "https://localhost/ServiceProviderConfig",
+            json={},
+        )
+        mock.post(
+            "https://localhost/Groups",
+            json={
+                "id": generate_id(),
+            },
+        )
+        group = Group.objects.create(name=generate_id())
+        connection = SCIMProviderGroup.objects.get(provider=self.provider, group=group)
+        client = SCIMGroupClient(self.provider)
+        client.delta = True
+        with self.assertRaises(SkipObjectException):
+            client.to_schema(group, connection)
+        with patch("authentik.providers.scim.tasks.scim_sync_journal.apply_async"):
+            user = User.objects.create(username=generate_id())
+        User.ak_groups.through.objects.create(user=user, group=group)
+        client.to_schema(group, connection)
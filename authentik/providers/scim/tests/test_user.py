@@ -1,16 +1,32 @@
 """SCIM User tests"""
 
 from json import loads
+from unittest.mock import MagicMock, patch
 
+from django.db.transaction import atomic, set_rollback
 from django.test import TestCase
 from jsonschema import validate
+from requests.exceptions import ConnectionError as RequestConnectionError
 from requests_mock import Mocker
 
 from authentik.blueprints.tests import apply_blueprint
 from authentik.core.models import Application, Group, User
+from authentik.lib.config import CONFIG
 from authentik.lib.generators import generate_id
-from authentik.providers.scim.models import SCIMMapping, SCIMProvider
-from authentik.providers.scim.tasks import scim_sync, sync_tasks
+from authentik.lib.sync.outgoing.exceptions import (
+    ObjectExistsSyncException,
+    TransientSyncException,
+)
+from authentik.lib.utils.reflection import class_to_path
+from authentik.providers.scim.clients.users import SCIMUserClient
+from authentik.providers.scim.models import SCIMMapping, SCIMProvider, SCIMProviderUser
+from authentik.providers.scim.tasks import (
+    scim_sync,
+    scim_sync_delete,
+    scim_sync_journal,
+    sync_journal,
+    sync_tasks,
+)
 from authentik.tenants.models import Tenant
 
 
@@ -216,6 +232,66 @@ class SCIMUserTests(TestCase):
         self.assertEqual(mock.request_history[2].method, "GET")
         self.assertEqual(mock.request_history[3].method, "PUT")
 
+    @Mocker()
+    def test_user_create_update_coalesced(self, mock: Mocker):
+        """Test multiple changes to a user before the journal is flushed"""
+        scim_id = generate_id()
+        mock: Mocker
+        mock.get(
+            "https://localhost/ServiceProviderConfig",
+            json={},
+        )
+        mock.post(
+            "https://localhost/Users",
+            json={
+                "id": scim_id,
+            },
+        )
+        uid = generate_id()
+        with patch("authentik.providers.scim.tasks.scim_sync_journal.apply_async") as schedule:
+            user = User.objects.create(
+                username=uid,
+                name=f"{uid} {uid}",
+                email=f"{uid}@goauthentik.io",
+            )
+            user.name = uid
+            user.save()
+            user.save()
+        self.assertEqual(schedule.call_count, 1)
+        self.assertEqual(mock.call_count, 0)
+        scim_sync_journal.delay().get()
+        self.assertEqual(mock.call_count, 2)
+        self.assertEqual(mock.request_history[0].method, "GET")
+        self.assertEqual(mock.request_history[1].method, "POST")
+        body = loads(mock.request_history[1].body)
+        self.assertEqual(body["displayName"], uid)
+
+    @Mocker()
+    def test_user_journal_errors(self, mock: Mocker):
+        """Test errors of single objects don't affect other objects of the journal, and objects
+        which failed with a transient error are added back to the journal"""
+        mock.get(
+            "https://localhost/ServiceProviderConfig",
+            json={},
+        )
+        with patch("authentik.providers.scim.tasks.scim_sync_journal.apply_async"):
+            exists = User.objects.create(username=generate_id())
+            transient = User.objects.create(username=generate_id())
+            synced = User.objects.create(username=generate_id())
+        written = []
+
+        def write(obj: User):
+            if obj == exists:
+                raise ObjectExistsSyncException()
+            if obj == transient:
+                raise TransientSyncException()
+            written.append(obj)
+
+        with patch("authentik.providers.scim.clients.users.SCIMUserClient.write", write):
+            scim_sync_journal.delay().get()
+        self.assertEqual(written, [synced])
+        self.assertEqual(sync_journal.pop(), [(class_to_path(User), str(transient.pk))])
+
     @Mocker()
     def test_user_create_delete(self, mock: Mocker):
         """Test user creation"""
@@ -262,12 +338,75 @@ class SCIMUserTests(TestCase):
                 "userName": uid,
             },
         )
-        user.delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            user.delete()
         self.assertEqual(mock.call_count, 4)
         self.assertEqual(mock.request_history[0].method, "GET")
         self.assertEqual(mock.request_history[3].method, "DELETE")
         self.assertEqual(mock.request_history[3].url, f"https://localhost/Users/{scim_id}")
 
+    @Mocker()
+    def test_user_delete_background(self, mock: Mocker):
+        """Test user deletion doesn't wait for the remote system"""
+        scim_id = generate_id()
+        mock.get(
+            "https://localhost/ServiceProviderConfig",
+            json={},
+        )
+        mock.post(
+            "https://localhost/Users",
+            json={
+                "id": scim_id,
+            },
+        )
+        mock.delete(f"https://localhost/Users/{scim_id}", status_code=204)
+        uid = generate_id()
+        user = User.objects.create(
+            username=uid,
+            name=f"{uid} {uid}",
+            email=f"{uid}@goauthentik.io",
+        )
+        self.assertEqual(mock.call_count, 2)
+        with patch("authentik.providers.scim.tasks.scim_sync_delete.delay") as delete:
+            with self.captureOnCommitCallbacks(execute=True):
+                user.delete()
+        self.assertEqual(mock.call_count, 2)
+        delete.assert_called_once_with(self.provider.pk, class_to_path(User), scim_id)
+        # The remote ID is all that's required once the user has been deleted
+        scim_sync_delete.delay(*delete.call_args.args).get()
+        self.assertEqual(mock.call_count, 4)
+        self.assertEqual(mock.request_history[3].method, "DELETE")
+        self.assertEqual(mock.request_history[3].url, f"https://localhost/Users/{scim_id}")
+
+    @Mocker()
+    def test_user_delete_rollback(self, mock: Mocker):
+        """Test remote user isn't deleted when the deletion is rolled back"""
+        mock.get(
+            "https://localhost/ServiceProviderConfig",
+            json={},
+        )
+        mock.post(
+            "https://localhost/Users",
+            json={
+                "id": generate_id(),
+            },
+        )
+        uid = generate_id()
+        user = User.objects.create(
+            username=uid,
+            name=f"{uid} {uid}",
+            email=f"{uid}@goauthentik.io",
+        )
+        with (
+            patch("authentik.providers.scim.tasks.scim_sync_delete.delay") as delete,
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            with atomic():
+                user.delete()
+                set_rollback(True)
+        delete.assert_not_called()
+        self.assertTrue(User.objects.filter(pk=user.pk).exists())
+
     @Mocker()
     def test_sync_task(self, mock: Mocker):
         """Test sync tasks"""
@@ -330,3 +469,218 @@ class SCIMUserTests(TestCase):
                 "userName": uid,
             },
         )
+
+    @Mocker()
+    def test_sync_task_delta(self, mock: Mocker):
+        """Test scheduled syncs only write changed objects between full syncs"""
+        scim_id = generate_id()
+        uid = generate_id()
+        mock.get(
+            "https://localhost/ServiceProviderConfig",
+            json={},
+        )
+        mock.post(
+            "https://localhost/Users",
+            json={
+                "id": scim_id,
+            },
+        )
+        mock.put(
+            f"https://localhost/Users/{scim_id}",
+            json={
+                "id": scim_id,
+            },
+        )
+        user = User.objects.create(
+            username=uid,
+            name=f"{uid} {uid}",
+            email=f"{uid}@goauthentik.io",
+        )
+        self.assertIsNotNone(
+            SCIMProviderUser.objects.get(provider=self.provider, user=user).sync_hash
+        )
+
+        def user_writes():
+            return len([req for req in mock.request_history if req.method in ["POST", "PUT"]])
+
+        # First sync is a full sync
+        sync_tasks.trigger_single_task(self.provider, scim_sync).get()
+        self.assertEqual(user_writes(), 2)
+        # Nothing changed
+        sync_tasks.trigger_single_task(self.provider, scim_sync).get()
+        self.assertEqual(user_writes(), 2)
+        # Changed outside of signals
+        User.objects.filter(pk=user.pk).update(name=uid)
+        sync_tasks.trigger_single_task(self.provider, scim_sync).get()
+        self.assertEqual(user_writes(), 3)
+        self.assertEqual(mock.request_history[-1].method, "PUT")
+
+    @Mocker()
+    def test_sync_task_bulk(self, mock: Mocker):
+        """Test sync tasks with bulk support"""
+        mock.get(
+            "https://localhost/ServiceProviderConfig",
+            json={
+                "schemas": ["urn:ietf:params:scim:schemas:core:2.0:ServiceProviderConfig"],
+                "authenticationSchemes": [],
+                "patch": {"supported": False},
+                "bulk": {"supported": True, "maxOperations": 2, "maxPayloadSize": 1048576},
+                "filter": {"supported": False},
+                "changePassword": {"supported": False},
+                "sort": {"supported": False},
+                "etag": {"supported": False},
+            },
+        )
+
+        def bulk_response(request, context):
+            return {
+                "schemas": ["urn:ietf:params:scim:api:messages:2.0:BulkResponse"],
+                "Operations": [
+                    {
+                        "method": "POST",
+                        "bulkId": op["bulkId"],
+                        "location": f"https://localhost/Users/scim-{op['bulkId']}",
+                        "status": "201",
+                    }
+                    for op in request.json()["Operations"]
+                ],
+            }
+
+        mock.post("https://localhost/Bulk", json=bulk_response)
+        with patch("authentik.providers.scim.tasks.scim_sync_journal.apply_async"):
+            users = [User.objects.create(username=generate_id()) for _ in range(3)]
+
+        sync_tasks.trigger_single_task(self.provider, scim_sync).get()
+
+        bulk_requests = [req for req in mock.request_history if req.url.endswith("/Bulk")]
+        self.assertEqual(len(bulk_requests), 2)
+        self.assertEqual(len(bulk_requests[0].json()["Operations"]), 2)
+        self.assertEqual(len(bulk_requests[1].json()["Operations"]), 1)
+        self.assertEqual(bulk_requests[0].json()["Operations"][0]["path"], "/Users")
+        for user in users:
+            self.assertEqual(
+                SCIMProviderUser.objects.get(provider=self.provider, user=user).scim_id,
+                f"scim-{user.pk}",
+            )
+
+    @Mocker()
+    def test_sync_task_bulk_connection_error(self, mock: Mocker):
+        """Test objects are written individually when bulk requests fail to be sent"""
+        mock.get(
+            "https://localhost/ServiceProviderConfig",
+            json={
+                "schemas": ["urn:ietf:params:scim:schemas:core:2.0:ServiceProviderConfig"],
+                "authenticationSchemes": [],
+                "patch": {"supported": False},
+                "bulk": {"supported": True, "maxOperations": 2, "maxPayloadSize": 1048576},
+                "filter": {"supported": False},
+                "changePassword": {"supported": False},
+                "sort": {"supported": False},
+                "etag": {"supported": False},
+            },
+        )
+        mock.post("https://localhost/Bulk", exc=RequestConnectionError)
+
+        def user_response(request, context):
+            return {"id": f"scim-{request.json()['externalId']}"}
+
+        mock.post("https://localhost/Users", json=user_response)
+        with patch("authentik.providers.scim.tasks.scim_sync_journal.apply_async"):
+            users = [User.objects.create(username=generate_id()) for _ in range(3)]
+
+        sync_tasks.trigger_single_task(self.provider, scim_sync).get()
+
+        for user in users:
+            self.assertEqual(
+                SCIMProviderUser.objects.get(provider=self.provider, user=user).scim_id,
+                f"scim-{user.uid}",
+            )
+
+    @Mocker()
+    def test_sync_task_bulk_missing_id(self, mock: Mocker):
+        """Test objects created without an ID in the bulk response are written individually,
+        without evaluating their mappings again"""
+        mock.get(
+            "https://localhost/ServiceProviderConfig",
+            json={
+                "schemas": ["urn:ietf:params:scim:schemas:core:2.0:ServiceProviderConfig"],
+                "authenticationSchemes": [],
+                "patch": {"supported": False},
+                "bulk": {"supported": True, "maxOperations": 2, "maxPayloadSize": 1048576},
+                "filter": {"supported": False},
+                "changePassword": {"supported": False},
+                "sort": {"supported": False},
+                "etag": {"supported": False},
+            },
+        )
+
+        def bulk_response(request, context):
+            return {
+                "schemas": ["urn:ietf:params:scim:api:messages:2.0:BulkResponse"],
+                "Operations": [
+                    {"method": "POST", "bulkId": op["bulkId"], "status": "201"}
+                    for op in request.json()["Operations"]
+                ],
+            }
+
+        def user_response(request, context):
+            return {"id": f"scim-{request.json()['externalId']}"}
+
+        mock.post("https://localhost/Bulk", json=bulk_response)
+        mock.post("https://localhost/Users", json=user_response)
+        with patch("authentik.providers.scim.tasks.scim_sync_journal.apply_async"):
+            users = [User.objects.create(username=generate_id()) for _ in range(3)]
+
+        with patch(
+            "authentik.providers.scim.clients.users.SCIMUserClient.to_schema",
+            autospec=True,
+            side_effect=SCIMUserClient.to_schema,
+        ) as to_schema:
+            sync_tasks.trigger_single_task(self.provider, scim_sync).get()
+
+        users_requests = [req for req in mock.request_history if req.url.endswith("/Users")]
+        self.assertEqual(len(users_requests), 3)
+        self.assertEqual(
+            len([call for call in to_schema.call_args_list if call.args[1] in users]), 3
+        )
+        for user in users:
+            self.assertEqual(
+                SCIMProviderUser.objects.get(provider=self.provider, user=user).scim_id,
+                f"scim-{user.uid}",
+            )
+
+    def test_sync_pages_window(self):
+        """Test the next page is synced as soon as any page is done, even while an earlier page
+        is still being synced"""
+        started = []
+        last_page = 3
+
+        class Result:
+            def __init__(self, page: int):
+                self.page = page
+
+            def ready(self):
+                # The first page is only done once the last page has been started
+                return self.page != 1 or last_page in started
+
+            def get(self):
+                return []
+
+        def apply_async(args, kwargs, **_):
+            started.append(args[1])
+            return Result(args[1])
+
+        sync_objects = MagicMock(apply_async=apply_async)
+        paginator = MagicMock(page_range=range(1, last_page + 1))
+        with (
+            CONFIG.patch("outgoing_sync.page_concurrency", 2),
+            patch("authentik.lib.sync.outgoing.tasks.sleep"),
+        ):
+            messages = sync_tasks._sync_pages(
+                sync_objects, User, paginator, self.provider.pk, False
+            )
+        self.assertEqual(started, [1, 2, last_page])
+        self.assertEqual(
+            [str(msg) for msg in messages],
+            [f"Syncing page {page} of users" for page in range(1, last_page + 1)],
+        )
@@ -16,6 +16,7 @@ from celery.signals import (
     task_internal_error,
     task_postrun,
     task_prerun,
+    worker_process_shutdown,
     worker_ready,
 )
 from django.conf import settings
@@ -132,6 +133,14 @@ def worker_ready_hook(*args, **kwargs):
     start_blueprint_watcher()
 
 
+@worker_process_shutdown.connect
+def worker_process_shutdown_hook(*args, **kwargs):
+    """Write buffered events before the pool process exits"""
+    from authentik.events.buffer import EVENT_BUFFER
+
+    EVENT_BUFFER.flush()
+
+
 class LivenessProbe(bootsteps.StartStopStep):
     """Add a timed task to touch a temporary file for healthchecking reasons"""
 
@@ -1,9 +1,9 @@
 """websocket Message consumer"""
 
 from channels.generic.websocket import JsonWebsocketConsumer
-from django.core.cache import cache
+from django_redis import get_redis_connection
 
-from authentik.root.messages.storage import CACHE_PREFIX
+from authentik.root.messages.storage import session_channels_key
 
 
 class MessageConsumer(JsonWebsocketConsumer):
@@ -17,10 +17,12 @@ class MessageConsumer(JsonWebsocketConsumer):
         self.session_key = self.scope["session"].session_key
         if not self.session_key:
             return
-        cache.set(f"{CACHE_PREFIX}{self.session_key}_messages_{self.channel_name}", True, None)
+        get_redis_connection().sadd(session_channels_key(self.session_key), self.channel_name)
 
     def disconnect(self, code):
-        cache.delete(f"{CACHE_PREFIX}{self.session_key}_messages_{self.channel_name}")
+        if not self.session_key:
+            return
+        get_redis_connection().srem(session_channels_key(self.session_key), self.channel_name)
 
     def event_update(self, event: dict):
         """Event handler which is called by Messages Storage backend"""
@@ -6,11 +6,18 @@ from django.contrib.messages.storage.base import Message
 from django.contrib.messages.storage.session import SessionStorage
 from django.core.cache import cache
 from django.http.request import HttpRequest
+from django_redis import get_redis_connection
 
 SESSION_KEY = "_messages"
 CACHE_PREFIX = "goauthentik.io/root/messages_"
 
 
+def session_channels_key(session_key: str) -> str:
+    """Key of the redis set which holds the channel names of all open
+    websocket connections of a session"""
+    return cache.make_key(f"{CACHE_PREFIX}{session_key}_messages")
+
+
 class ChannelsStorage(SessionStorage):
     """Send contrib.messages over websocket"""
 
@@ -19,17 +26,17 @@ class ChannelsStorage(SessionStorage):
         self.channel = get_channel_layer()
 
     def _store(self, messages: list[Message], response, *args, **kwargs):
-        prefix = f"{CACHE_PREFIX}{self.request.session.session_key}_messages_"
-        keys = cache.keys(f"{prefix}*")
+        channels = get_redis_connection().smembers(
+            session_channels_key(self.request.session.session_key)
+        )
         # if no active connections are open, fallback to storing messages in the
         # session, so they can always be retrieved
-        if len(keys) < 1:
+        if len(channels) < 1:
             return super()._store(messages, response, *args, **kwargs)
-        for key in keys:
-            uid = key.replace(prefix, "")
+        for uid in channels:
             for message in messages:
                 async_to_sync(self.channel.send)(
-                    uid,
+                    uid.decode(),
                     {
                         "type": "event.update",
                         "message_type": "message",
@@ -0,0 +1,199 @@
+"""authentik LDAP sync benchmark command"""
+
+from contextlib import contextmanager
+from itertools import product
+from json import dumps
+from sys import stdout
+from time import perf_counter
+from unittest.mock import patch
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from ldap3 import MOCK_SYNC, OFFLINE_SLAPD_2_4, Connection, Server
+from structlog.stdlib import get_logger
+
+from authentik import __version__
+from authentik.core.models import Group, User
+from authentik.lib.config import CONFIG
+from authentik.lib.generators import generate_id
+from authentik.sources.ldap.models import LDAPSource, LDAPSourcePropertyMapping
+from authentik.sources.ldap.sync.base import BaseLDAPSynchronizer
+from authentik.sources.ldap.sync.groups import GroupLDAPSynchronizer
+from authentik.sources.ldap.sync.membership import MembershipLDAPSynchronizer
+from authentik.sources.ldap.sync.users import UserLDAPSynchronizer
+
+LOGGER = get_logger()
+
+BASE_DN = "dc=benchmark,dc=goauthentik,dc=io"
+# Indexes for the lookups of the LDAP sync, which are removed for runs without indexes
+LDAP_INDEXES = {
+    User: ("authentik_c_user_ldap_uniq_idx", "authentik_c_user_ldap_dn_idx"),
+    Group: ("authentik_c_grp_ldap_uniq_idx",),
+}
+INDEX_MODES = ("with", "without")
+# Phases of a run, with the synchronizer used by each
+PHASES = {
+    "users_initial": UserLDAPSynchronizer,
+    "users_unchanged": UserLDAPSynchronizer,
+    "groups": GroupLDAPSynchronizer,
+    "membership": MembershipLDAPSynchronizer,
+}
+
+
+def mock_directory(users: int) -> Connection:
+    """In-memory directory with `users` users, which are all members of a single group"""
+    password = generate_id()
+    server = Server("benchmark", get_info=OFFLINE_SLAPD_2_4)
+    ldap = Connection(
+        server, user=f"cn=admin,{BASE_DN}", password=password, client_strategy=MOCK_SYNC
+    )
+    ldap.strategy.add_entry(f"cn=admin,{BASE_DN}", {"userPassword": password})
+    members = []
+    for idx in range(users):
+        user_dn = f"cn=user{idx},ou=users,{BASE_DN}"
+        ldap.strategy.add_entry(
+            user_dn,
+            {
+                "cn": f"user{idx}",
+                "uid": f"benchmark-user-{idx}",
+                "objectClass": "person",
+            },
+        )
+        members.append(user_dn)
+    ldap.strategy.add_entry(
+        f"cn=group,ou=groups,{BASE_DN}",
+        {
+            "cn": "benchmark-group",
+            "uid": "benchmark-group",
+            "objectClass": "groupOfNames",
+            "member": members,
+        },
+    )
+    ldap.bind()
+    return ldap
+
+
+def create_source() -> LDAPSource:
+    """LDAP source with minimal property mappings"""
+    source = LDAPSource.objects.create(
+        name=generate_id(),
+        slug=generate_id(),
+        base_dn=BASE_DN,
+        additional_user_dn="ou=users",
+        additional_group_dn="ou=groups",
+        object_uniqueness_field="uid",
+        group_object_filter="(objectClass=groupOfNames)",
+    )
+    source.user_property_mappings.add(
+        LDAPSourcePropertyMapping.objects.create(
+            name=generate_id(),
+            expression='return {"username": ldap.get("uid"), "name": ldap.get("cn")}',
+        )
+    )
+    source.group_property_mappings.add(
+        LDAPSourcePropertyMapping.objects.create(
+            name=generate_id(),
+            expression='return {"name": ldap.get("cn")}',
+        )
+    )
+    return source
+
+
+@contextmanager
+def measure_queries(stats: dict):
+    """Count database queries and the time spent executing them"""
+
+    def wrapper(execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            stats["db_seconds"] += perf_counter() - start
+            stats["queries"] += 1
+
+    with connection.execute_wrapper(wrapper):
+        yield
+
+
+def remove_indexes():
+    """Remove the indexes used by the LDAP sync, within the current transaction"""
+    with connection.schema_editor() as editor:
+        for model, names in LDAP_INDEXES.items():
+            for index in model._meta.indexes:
+                if index.name in names:
+                    editor.remove_index(model, index)
+
+
+def run_sync(synchronizer: BaseLDAPSynchronizer):
+    """Sync all pages"""
+    for page in synchronizer.get_objects():
+        synchronizer.sync(page)
+
+
+class Command(BaseCommand):
+    """Benchmark LDAP source sync"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-u",
+            "--users",
+            nargs="+",
+            type=int,
+            default=[100, 1000, 10000],
+            help="Count of users in the directory, a run is done for each count.",
+        )
+        parser.add_argument("--indexes", nargs="+", choices=INDEX_MODES, default=INDEX_MODES)
+        parser.add_argument("-o", "--output", help="Write JSON results to file instead of stdout.")
+
+    def benchmark(self, users: int, indexes: str) -> dict:
+        """Run all phases in a transaction which is rolled back, so nothing of the run
+        (including removed indexes) persists"""
+        results = {}
+        ldap = mock_directory(users)
+        with (
+            transaction.atomic(),
+            patch("authentik.sources.ldap.models.LDAPSource.connection", return_value=ldap),
+        ):
+            if indexes == "without":
+                remove_indexes()
+            source = create_source()
+            for phase, synchronizer in PHASES.items():
+                stats = {"db_seconds": 0.0, "queries": 0}
+                start = perf_counter()
+                with measure_queries(stats):
+                    run_sync(synchronizer(source))
+                stats["seconds"] = perf_counter() - start
+                results[phase] = stats
+                # Update planner statistics with the synced objects
+                with connection.cursor() as cursor:
+                    cursor.execute(f"ANALYZE {User._meta.db_table}, {Group._meta.db_table}")
+            transaction.set_rollback(True)
+        return results
+
+    def handle(self, *args, **options):
+        """Start benchmark"""
+        if any(users < 1 for users in options["users"]):
+            raise CommandError("At least one user is required")
+        results = []
+        for users, indexes in product(options["users"], options["indexes"]):
+            LOGGER.info("Running benchmark", users=users, indexes=indexes)
+            results.append(
+                {
+                    "users": users,
+                    "indexes": indexes,
+                    "phases": self.benchmark(users, indexes),
+                }
+            )
+        output = dumps(
+            {
+                "version": __version__,
+                "page_size": CONFIG.get_int("ldap.page_size", 50),
+                "results": results,
+            },
+            indent=4,
+        )
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as _file:
+                _file.write(output)
+        else:
+            stdout.write(output + "\n")
@@ -1,5 +1,7 @@
 """LDAP Sync"""
 
+from itertools import chain
+
 from structlog.stdlib import get_logger
 
 from authentik.sources.ldap.models import LDAPSource
@@ -24,10 +26,10 @@ class Command(TenantCommand):
             if not source:
                 LOGGER.warning("Source does not exist", slug=source_slug)
                 continue
-            tasks = (
-                ldap_sync_paginator(source, UserLDAPSynchronizer)
-                + ldap_sync_paginator(source, GroupLDAPSynchronizer)
-                + ldap_sync_paginator(source, MembershipLDAPSynchronizer)
+            tasks = chain(
+                ldap_sync_paginator(source, UserLDAPSynchronizer),
+                ldap_sync_paginator(source, GroupLDAPSynchronizer),
+                ldap_sync_paginator(source, MembershipLDAPSynchronizer),
             )
             for task in tasks:
                 task()
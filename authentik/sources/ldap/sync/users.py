@@ -1,8 +1,11 @@
 """Sync LDAP Users into authentik"""
 
 from collections.abc import Generator
+from typing import Any
 
 from django.core.exceptions import FieldError
+from django.db import router, transaction
+from django.db.models.signals import post_save
 from django.db.utils import IntegrityError
 from ldap3 import ALL_ATTRIBUTES, ALL_OPERATIONAL_ATTRIBUTES, SUBTREE
 
@@ -49,11 +52,13 @@ class UserLDAPSynchronizer(BaseLDAPSynchronizer):
         )
 
     def sync(self, page_data: list) -> int:
-        """Iterate over all LDAP Users and create authentik_core.User instances"""
+        """Iterate over all LDAP Users and create authentik_core.User instances. Existing users
+        of the page are fetched with a single query, and only new and changed users are written,
+        with bulk queries."""
         if not self._source.sync_users:
             self.message("User syncing is disabled for this Source")
             return -1
-        user_count = 0
+        entries = []
         for user in page_data:
             if "attributes" not in user:
                 continue
@@ -82,27 +87,111 @@ class UserLDAPSynchronizer(BaseLDAPSynchronizer):
                 self._logger.debug("Writing user with attributes", **defaults)
                 if "username" not in defaults:
                     raise IntegrityError("Username was not set by propertymappings")
-                ak_user, created = User.update_or_create_attributes(
-                    {f"attributes__{LDAP_UNIQUENESS}": uniq}, defaults
-                )
             except PropertyMappingExpressionException as exc:
                 raise StopSync(exc, None, exc.mapping) from exc
             except SkipObjectException:
                 continue
             except (IntegrityError, FieldError, TypeError, AttributeError) as exc:
-                Event.new(
-                    EventAction.CONFIGURATION_ERROR,
-                    message=(
-                        f"Failed to create user: {str(exc)} "
-                        "To merge new user with existing user, set the user's "
-                        f"Attribute '{LDAP_UNIQUENESS}' to '{uniq}'"
-                    ),
-                    source=self._source,
-                    dn=user_dn,
-                ).save()
+                self._sync_error(exc, uniq, user_dn)
+                continue
+            entries.append((uniq, user_dn, attributes, defaults))
+        return self._sync_entries(entries)
+
+    def _sync_entries(self, entries: list[tuple[Any, str, dict, dict]]) -> int:
+        """Create or update users from their uniqueness value, DN, LDAP attributes
+        and mapped properties"""
+        users: dict[Any, User] = {}
+        for ak_user in User.objects.filter(
+            **{f"attributes__{LDAP_UNIQUENESS}__in": [uniq for uniq, *_ in entries]}
+        ).order_by("pk"):
+            users.setdefault(ak_user.attributes.get(LDAP_UNIQUENESS), ak_user)
+        ms_ad = MicrosoftActiveDirectory(self._source)
+        freeipa = FreeIPA(self._source)
+        field_names = [field.name for field in User._meta.concrete_fields]
+        # Users to write by uniqueness value, with their DN
+        new: dict[Any, tuple[User, str]] = {}
+        changed: dict[Any, tuple[User, str]] = {}
+        changed_fields = set()
+        user_count = 0
+        for uniq, user_dn, attributes, defaults in entries:
+            ak_user = users.get(uniq)
+            try:
+                if ak_user:
+                    current = {name: getattr(ak_user, name) for name in field_names}
+                    ak_user.apply_attributes(defaults)
+                else:
+                    current = {}
+                    ak_user = User(**defaults)
+                    users[uniq] = ak_user
+            except (FieldError, TypeError, AttributeError) as exc:
+                self._sync_error(exc, uniq, user_dn)
+                continue
+            # Users which are written by this page are still being added
+            created = ak_user._state.adding
+            ms_ad.sync(attributes, ak_user, created)
+            freeipa.sync(attributes, ak_user, created)
+            user_count += 1
+            if created:
+                new[uniq] = (ak_user, user_dn)
+                continue
+            fields = [name for name in field_names if getattr(ak_user, name) != current[name]]
+            if not fields:
+                self._logger.debug("User unchanged", user=ak_user.username)
+                continue
+            changed[uniq] = (ak_user, user_dn)
+            changed_fields.update(fields)
+        failed = self._write(new, None)
+        failed += self._write(changed, sorted(changed_fields))
+        return user_count - failed
+
+    def _write(self, users: dict[Any, tuple[User, str]], fields: list[str] | None) -> int:
+        """Create (without `fields`) or update `users` with a single query. As bulk queries don't
+        send signals, `post_save` is sent for each user. If the query fails, for example as a
+        username is already taken, users are saved individually. Returns the amount of users
+        which could not be saved"""
+        if not users:
+            return 0
+        try:
+            with transaction.atomic():
+                if fields is None:
+                    User.objects.bulk_create([ak_user for ak_user, _ in users.values()])
+                else:
+                    User.objects.bulk_update([ak_user for ak_user, _ in users.values()], fields)
+        except IntegrityError:
+            self._logger.debug("Failed to write users in bulk, falling back to single writes")
+        else:
+            for ak_user, _ in users.values():
+                post_save.send(
+                    sender=User,
+                    instance=ak_user,
+                    created=fields is None,
+                    update_fields=frozenset(fields) if fields else None,
+                    raw=False,
+                    using=router.db_for_write(User),
+                )
+                self._logger.debug("Synced User", user=ak_user.username, created=fields is None)
+            return 0
+        failed = 0
+        for uniq, (ak_user, user_dn) in users.items():
+            try:
+                with transaction.atomic():
+                    ak_user.save()
+            except IntegrityError as exc:
+                self._sync_error(exc, uniq, user_dn)
+                failed += 1
             else:
-                self._logger.debug("Synced User", user=ak_user.username, created=created)
-                user_count += 1
-                MicrosoftActiveDirectory(self._source).sync(attributes, ak_user, created)
-                FreeIPA(self._source).sync(attributes, ak_user, created)
-        return user_count
+                self._logger.debug("Synced User", user=ak_user.username, created=fields is None)
+        return failed
+
+    def _sync_error(self, exc: Exception, uniq: Any, user_dn: str):
+        """Report a user which could not be synced"""
+        Event.new(
+            EventAction.CONFIGURATION_ERROR,
+            message=(
+                f"Failed to create user: {str(exc)} "
+                "To merge new user with existing user, set the user's "
+                f"Attribute '{LDAP_UNIQUENESS}' to '{uniq}'"
+            ),
+            source=self._source,
+            dn=user_dn,
+        ).save()
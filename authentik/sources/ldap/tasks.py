@@ -1,8 +1,12 @@
 """LDAP Sync tasks"""
 
+from collections import deque
+from collections.abc import Iterator
+from pickle import dumps, loads  # nosec
 from uuid import uuid4
+from zlib import compress, decompress
 
-from celery import chain, group
+from celery import Signature
 from django.core.cache import cache
 from ldap3.core.exceptions import LDAPException
 from structlog.stdlib import get_logger
@@ -29,6 +33,14 @@ SYNC_CLASSES = [
 ]
 CACHE_KEY_PREFIX = "goauthentik.io/sources/ldap/page/"
 CACHE_KEY_STATUS = "goauthentik.io/sources/ldap/status/"
+CACHE_KEY_STREAM = "goauthentik.io/sources/ldap/stream/"
+# Synchronizers of each stage, a stage is started once all pages of the previous one are synced
+SYNC_STAGES = [
+    # User and group sync can happen at once, they have no dependencies on each other
+    [UserLDAPSynchronizer, GroupLDAPSynchronizer],
+    # Membership sync needs to run afterwards
+    [MembershipLDAPSynchronizer],
+]
 
 
 @CELERY_APP.task()
@@ -69,30 +81,72 @@ def ldap_sync_single(source_pk: str):
             return
         # Delete all sync tasks from the cache
         DBSystemTask.objects.filter(name="ldap_sync", uid__startswith=source.slug).delete()
-        task = chain(
-            # User and group sync can happen at once, they have no dependencies on each other
-            group(
-                ldap_sync_paginator(source, UserLDAPSynchronizer)
-                + ldap_sync_paginator(source, GroupLDAPSynchronizer),
-            ),
-            # Membership sync needs to run afterwards
-            group(
-                ldap_sync_paginator(source, MembershipLDAPSynchronizer),
-            ),
+        ldap_sync_stage(str(source.pk), 0)
+
+
+@CELERY_APP.task(
+    soft_time_limit=(60 * 60 * CONFIG.get_int("ldap.task_timeout_hours")) * 2.5,
+    task_time_limit=(60 * 60 * CONFIG.get_int("ldap.task_timeout_hours")) * 2.5,
+)
+def ldap_sync_stage(source_pk: str, stage: int):
+    """Sync pages of all synchronizers of a stage while they are being fetched, taking turns
+    between synchronizers. Pages are synced by other tasks while at most `ldap.page_concurrency`
+    pages are pending, further pages are synced by this task itself instead of waiting for other
+    tasks. The next stage is started by whichever task finishes the last page"""
+    source: LDAPSource = LDAPSource.objects.filter(pk=source_pk).first()
+    if not source:
+        return
+    limit = max(CONFIG.get_int("ldap.page_concurrency", 4), 1)
+    stream = CACHE_KEY_STREAM + str(uuid4())
+    # Pending pages, plus one for this task so the next stage can't start before all pages
+    # have been fetched
+    cache.set(stream, 1, 60 * 60 * CONFIG.get_int("ldap.task_timeout_hours") * 2.5)
+    try:
+        paginators = deque(
+            ldap_sync_paginator(source, sync, stream=stream, stage=stage)
+            for sync in SYNC_STAGES[stage]
         )
-        task()
+        while paginators:
+            paginator = paginators.popleft()
+            signature = next(paginator, None)
+            if signature is None:
+                continue
+            paginators.append(paginator)
+            if cache.incr(stream) - 1 > limit:
+                signature.apply()
+            else:
+                signature.apply_async()
+    finally:
+        ldap_sync_stage_release(source_pk, stream, stage)
+
 
+def ldap_sync_stage_release(source_pk: str, stream: str, stage: int):
+    """Release a reference to the pages of a stage, and start the next stage after the last"""
+    try:
+        if cache.decr(stream) > 0:
+            return
+    except ValueError:
+        LOGGER.warning("LDAP sync stage expired", stage=stage)
+        return
+    cache.delete(stream)
+    if stage + 1 < len(SYNC_STAGES):
+        ldap_sync_stage.delay(source_pk, stage + 1)
 
-def ldap_sync_paginator(source: LDAPSource, sync: type[BaseLDAPSynchronizer]) -> list:
-    """Return a list of task signatures with LDAP pagination data"""
+
+def ldap_sync_paginator(
+    source: LDAPSource, sync: type[BaseLDAPSynchronizer], **kwargs
+) -> Iterator[Signature]:
+    """Yield a task signature for each page of LDAP objects. Pages are only fetched (and
+    stored) when the next signature is requested. `kwargs` are passed to the task"""
     sync_inst: BaseLDAPSynchronizer = sync(source)
-    signatures = []
     for page in sync_inst.get_objects():
         page_cache_key = CACHE_KEY_PREFIX + str(uuid4())
-        cache.set(page_cache_key, page, 60 * 60 * CONFIG.get_int("ldap.task_timeout_hours"))
-        page_sync = ldap_sync.si(str(source.pk), class_to_path(sync), page_cache_key)
-        signatures.append(page_sync)
-    return signatures
+        cache.set(
+            page_cache_key,
+            compress(dumps(page)),
+            60 * 60 * CONFIG.get_int("ldap.task_timeout_hours"),
+        )
+        yield ldap_sync.si(str(source.pk), class_to_path(sync), page_cache_key, **kwargs)
 
 
 @CELERY_APP.task(
@@ -101,7 +155,14 @@ def ldap_sync_paginator(source: LDAPSource, sync: type[BaseLDAPSynchronizer]) ->
     soft_time_limit=60 * 60 * CONFIG.get_int("ldap.task_timeout_hours"),
     task_time_limit=60 * 60 * CONFIG.get_int("ldap.task_timeout_hours"),
 )
-def ldap_sync(self: SystemTask, source_pk: str, sync_class: str, page_cache_key: str):
+def ldap_sync(
+    self: SystemTask,
+    source_pk: str,
+    sync_class: str,
+    page_cache_key: str,
+    stream: str | None = None,
+    stage: int = 0,
+):
     """Synchronization of an LDAP Source"""
     self.result_timeout_hours = CONFIG.get_int("ldap.task_timeout_hours")
     source: LDAPSource = LDAPSource.objects.filter(pk=source_pk).first()
@@ -115,6 +176,8 @@ def ldap_sync(self: SystemTask, source_pk: str, sync_class: str, page_cache_key:
     try:
         sync_inst: BaseLDAPSynchronizer = sync(source)
         page = cache.get(page_cache_key)
+        if page:
+            page = loads(decompress(page))  # nosec
         if not page:
             error_message = (
                 f"Could not find page in cache: {page_cache_key}. "
@@ -123,7 +186,6 @@ def ldap_sync(self: SystemTask, source_pk: str, sync_class: str, page_cache_key:
             LOGGER.warning(error_message)
             self.set_status(TaskStatus.ERROR, error_message)
             return
-        cache.touch(page_cache_key)
         count = sync_inst.sync(page)
         messages = sync_inst.messages
         messages.append(f"Synced {count} objects.")
@@ -131,8 +193,12 @@ def ldap_sync(self: SystemTask, source_pk: str, sync_class: str, page_cache_key:
             TaskStatus.SUCCESSFUL,
             *messages,
         )
-        cache.delete(page_cache_key)
     except (LDAPException, StopSync) as exc:
         # No explicit event is created here as .set_status with an error will do that
         LOGGER.warning(exception_to_string(exc))
         self.set_error(exc)
+    finally:
+        # Pages are only synced once, don't keep them around until they expire
+        cache.delete(page_cache_key)
+        if stream:
+            ldap_sync_stage_release(source_pk, stream, stage)
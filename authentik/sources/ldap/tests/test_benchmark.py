@@ -0,0 +1,32 @@
+"""LDAP sync benchmark tests"""
+
+from json import loads
+from tempfile import NamedTemporaryFile
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from authentik.core.models import User
+from authentik.sources.ldap.management.commands.benchmark_ldap_sync import PHASES
+from authentik.sources.ldap.models import LDAPSource
+
+
+class TestLDAPSyncBenchmark(TestCase):
+    """LDAP sync benchmark tests"""
+
+    def test_benchmark(self):
+        """Test benchmark command output and rollback of the benchmark data"""
+        with NamedTemporaryFile(suffix=".json") as output:
+            call_command("benchmark_ldap_sync", "--users", "3", "5", f"--output={output.name}")
+            results = loads(output.read())
+        self.assertEqual(
+            [(result["users"], result["indexes"]) for result in results["results"]],
+            [(3, "with"), (3, "without"), (5, "with"), (5, "without")],
+        )
+        for result in results["results"]:
+            self.assertEqual(set(result["phases"].keys()), set(PHASES.keys()))
+            for phase in result["phases"].values():
+                self.assertGreater(phase["queries"], 0)
+                self.assertLessEqual(phase["db_seconds"], phase["seconds"])
+        self.assertFalse(User.objects.filter(username__startswith="benchmark-user-").exists())
+        self.assertFalse(LDAPSource.objects.filter(base_dn__startswith="dc=benchmark").exists())
@@ -2,7 +2,9 @@
 
 from unittest.mock import MagicMock, patch
 
+from django.core.cache import cache
 from django.db.models import Q
+from django.db.models.signals import post_save
 from django.test import TestCase
 
 from authentik.blueprints.tests import apply_blueprint
@@ -10,14 +12,23 @@ from authentik.core.models import Group, User
 from authentik.core.tests.utils import create_test_admin_user
 from authentik.events.models import Event, EventAction, SystemTask
 from authentik.events.system_tasks import TaskStatus
+from authentik.lib.config import CONFIG
 from authentik.lib.generators import generate_id, generate_key
 from authentik.lib.sync.outgoing.exceptions import StopSync
 from authentik.lib.utils.reflection import class_to_path
+from authentik.root.celery import CELERY_APP
 from authentik.sources.ldap.models import LDAPSource, LDAPSourcePropertyMapping
 from authentik.sources.ldap.sync.groups import GroupLDAPSynchronizer
 from authentik.sources.ldap.sync.membership import MembershipLDAPSynchronizer
 from authentik.sources.ldap.sync.users import UserLDAPSynchronizer
-from authentik.sources.ldap.tasks import ldap_sync, ldap_sync_all
+from authentik.sources.ldap.tasks import (
+    CACHE_KEY_PREFIX,
+    CACHE_KEY_STREAM,
+    ldap_sync,
+    ldap_sync_all,
+    ldap_sync_single,
+    ldap_sync_stage,
+)
 from authentik.sources.ldap.tests.mock_ad import mock_ad_connection
 from authentik.sources.ldap.tests.mock_freeipa import mock_freeipa_connection
 from authentik.sources.ldap.tests.mock_slapd import mock_slapd_connection
@@ -145,6 +156,34 @@ class LDAPSyncTests(TestCase):
             self.assertTrue(User.objects.filter(username="user0_sn").exists())
             self.assertFalse(User.objects.filter(username="user1_sn").exists())
 
+    def test_sync_users_unchanged(self):
+        """Test user sync only writing new and changed users"""
+        self.source.object_uniqueness_field = "uid"
+        self.source.user_property_mappings.set(
+            LDAPSourcePropertyMapping.objects.filter(
+                Q(managed__startswith="goauthentik.io/sources/ldap/default")
+                | Q(managed__startswith="goauthentik.io/sources/ldap/openldap")
+            )
+        )
+        connection = MagicMock(return_value=mock_slapd_connection(LDAP_PASSWORD))
+        receiver = MagicMock()
+        post_save.connect(receiver, User, dispatch_uid="test_sync_users_unchanged")
+        self.addCleanup(post_save.disconnect, dispatch_uid="test_sync_users_unchanged")
+        with patch("authentik.sources.ldap.models.LDAPSource.connection", connection):
+            UserLDAPSynchronizer(self.source).sync_full()
+            user = User.objects.get(username="user0_sn")
+            self.assertIn(user, [call.kwargs["instance"] for call in receiver.call_args_list])
+            self.assertTrue(all(call.kwargs["created"] for call in receiver.call_args_list))
+            receiver.reset_mock()
+            UserLDAPSynchronizer(self.source).sync_full()
+            receiver.assert_not_called()
+            user.name = generate_id()
+            user.save()
+            receiver.reset_mock()
+            UserLDAPSynchronizer(self.source).sync_full()
+            receiver.assert_called_once()
+            self.assertNotEqual(User.objects.get(pk=user.pk).name, user.name)
+
     def test_sync_users_freeipa_ish(self):
         """Test user sync (FreeIPA-ish), mainly testing vendor quirks"""
         self.source.object_uniqueness_field = "uid"
@@ -271,3 +310,71 @@ class LDAPSyncTests(TestCase):
         connection = MagicMock(return_value=mock_slapd_connection(LDAP_PASSWORD))
         with patch("authentik.sources.ldap.models.LDAPSource.connection", connection):
             ldap_sync_all.delay().get()
+
+    def test_tasks_stream(self):
+        """Test pages being synced while they are fetched, and removed once synced"""
+        self.source.object_uniqueness_field = "uid"
+        self.source.group_object_filter = "(objectClass=groupOfNames)"
+        self.source.user_property_mappings.set(
+            LDAPSourcePropertyMapping.objects.filter(
+                Q(managed__startswith="goauthentik.io/sources/ldap/default")
+                | Q(managed__startswith="goauthentik.io/sources/ldap/openldap")
+            )
+        )
+        self.source.save()
+        connection = MagicMock(return_value=mock_slapd_connection(LDAP_PASSWORD))
+        with (
+            patch("authentik.sources.ldap.models.LDAPSource.connection", connection),
+            CONFIG.patch("ldap.page_size", 1),
+            CONFIG.patch("ldap.page_concurrency", 1),
+        ):
+            ldap_sync_all.delay().get()
+        self.assertTrue(User.objects.filter(username="user0_sn").exists())
+        self.assertGreater(
+            SystemTask.objects.filter(name="ldap_sync", uid__startswith="ldap:users:").count(), 1
+        )
+        self.assertEqual(cache.keys(f"{CACHE_KEY_PREFIX}*"), [])
+
+    def test_tasks_stream_worker(self):
+        """Test streamed sync without eager tasks, where tasks must not wait for other tasks"""
+        self.source.object_uniqueness_field = "uid"
+        self.source.group_object_filter = "(objectClass=groupOfNames)"
+        self.source.user_property_mappings.set(
+            LDAPSourcePropertyMapping.objects.filter(
+                Q(managed__startswith="goauthentik.io/sources/ldap/default")
+                | Q(managed__startswith="goauthentik.io/sources/ldap/openldap")
+            )
+        )
+        self.source.save()
+        queue = []
+
+        def enqueue(task):
+            def apply_async(args=None, kwargs=None, **_):
+                queue.append((task, args, kwargs))
+
+            return apply_async
+
+        connection = MagicMock(return_value=mock_slapd_connection(LDAP_PASSWORD))
+        with (
+            patch("authentik.sources.ldap.models.LDAPSource.connection", connection),
+            patch.object(CELERY_APP.conf, "task_always_eager", False),
+            # Behave like a worker, where waiting for results raises an error
+            patch("celery.result.task_join_will_block", MagicMock(return_value=True)),
+            patch.object(ldap_sync, "apply_async", enqueue(ldap_sync)),
+            patch.object(ldap_sync_stage, "apply_async", enqueue(ldap_sync_stage)),
+            CONFIG.patch("ldap.page_size", 1),
+            CONFIG.patch("ldap.page_concurrency", 1),
+        ):
+            ldap_sync_single.apply(args=[str(self.source.pk)])
+            # Further pages have been synced by the task itself, membership sync is only started
+            # once the queued page is synced
+            self.assertEqual([task for task, _, _ in queue], [ldap_sync])
+            while queue:
+                self.assertLessEqual(len(cache.keys(f"{CACHE_KEY_PREFIX}*")), 1)
+                task, args, kwargs = queue.pop(0)
+                task.apply(args, kwargs)
+        self.assertTrue(
+            SystemTask.objects.filter(name="ldap_sync", uid__startswith="ldap:membership:").exists()
+        )
+        self.assertEqual(cache.keys(f"{CACHE_KEY_PREFIX}*"), [])
+        self.assertEqual(cache.keys(f"{CACHE_KEY_STREAM}*"), [])
@@ -0,0 +1,47 @@
+"""Test event partitions of new tenants"""
+
+from datetime import timedelta
+
+from django.db import connection
+from django.utils.timezone import now
+from django_tenants.utils import schema_context
+
+from authentik.events.models import Event
+from authentik.events.partitions import (
+    DEFAULT_PARTITION,
+    PARTITIONS_AHEAD,
+    get_partitions,
+    partition_name,
+    week_start,
+)
+from authentik.lib.generators import generate_id
+from authentik.tenants.models import Tenant
+from authentik.tenants.tests.utils import TenantAPITestCase
+
+
+class TestTenantPartitions(TenantAPITestCase):
+    """Test event partitions of new tenants"""
+
+    def test_tenant_create(self):
+        """Test partitions are created for tenants cloned from an outdated template schema"""
+        current = week_start(now())
+        with schema_context("template"):
+            # Template schema which was migrated weeks ago, and contains an event of this week
+            for name, start in get_partitions().items():
+                if start >= current:
+                    with connection.cursor() as cursor:
+                        cursor.execute(f"DROP TABLE {connection.ops.quote_name(name)}")
+            event = Event.new(generate_id())
+            event.save(buffered=False)
+        tenant = Tenant.objects.create(name=generate_id(), schema_name="t_" + generate_id().lower())
+        self.assertTrue(tenant.ready)
+        with tenant:
+            partitions = get_partitions()
+            for week in range(PARTITIONS_AHEAD + 1):
+                self.assertIn(partition_name(current + timedelta(weeks=week)), partitions)
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT count(*) FROM {connection.ops.quote_name(DEFAULT_PARTITION)}"
+                )
+                self.assertEqual(cursor.fetchone()[0], 0)
+            self.assertTrue(Event.objects.filter(pk=event.pk).exists())
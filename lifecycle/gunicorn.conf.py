@@ -61,17 +61,27 @@ threads = CONFIG.get_int("web.threads", 4)
 
 
 def post_fork(server: "Arbiter", worker: DjangoUvicornWorker):
-    """Tell prometheus to use worker number instead of process ID for multiprocess"""
+    """Tell prometheus to use worker number instead of process ID for multiprocess,
+    and start the policy process pool (if enabled)"""
     from prometheus_client import values
 
+    from authentik.policies.pool import start_pool
+
     values.ValueClass = MultiProcessValue(lambda: worker._worker_id)
+    start_pool()
 
 
 def worker_exit(server: "Arbiter", worker: DjangoUvicornWorker):
-    """Remove pid dbs when worker is shutdown"""
+    """Remove pid dbs when worker is shutdown, stop the policy process pool and write
+    buffered events"""
     from prometheus_client import multiprocess
 
+    from authentik.events.buffer import EVENT_BUFFER
+    from authentik.policies.pool import stop_pool
+
     multiprocess.mark_process_dead(worker._worker_id)
+    stop_pool()
+    EVENT_BUFFER.flush()
 
 
 def on_starting(server: "Arbiter"):